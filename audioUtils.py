@@ -25,6 +25,16 @@
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: translate chunks concurrently with translateChunks
+#          10/17/2026: pack Translate requests by UTF-8 size with packChunks
+#          10/17/2026: use the shared clients from awsUtils
+#          10/17/2026: measure phrase durations in memory with getMP3Duration
+#          10/17/2026: synthesize the audio track concurrently and write it once
+#          10/17/2026: stream the transcript instead of loading it whole
+#          10/17/2026: outputFormat and sampleRate for synthesizeChunks, so it can return PCM
+#          10/17/2026: getPhraseDurations times many phrases per Polly request with SSML speech marks
+#          10/17/2026: size speech mark batches with the real mark names; keep audioFileName in getSecondsFromTranslation
+#          10/17/2026: translate with translatePieces, so each sentence or phrase is cached on its own
 #
 # ==================================================================================
 
@@ -34,9 +44,16 @@ import os
 import json
 import re
 import contextlib
+import time
+import random
+import concurrent.futures
 from moviepy.editor import *
 from moviepy import editor
 from contextlib import closing
+from xml.sax.saxutils import escape
+from translateUtils import *
+from awsUtils import *
+from transcribeUtils import *
 
 # ==================================================================================
 # Function: writeAudio
@@ -84,39 +101,100 @@ def writeAudio( output_file, stream ):
 def createAudioTrackFromTranslation( region, transcript, sourceLangCode, targetLangCode, audioFileName ):
 	print( "\n==> createAudioTrackFromTranslation " )
 
-	# Set up the polly and translate services
-	client = boto3.client('polly')
-	translate = boto3.client(service_name='translate', region_name=region, use_ssl=True)
-
 	#get the transcript text
-	temp = json.loads(transcript)
-	transcript_txt = temp["results"]["transcripts"][0]["transcript"]
+	transcript_txt = getTranscriptText( transcript )
 	
 	voiceId = getVoiceId( targetLangCode )
 	
-	sentences = re.split(r'(?<=\.)', transcript_txt)
+	sentences = splitSentences( transcript_txt )
   
-	translatedChunks = []
 	#translate transcript
-	for i in range(0, len(sentences), 10):
-		if (len(sentences) - i > 0 and len(sentences) - i < 10):
-			chunk = " ".join(sentences[i:i+(len(sentences) - i)])
-			translatedChunk = translate.translate_text(Text=chunk, SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
-			translatedChunks.append(translatedChunk["TranslatedText"])
-		else:
-			chunk = " ".join(sentences[i:i+10])
-			translatedChunk = translate.translate_text(Text=chunk, SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
-			translatedChunks.append(translatedChunk["TranslatedText"])
+	translatedSentences = translatePieces( sentences, sourceLangCode, targetLangCode, region )
 
-	# Use the translated text to create the synthesized speech
-	for chunk in translatedChunks:
-		response = client.synthesize_speech( OutputFormat="mp3", SampleRate="22050", Text=chunk, VoiceId=voiceId)
-		if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
-			print( "\t==> Successfully called Polly for speech synthesis")
-			writeAudioStream( response, audioFileName )
-		else:
-			print( "\t==> Error calling Polly for speech synthesis")
+	# Polly takes less text per request than Translate, so repack the translation for it
+	speechChunks = packChunks( splitSentences( " ".join( translatedSentences ) ), maxBytes=MAX_POLLY_CHARS )
+
+	# Use the translated text to create the synthesized speech, then write the whole track at once
+	audioParts = synthesizeChunks( speechChunks, voiceId )
+	writeAudioFile( audioFileName, audioParts )
 	
+
+# Amazon Polly rejects requests with more than this many characters of text.  Packing by UTF-8 bytes against it
+# is on the safe side since a character is never less than a byte
+MAX_POLLY_CHARS = 3000
+
+# ==================================================================================
+# Function: synthesizeChunks
+# Purpose: Use Amazon Polly to synthesize speech for a list of text chunks, several chunks at a time, and return the
+#          audio bytes for each chunk in the same order as the input.  Each chunk is retried on its own if it fails
+# Prrameters: 
+#                 chunks - the list of strings to synthesize.  Each one must fit in a single Polly request
+#                 voiceId - the Amazon Polly voice to use (see getVoiceId)
+#                 maxWorkers - the maximum number of Polly requests in flight at the same time
+#                 maxAttempts - the number of times a chunk is sent before giving up on it
+#                 outputFormat - the Polly output format: "mp3", or "pcm" for 16 bit mono samples
+#                 sampleRate - the sample rate in Hz, as a string.  PCM is only available at "8000" and "16000"
+# ==================================================================================
+def synthesizeChunks( chunks, voiceId, maxWorkers=8, maxAttempts=4, outputFormat="mp3", sampleRate="22050" ):
+
+	# Get the shared polly client
+	client = getClient('polly')
+
+	started = time.time()
+	with concurrent.futures.ThreadPoolExecutor( max_workers=maxWorkers ) as pool:
+		audioParts = list( pool.map( lambda chunk: synthesizeChunk( client, chunk, voiceId, maxAttempts, outputFormat, sampleRate ), chunks ) )
+	elapsed = time.time() - started
+
+	characters = sum( len(chunk) for chunk in chunks )
+	print( "\t==> Synthesized " + str(characters) + " characters in " + str(len(chunks)) + " Polly requests (" + \
+		"%.0f" % ( characters / max( elapsed, 0.001 ) ) + " characters/second)" )
+	return audioParts
+
+# ==================================================================================
+# Function: synthesizeChunk
+# Purpose: Synthesize a single chunk of text and return the audio bytes, backing off and retrying if the call fails
+# Prrameters: 
+#                 client - the Amazon Polly client
+#                 chunk - the text to synthesize
+#                 voiceId - the Amazon Polly voice to use (see getVoiceId)
+#                 maxAttempts - the number of times the chunk is sent before giving up on it
+#                 outputFormat - the Polly output format: "mp3", or "pcm" for 16 bit mono samples
+#                 sampleRate - the sample rate in Hz, as a string
+# ==================================================================================
+def synthesizeChunk( client, chunk, voiceId, maxAttempts=4, outputFormat="mp3", sampleRate="22050" ):
+	attempt = 1
+	while True:
+		try:
+			response = client.synthesize_speech( OutputFormat=outputFormat, SampleRate=sampleRate, Text=chunk, VoiceId=voiceId)
+			with closing(response["AudioStream"]) as stream:
+				return stream.read()
+		except Exception as error:
+			if attempt >= maxAttempts:
+				print( "\t==> Error calling Polly for speech synthesis")
+				raise
+			delay = ( 2 ** attempt ) * 0.25 + random.uniform( 0, 0.5 )
+			print( "\t==> Polly failed (" + str(error) + "), retrying in " + "%.1f" % delay + " seconds" )
+			time.sleep( delay )
+			attempt += 1
+
+# ==================================================================================
+# Function: writeAudioFile
+# Purpose: Write the mp3 parts to the audio file in a single write.  The parts go to a temporary file first which is
+#          then renamed over the target, so a rerun replaces an old track rather than appending to it and a crash
+#          never leaves a half written track behind
+# Prrameters: 
+#                 audioFileName - the name (including extension) of the target audio file (e.g. "abc.mp3")
+#                 audioParts - the list of mp3 bytes, in order
+# ==================================================================================
+def writeAudioFile( audioFileName, audioParts ):
+	data = b"".join( audioParts )
+	print( "\t==> Writing " + str(len(data)) + " bytes to audio file: " + audioFileName )
+
+	tempFileName = audioFileName + ".tmp"
+	with open( tempFileName, "wb" ) as file:
+		file.write( data )
+	os.replace( tempFileName, audioFileName )
+
 # ==================================================================================
 # Function: writeAudioStream
 # Purpose: Utility to write an audio file from the response from the Amazon Polly API
@@ -154,27 +232,236 @@ def getVoiceId( targetLangCode ):
 # Prrameters: 
 #                 textToSynthesize - the raw text to be synthesized   
 #                 targetLangCode - the language code used for the target Amazon Polly output 
-#                 audioFileName - the name (including extension) of the target audio file (e.g. "abc.mp3")
+#                 audioFileName - no longer used; the mp3 is measured in memory instead of being written to this file
+#                 voiceId - the Amazon Polly voice to use, or None for the voice of targetLangCode
 # ==================================================================================
-def getSecondsFromTranslation( textToSynthesize, targetLangCode, audioFileName ):
+def getSecondsFromTranslation( textToSynthesize, targetLangCode, audioFileName=None, voiceId=None ):
 
-	# Set up the polly and translate services
-	client = boto3.client('polly')
-	translate = boto3.client(service_name='translate', region_name="us-east-1", use_ssl=True)
+	# Get the shared polly client rather than building one for every phrase
+	client = getClient('polly')
 	
 	# Use the translated text to create the synthesized speech
-	response = client.synthesize_speech( OutputFormat="mp3", SampleRate="22050", Text=textToSynthesize, VoiceId=getVoiceId( targetLangCode ) )
-	
-	# write the stream out to disk so that we can load it into an AudioClip
-	writeAudioStream( response, audioFileName )
+	response = client.synthesize_speech( OutputFormat="mp3", SampleRate="22050", Text=textToSynthesize, VoiceId=voiceId or getVoiceId( targetLangCode ) )
 	
-	# Load the temporary audio clip into an AudioFileClip
-	audio = AudioFileClip( audioFileName)
+	# measure the mp3 straight from the response rather than writing it to disk and decoding it
+	with closing(response["AudioStream"]) as stream:
+		return getMP3Duration( stream.read() )
 
-	duration = audio.duration
-	audio.close()
-	# return the duration
-	return duration
-	
-	
-	
\ No newline at end of file
+
+# Amazon Polly takes up to 6000 characters of SSML per request, of which at most 3000 can be text (the tags are free)
+MAX_POLLY_SSML_CHARS = 6000
+
+# ==================================================================================
+# Function: getPhraseDurations
+# Purpose: Return how long in seconds each phrase takes to say, timing many phrases with each Polly request.  The
+#          phrases are sent together as SSML with a <mark> before each of them and one at the end, and Polly returns the
+#          time at which it reaches each mark instead of audio.  A phrase lasts from its mark to the next one
+# Prrameters: 
+#                 phrases - the list of phrases of translated text
+#                 targetLangCode - the language code used for the target Amazon Polly output
+#                 maxWorkers - the maximum number of Polly requests in flight at the same time
+#                 maxAttempts - the number of times a request is sent before giving up on it
+# ==================================================================================
+def getPhraseDurations( phrases, targetLangCode, maxWorkers=8, maxAttempts=4 ):
+	client = getClient('polly')
+	voiceId = getVoiceId( targetLangCode )
+	batches = packMarkBatches( phrases )
+
+	started = time.time()
+	with concurrent.futures.ThreadPoolExecutor( max_workers=maxWorkers ) as pool:
+		batchDurations = list( pool.map( lambda batch: getBatchDurations( client, batch, voiceId, maxAttempts ), batches ) )
+	print( "\t==> Timed " + str(len(phrases)) + " phrases in " + str(len(batches)) + " Polly requests (" + \
+		"%.1f" % ( time.time() - started ) + " seconds)" )
+
+	return [ duration for durations in batchDurations for duration in durations ]
+
+# ==================================================================================
+# Function: packMarkBatches
+# Purpose: Pack phrases, in order, into as few speech mark requests as will hold them
+# Prrameters: 
+#                 phrases - the list of phrases of translated text
+# ==================================================================================
+def packMarkBatches( phrases ):
+	batches = []
+	batch = []
+	ssmlLength = len( getMarkSSML( [] ) )
+	textLength = 0
+	for phrase in phrases:
+		# measured with the mark it will really get, whose name grows with its index in the batch
+		phraseSSML = len( getMarkedPhrase( len(batch), phrase ) )
+		if len(batch) > 0 and ( ssmlLength + phraseSSML > MAX_POLLY_SSML_CHARS or textLength + len(phrase) > MAX_POLLY_CHARS ):
+			batches.append( batch )
+			batch = []
+			ssmlLength = len( getMarkSSML( [] ) )
+			textLength = 0
+			phraseSSML = len( getMarkedPhrase( 0, phrase ) )
+		batch.append( phrase )
+		ssmlLength += phraseSSML
+		textLength += len(phrase)
+	if len(batch) > 0:
+		batches.append( batch )
+	return batches
+
+# ==================================================================================
+# Function: getMarkSSML
+# Purpose: Return the SSML for a batch of phrases: each phrase follows a mark named by its index, and a mark named
+#          "end" follows the last one
+# Prrameters: 
+#                 phrases - the list of phrases in the batch
+# ==================================================================================
+def getMarkSSML( phrases ):
+	return "<speak>" + "".join( getMarkedPhrase( i, phrase ) for i, phrase in enumerate( phrases ) ) + '<mark name="end"/></speak>'
+
+# ==================================================================================
+# Function: getMarkedPhrase
+# Purpose: Return the SSML for one phrase of a batch: the mark named by its index, then the phrase
+# Prrameters: 
+#                 i - the index of the phrase in the batch
+#                 phrase - the phrase of translated text
+# ==================================================================================
+def getMarkedPhrase( i, phrase ):
+	return '<mark name="' + str(i) + '"/>' + escape( phrase ) + " "
+
+# ==================================================================================
+# Function: getBatchDurations
+# Purpose: Time one batch of phrases with a single speech mark request, backing off and retrying if the call fails
+# Prrameters: 
+#                 client - the Amazon Polly client
+#                 batch - the list of phrases in the batch
+#                 voiceId - the Amazon Polly voice to use (see getVoiceId)
+#                 maxAttempts - the number of times the request is sent before giving up on it
+# ==================================================================================
+def getBatchDurations( client, batch, voiceId, maxAttempts=4 ):
+	attempt = 1
+	while True:
+		try:
+			response = client.synthesize_speech( OutputFormat="json", SpeechMarkTypes=[ "ssml" ], TextType="ssml", \
+				Text=getMarkSSML( batch ), VoiceId=voiceId )
+			with closing(response["AudioStream"]) as stream:
+				marks = [ json.loads( line ) for line in stream.read().decode( "utf-8" ).splitlines() if len(line.strip()) > 0 ]
+			break
+		except Exception as error:
+			if attempt >= maxAttempts:
+				print( "\t==> Error calling Polly for speech marks")
+				raise
+			delay = ( 2 ** attempt ) * 0.25 + random.uniform( 0, 0.5 )
+			print( "\t==> Polly failed (" + str(error) + "), retrying in " + "%.1f" % delay + " seconds" )
+			time.sleep( delay )
+			attempt += 1
+
+	# mark times are in milliseconds from the start of the batch
+	times = { mark["value"]: mark["time"] / 1000.0 for mark in marks if mark.get( "type" ) == "ssml" }
+	times[str(len(batch))] = times.get( "end" )
+	durations = []
+	for i in range( len(batch) ):
+		if times.get( str(i) ) == None or times.get( str(i + 1) ) == None:
+			# a missing mark means this phrase has to be timed on its own
+			durations.append( getSecondsFromTranslation( batch[i], None, voiceId=voiceId ) )
+		else:
+			durations.append( times[str(i + 1)] - times[str(i)] )
+	return durations
+
+
+# MPEG audio frame header tables, indexed by the bits in the header.  Bitrates are in kbps
+MP3_BITRATES = {
+	( 1, 1 ): [ 0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448 ],
+	( 1, 2 ): [ 0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384 ],
+	( 1, 3 ): [ 0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320 ],
+	( 2, 1 ): [ 0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256 ],
+	( 2, 2 ): [ 0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160 ],
+	( 2, 3 ): [ 0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160 ],
+}
+MP3_SAMPLE_RATES = { 1: [ 44100, 48000, 32000 ], 2: [ 22050, 24000, 16000 ], 2.5: [ 11025, 12000, 8000 ] }
+MP3_VERSIONS = { 0: 2.5, 2: 2, 3: 1 }
+MP3_LAYERS = { 1: 3, 2: 2, 3: 1 }
+
+# ==================================================================================
+# Function: getMP3Duration
+# Purpose: Return the exact duration in seconds of an MP3 held in memory by walking its frame headers.  No temporary
+#          file or decoder is needed: every frame holds a fixed number of samples, so the duration is the number
+#          of samples over the sample rate.  A Xing/Info frame, when present, is not audio and is skipped
+# Prrameters: 
+#                 data - the bytes of the MP3 (e.g. the AudioStream returned by Amazon Polly)
+# ==================================================================================
+def getMP3Duration( data ):
+	position = 0
+
+	# skip an ID3v2 tag: "ID3", version, flags, then a 4 byte size that uses 7 bits per byte
+	if data[:3] == b"ID3" and len(data) >= 10:
+		position = 10 + ( (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9] )
+
+	samples = 0
+	sampleRate = 0
+	firstFrame = True
+	while position + 4 <= len(data):
+		header = getMP3FrameHeader( data, position )
+		if header == None:
+			# not a frame (junk or a trailing ID3v1 tag), look for the next sync
+			position += 1
+			continue
+
+		frameLength, frameSamples, sampleRate, xingOffset = header
+		if firstFrame:
+			firstFrame = False
+			tag = data[position + xingOffset:position + xingOffset + 4]
+			if tag == b"Xing" or tag == b"Info":
+				# the encoder already counted the frames for us
+				flags = int.from_bytes( data[position + xingOffset + 4:position + xingOffset + 8], "big" )
+				if flags & 1:
+					frames = int.from_bytes( data[position + xingOffset + 8:position + xingOffset + 12], "big" )
+					return frames * frameSamples / sampleRate
+				position += frameLength
+				continue
+
+		samples += frameSamples
+		position += frameLength
+
+	if sampleRate == 0:
+		return 0.0
+	return samples / sampleRate
+
+# ==================================================================================
+# Function: getMP3FrameHeader
+# Purpose: Decode the 4 byte MPEG audio frame header found at a position.  Returns None if there is no valid header
+#          there, otherwise (frame length in bytes, samples in the frame, sample rate, offset of a Xing/Info tag)
+# Prrameters: 
+#                 data - the bytes of the MP3
+#                 position - the offset of the header to decode
+# ==================================================================================
+def getMP3FrameHeader( data, position ):
+	b1, b2, b3, b4 = data[position], data[position + 1], data[position + 2], data[position + 3]
+
+	# 11 sync bits
+	if b1 != 0xFF or ( b2 & 0xE0 ) != 0xE0:
+		return None
+
+	version = MP3_VERSIONS.get( (b2 >> 3) & 0x03 )
+	layer = MP3_LAYERS.get( (b2 >> 1) & 0x03 )
+	bitrateIndex = (b3 >> 4) & 0x0F
+	sampleRateIndex = (b3 >> 2) & 0x03
+	if version == None or layer == None or bitrateIndex == 0 or bitrateIndex == 15 or sampleRateIndex == 3:
+		return None
+
+	bitrate = MP3_BITRATES[( 1 if version == 1 else 2, layer )][bitrateIndex] * 1000
+	sampleRate = MP3_SAMPLE_RATES[version][sampleRateIndex]
+	padding = (b3 >> 1) & 0x01
+	mono = ( (b4 >> 6) & 0x03 ) == 3
+
+	if layer == 1:
+		frameSamples = 384
+		frameLength = ( 12 * bitrate // sampleRate + padding ) * 4
+	elif layer == 2 or version == 1:
+		frameSamples = 1152
+		frameLength = 144 * bitrate // sampleRate + padding
+	else:
+		# MPEG 2 and 2.5 layer III frames hold half as many samples
+		frameSamples = 576
+		frameLength = 72 * bitrate // sampleRate + padding
+
+	# the Xing/Info tag sits just after the header and the side information
+	if version == 1:
+		xingOffset = 4 + ( 17 if mono else 32 )
+	else:
+		xingOffset = 4 + ( 9 if mono else 17 )
+
+	return frameLength, frameSamples, sampleRate, xingOffset
@@ -0,0 +1,145 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# awsUtils.py
+#
+# Purpose: The program provides the shared boto3 clients used by the other utils modules.  A client is created once
+#          per service and region and then handed out again from a cache, so its pool of HTTPS connections is kept
+#          between calls instead of being opened afresh for every client
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: endpointUrl, for an S3 compatible service
+#          10/17/2026: report client cache hits as such, rather than as connection reuse
+#          10/17/2026: count the connections opened and the requests sent by botocore's urllib3 pools
+#
+# ==================================================================================
+
+import os
+import threading
+import boto3
+from botocore.config import Config
+
+# The number of HTTPS connections each client keeps open.  It should be at least the number of threads that
+# share a client (see maxWorkers in translateUtils.translateChunks)
+MAX_POOL_CONNECTIONS = 16
+
+clientLock = threading.Lock()
+clients = {}
+clientStats = { "created": 0, "clientCacheHits": 0, "requests": 0 }
+
+
+# ==================================================================================
+# Function: getClient
+# Purpose: Return the shared boto3 client for a service in a region, creating it the first time it is asked for.
+#          Clients are safe to use from several threads once created; creating them is not, hence the lock.  Worker
+#          processes get their own clients since connections can't be shared across a fork
+# Parameters:
+#                 serviceName - the AWS service (e.g. "translate", "polly", "transcribe", "s3")
+#                 region - the AWS region in which to run the service (e.g. "us-east-1"), or None for the default region
+#                 endpointUrl - the URL of a compatible service to send the requests to instead (e.g. a local stand-in
+#                               for S3), or None for AWS
+# ==================================================================================
+def getClient( serviceName, region=None, endpointUrl=None ):
+	key = ( os.getpid(), serviceName, region, endpointUrl )
+
+	with clientLock:
+		if key in clients:
+			clientStats["clientCacheHits"] += 1
+			return clients[key]
+
+		# boto3's default session is not thread safe, so each client gets its own session
+		session = boto3.session.Session()
+		config = Config( max_pool_connections=MAX_POOL_CONNECTIONS, retries={ "mode": "adaptive" } )
+		client = session.client( service_name=serviceName, region_name=region, use_ssl=True, config=config, \
+			endpoint_url=endpointUrl )
+		client.meta.events.register( "before-send", countRequest )
+
+		clients[key] = client
+		clientStats["created"] += 1
+		return client
+
+
+# ==================================================================================
+# Function: countRequest
+# Purpose: botocore event handler that counts the requests sent through the shared clients
+# Parameters:
+#                 **kwargs - the event arguments from botocore (not used)
+# ==================================================================================
+def countRequest( **kwargs ):
+	with clientLock:
+		clientStats["requests"] += 1
+
+
+# ==================================================================================
+# Function: getConnectionCounts
+# Purpose: Return the number of HTTPS connections a client has opened and the number of requests sent over them, read
+#          from the urllib3 connection pools botocore keeps for it.  A pool that urllib3 has already dropped to make room
+#          for another host is no longer counted
+# Parameters:
+#                 client - a boto3 client returned by getClient
+# ==================================================================================
+def getConnectionCounts( client ):
+	connections = 0
+	requests = 0
+	session = client._endpoint.http_session
+	managers = [ session._manager ] + list( getattr( session, "_proxy_managers", {} ).values() )
+	for manager in managers:
+		# the pools container can't be iterated, only looked up by key
+		for key in manager.pools.keys():
+			pool = manager.pools.get( key )
+			if pool != None:
+				connections += pool.num_connections
+				requests += pool.num_requests
+	return connections, requests
+
+
+# ==================================================================================
+# Function: getClientStats
+# Purpose: Return the pool size and the client, connection and request counters of this process.  connections is the
+#          number of HTTPS connections opened and httpRequests the number of requests sent over them, so every request
+#          beyond the first on a connection reused it.  clientCacheHits is the number of times getClient handed out a
+#          client it had already made
+# Parameters:
+#                 None
+# ==================================================================================
+def getClientStats():
+	with clientLock:
+		ownClients = [ client for key, client in clients.items() if key[0] == os.getpid() ]
+		connections = 0
+		httpRequests = 0
+		for client in ownClients:
+			clientConnections, clientRequests = getConnectionCounts( client )
+			connections += clientConnections
+			httpRequests += clientRequests
+		return { "poolSize": MAX_POOL_CONNECTIONS, "clients": len(ownClients), "created": clientStats["created"], \
+			"clientCacheHits": clientStats["clientCacheHits"], "requests": clientStats["requests"], "connections": connections, \
+			"httpRequests": httpRequests, "reusedConnections": max( 0, httpRequests - connections ) }
+
+
+# ==================================================================================
+# Function: printClientStats
+# Purpose: Print the counters returned by getClientStats
+# Parameters:
+#                 None
+# ==================================================================================
+def printClientStats():
+	stats = getClientStats()
+	print( "\t==> AWS clients: " + str(stats["clients"]) + " (" + str(stats["poolSize"]) + " connections each), " + \
+		str(stats["created"]) + " created, " + str(stats["clientCacheHits"]) + " taken from the client cache, " + str(stats["requests"]) + " requests" )
+	print( "\t==> AWS connections: " + str(stats["httpRequests"]) + " requests over " + str(stats["connections"]) + " new connections, " + \
+		str(stats["reusedConnections"]) + " sent on a connection that was already open" )
@@ -0,0 +1,79 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# benchmarkrender.py
+#
+# Purpose: This code compares the frames per second of the two createVideo backends, MoviePy compositing and the
+#          single-pass ffmpeg burn-in, on the first part of a video with its SRT and dubbed audio track
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: -profile
+#
+# ==================================================================================
+
+
+import argparse
+import os
+import time
+import tempfile
+from videoUtils import *
+from ffmpegUtils import *
+from encodingUtils import *
+
+# Get the command line arguments and parse them
+parser = argparse.ArgumentParser( prog='benchmarkrender.py', description='Compare the speed of the video rendering backends')
+parser.add_argument('-infile', required=True, help='The video to render')
+parser.add_argument('-srt', required=True, help='The SRT file to put on the video')
+parser.add_argument('-audio', required=True, help='The alternate audio track')
+parser.add_argument('-encoding', default=None, help='The code page of the SRT file (e.g. cp1252).  Defaults to UTF-8')
+parser.add_argument('-seconds', type=float, default=60, help='How much of the video to render')
+parser.add_argument('-profile', choices=list(ENCODING_PROFILES), default=DEFAULT_ENCODING_PROFILE, help='The encoding profile both backends use')
+parser.add_argument('-segmentjobs', type=int, default=None, help='The number of worker processes for the MoviePy backend.  Defaults to the number of cores')
+
+# The segment worker processes import this module, so only run the benchmark from the main process
+if __name__ == "__main__":
+	args = parser.parse_args()
+	infile = os.path.abspath( args.infile )
+	srt = os.path.abspath( args.srt )
+	audio = os.path.abspath( args.audio )
+
+	# Work in a scratch directory so that no checkpoint from an earlier run is picked up
+	workDir = tempfile.mkdtemp( prefix="benchmarkrender-" )
+	os.chdir( workDir )
+	print( "==> benchmarkrender.py: working in " + workDir )
+
+	trimVideo( infile, "input.mp4", args.seconds )
+
+	results = {}
+	for backend in [ "ffmpeg", "moviepy" ]:
+		outputFileName = "output-" + backend + ".mp4"
+		started = time.time()
+		createVideo( "input.mp4", srt, outputFileName, audio, False, segmentJobs=args.segmentjobs, backend=backend, \
+			subtitlesEncoding=args.encoding, profile=args.profile )
+		elapsed = time.time() - started
+
+		clip = VideoFileClip( outputFileName, audio=False )
+		frames = int( clip.duration * clip.fps )
+		clip.close()
+		results[backend] = { "frames": frames, "seconds": elapsed, "fps": frames / elapsed }
+
+	print( "\n==> Results for the first " + str(args.seconds) + " seconds of " + args.infile + ": " )
+	for backend, result in results.items():
+		print( "\t" + backend + ": " + str(result["frames"]) + " frames in " + "%.1f" % result["seconds"] + " seconds, " + \
+			"%.1f" % result["fps"] + " frames per second" )
+	print( "\tffmpeg is " + "%.1f" % ( results["ffmpeg"]["fps"] / results["moviepy"]["fps"] ) + "x the speed of MoviePy" )
@@ -0,0 +1,49 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# calibrateencoding.py
+#
+# Purpose: This code encodes a short sample of a video with each encoding profile and records the speed and size of
+#          each.  translatevideo.py -sizetarget reads the results to pick the fastest profile that is small enough
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+
+import argparse
+from encodingUtils import *
+
+# Get the command line arguments and parse them
+parser = argparse.ArgumentParser( prog='calibrateencoding.py', description='Measure the speed and output size of each encoding profile')
+parser.add_argument('-infile', required=True, help='The video to take the sample from')
+parser.add_argument('-seconds', type=float, default=30, help='The length of the sample in seconds')
+parser.add_argument('-profiles', nargs='+', choices=list(ENCODING_PROFILES), default=None, help='The profiles to measure.  Defaults to all of them')
+parser.add_argument('-report', default=CALIBRATION_FILE, help='The file to write the results to')
+
+args = parser.parse_args()
+
+print( "==> calibrateencoding.py: the first " + str(args.seconds) + " seconds of " + args.infile + "\n" )
+results = calibrateProfiles( args.infile, args.seconds, args.report, args.profiles )
+
+print( "\n==> Profiles from fastest to slowest: " )
+for name in sorted( results, key=lambda name: -results[name]["fps"] ):
+	profile = ENCODING_PROFILES[name]
+	print( "\t" + name + " (" + profile["preset"] + ", crf " + str(profile["crf"]) + ", " + profile["audioBitrate"] + "): " + \
+		"%.1f" % results[name]["fps"] + " fps, " + "%.1f" % results[name]["mbPerMinute"] + " MB/min" )
+print( "\tResults written to " + args.report )
@@ -0,0 +1,211 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# captionUtils.py
+#
+# Purpose: The program caches the caption images drawn for videoUtils.annotate.  Rasterizing a caption runs ImageMagick,
+#          which is slow, and the same captions come up again and again ("Thank you", "Motion carries", speaker names,
+#          and every caption of a rerun).  Captions are kept as RGB frames in an LRU cache in memory and as .npy files
+#          in an LRU cache on disk, keyed by everything that changes how they look
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: count the stores that trigger pruning apart from the reported counters
+#          10/17/2026: bound the captions kept in memory by their size in bytes rather than their number
+#
+# ==================================================================================
+
+import os
+import json
+import hashlib
+import collections
+import numpy as np
+from moviepy import editor
+
+# The most bytes of caption frames kept in memory by each process.  A 700 x 50 caption is about 100 KB, so this holds a
+# few hundred of them; there is a segment worker per core for every language, and each has its own cache
+CAPTION_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# The directory of the cache on disk, shared by the processes rendering in the same working directory
+CAPTION_CACHE_DIR = "captionCache"
+
+# The number of captions kept on disk.  The least recently used are removed every CAPTION_CACHE_PRUNE_EVERY stores
+# made by a process (and by videoUtils.createVideo once its segments are rendered)
+CAPTION_CACHE_MAX_FILES = 20000
+CAPTION_CACHE_PRUNE_EVERY = 100
+
+captionCache = collections.OrderedDict()
+captionCacheBytes = { "bytes": 0 }
+captionCacheStats = { "memoryHits": 0, "diskHits": 0, "misses": 0, "stores": 0 }
+
+# The stores since the last prune.  Kept apart from captionCacheStats, which getCaptionCacheStats clears for every segment
+captionCachePrune = { "stores": 0 }
+
+
+# ==================================================================================
+# Function: getCaptionClip
+# Purpose: Return an image clip of a caption: the text drawn by ImageMagick in a box of the given size and color.  The
+#          image is taken from the cache when the same caption was drawn before
+# Parameters:
+#                 txt - the text of the caption
+#                 txt_color - the color of the text
+#                 fontsize - the size of the font
+#                 font - the font to use for the text
+#                 size - the width and height of the box
+#                 boxColor - the color of the box behind the text
+# ==================================================================================
+def getCaptionClip( txt, txt_color='white', fontsize=22, font='Arial-Bold', size=(700, 50), boxColor=[0,0,0] ):
+	key = getCaptionKey( txt, txt_color, fontsize, font, size, boxColor )
+	frame = lookupCaption( key )
+	if frame is None:
+		captionCacheStats["misses"] += 1
+		txtclip = editor.TextClip(txt, fontsize=fontsize, font=font, color=txt_color, method="caption", size=size).on_color(color=boxColor)
+		frame = txtclip.get_frame( 0 )
+		storeCaption( key, frame )
+	return editor.ImageClip( frame )
+
+
+# ==================================================================================
+# Function: getCaptionKey
+# Purpose: Return the cache key of a caption, a hash of everything that changes how it looks
+# Parameters:
+#                 txt, txt_color, fontsize, font, size, boxColor - as for getCaptionClip
+# ==================================================================================
+def getCaptionKey( txt, txt_color, fontsize, font, size, boxColor ):
+	values = [ txt, txt_color, fontsize, font, list( size ), list( boxColor ) if not isinstance( boxColor, str ) else boxColor ]
+	return hashlib.sha256( json.dumps( values ).encode( "utf-8" ) ).hexdigest()
+
+
+# ==================================================================================
+# Function: lookupCaption
+# Purpose: Return the frame of a cached caption, or None.  Memory is tried first, then disk; a caption found on disk is
+#          brought into memory
+# Parameters:
+#                 key - the key returned by getCaptionKey
+# ==================================================================================
+def lookupCaption( key ):
+	if key in captionCache:
+		captionCache.move_to_end( key )
+		captionCacheStats["memoryHits"] += 1
+		return captionCache[key]
+
+	fileName = os.path.join( CAPTION_CACHE_DIR, key + ".npy" )
+	try:
+		frame = np.load( fileName )
+	except ( IOError, ValueError ):
+		return None
+
+	# touch the file so that pruning sees it was used
+	try:
+		os.utime( fileName )
+	except OSError:
+		pass
+	captionCacheStats["diskHits"] += 1
+	rememberCaption( key, frame )
+	return frame
+
+
+# ==================================================================================
+# Function: storeCaption
+# Purpose: Add a caption to the cache in memory and on disk.  The file is written under a temporary name and renamed,
+#          so processes sharing the cache never read half of one
+# Parameters:
+#                 key - the key returned by getCaptionKey
+#                 frame - the RGB image of the caption
+# ==================================================================================
+def storeCaption( key, frame ):
+	rememberCaption( key, frame )
+
+	os.makedirs( CAPTION_CACHE_DIR, exist_ok=True )
+	fileName = os.path.join( CAPTION_CACHE_DIR, key + ".npy" )
+	tempFileName = fileName + "." + str( os.getpid() ) + ".tmp"
+	with open( tempFileName, "wb" ) as f:
+		np.save( f, frame )
+	os.replace( tempFileName, fileName )
+
+	captionCacheStats["stores"] += 1
+	captionCachePrune["stores"] += 1
+	if captionCachePrune["stores"] >= CAPTION_CACHE_PRUNE_EVERY:
+		pruneCaptionCache()
+
+
+# ==================================================================================
+# Function: rememberCaption
+# Purpose: Add a caption to the cache in memory, dropping the least recently used ones once the frames held add up to
+#          more than CAPTION_CACHE_MAX_BYTES
+# Parameters:
+#                 key - the key returned by getCaptionKey
+#                 frame - the RGB image of the caption
+# ==================================================================================
+def rememberCaption( key, frame ):
+	if key in captionCache:
+		captionCacheBytes["bytes"] -= captionCache[key].nbytes
+	captionCache[key] = frame
+	captionCache.move_to_end( key )
+	captionCacheBytes["bytes"] += frame.nbytes
+	while captionCacheBytes["bytes"] > CAPTION_CACHE_MAX_BYTES and len(captionCache) > 1:
+		oldKey, oldFrame = captionCache.popitem( last=False )
+		captionCacheBytes["bytes"] -= oldFrame.nbytes
+
+
+# ==================================================================================
+# Function: pruneCaptionCache
+# Purpose: Remove the least recently used captions from the disk cache until it holds CAPTION_CACHE_MAX_FILES
+# Parameters:
+#                 None
+# ==================================================================================
+def pruneCaptionCache():
+	captionCachePrune["stores"] = 0
+	try:
+		entries = [ entry for entry in os.scandir( CAPTION_CACHE_DIR ) if entry.name.endswith( ".npy" ) ]
+	except OSError:
+		return
+	if len(entries) <= CAPTION_CACHE_MAX_FILES:
+		return
+
+	entries.sort( key=lambda entry: entry.stat().st_mtime )
+	for entry in entries[:len(entries) - CAPTION_CACHE_MAX_FILES]:
+		try:
+			os.remove( entry.path )
+		except OSError:
+			pass
+
+
+# ==================================================================================
+# Function: getCaptionCacheStats
+# Purpose: Return a copy of the caption cache counters of this process and clear them
+# Parameters:
+#                 None
+# ==================================================================================
+def getCaptionCacheStats():
+	stats = dict( captionCacheStats )
+	for name in captionCacheStats:
+		captionCacheStats[name] = 0
+	return stats
+
+
+# ==================================================================================
+# Function: printCaptionCacheStats
+# Purpose: Print caption cache counters and the hit rate
+# Parameters:
+#                 stats - the counters, as returned by getCaptionCacheStats (or added up from several of them)
+# ==================================================================================
+def printCaptionCacheStats( stats ):
+	lookups = stats["memoryHits"] + stats["diskHits"] + stats["misses"]
+	hitRate = 100.0 * ( stats["memoryHits"] + stats["diskHits"] ) / lookups if lookups > 0 else 0
+	print( "\t==> Caption cache: " + str(lookups) + " captions, " + str(stats["memoryHits"]) + " from memory, " + \
+		str(stats["diskHits"]) + " from disk, " + str(stats["misses"]) + " drawn (" + "%.1f" % hitRate + "% hit rate)" )
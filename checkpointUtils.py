@@ -0,0 +1,158 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# checkpointUtils.py
+#
+# Purpose: The program provides checkpoints for the stages of the pipeline (transcribe, translate, SRT, audio,
+#          segment clips, final video).  When a stage finishes, its outputs are recorded in a manifest under a key
+#          made from a hash of its inputs.  On a rerun a stage whose inputs haven't changed and whose outputs are
+#          still on disk is skipped, so a crash two hours into a render picks up where it left off
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import os
+import json
+import hashlib
+
+# Each stage has its own small manifest file in this directory, so that languages running in parallel never
+# write to the same file
+CHECKPOINT_DIR = ".checkpoints"
+
+# hashes of files already read by this process, keyed by (path, size, modification time)
+fileHashes = {}
+
+
+# ==================================================================================
+# Function: hashFile
+# Purpose: Return the SHA-256 of a file's contents.  The hash is remembered for as long as the file keeps the same
+#          size and modification time, so a large video is only read once per run
+# Parameters:
+#                 fileName - the file to hash
+# ==================================================================================
+def hashFile( fileName ):
+	info = os.stat( fileName )
+	key = ( os.path.abspath( fileName ), info.st_size, info.st_mtime_ns )
+	if key not in fileHashes:
+		digest = hashlib.sha256()
+		with open( fileName, "rb" ) as f:
+			for block in iter( lambda: f.read( 1 << 20 ), b"" ):
+				digest.update( block )
+		fileHashes[key] = digest.hexdigest()
+	return fileHashes[key]
+
+
+# ==================================================================================
+# Function: getStageKey
+# Purpose: Return the key of a stage: a hash of its parameters and of the contents of its input files
+# Parameters:
+#                 values - a list of the parameters of the stage (anything json can write)
+#                 inputFiles - a list of the files the stage reads
+# ==================================================================================
+def getStageKey( values, inputFiles=[] ):
+	digest = hashlib.sha256()
+	digest.update( json.dumps( values, sort_keys=True, default=str ).encode( "utf-8" ) )
+	for fileName in inputFiles:
+		digest.update( hashFile( fileName ).encode( "utf-8" ) )
+	return digest.hexdigest()
+
+
+# ==================================================================================
+# Function: getStageFileName
+# Purpose: Return the name of the manifest file of a stage
+# Parameters:
+#                 stageName - the name of the stage (e.g. "translate-es")
+#                 checkpointDir - the directory holding the stage manifests
+# ==================================================================================
+def getStageFileName( stageName, checkpointDir=CHECKPOINT_DIR ):
+	return os.path.join( checkpointDir, "".join( c if c.isalnum() or c in "-_." else "_" for c in stageName ) + ".json" )
+
+
+# ==================================================================================
+# Function: isStageComplete
+# Purpose: Return True if the stage already ran with the same key and all of its outputs are still as it left them
+# Parameters:
+#                 stageName - the name of the stage (e.g. "translate-es")
+#                 key - the key returned by getStageKey
+#                 checkpointDir - the directory holding the stage manifests
+# ==================================================================================
+def isStageComplete( stageName, key, checkpointDir=CHECKPOINT_DIR ):
+	try:
+		with open( getStageFileName( stageName, checkpointDir ), "r", encoding="utf-8" ) as f:
+			entry = json.load( f )
+	except ( IOError, ValueError ):
+		return False
+
+	if entry.get( "key" ) != key:
+		return False
+
+	# the outputs must not have gone missing or been changed since
+	for output in entry.get( "outputs", [] ):
+		if not os.path.isfile( output["file"] ):
+			return False
+		info = os.stat( output["file"] )
+		if info.st_size != output["size"] or info.st_mtime_ns != output["mtime"]:
+			return False
+	return True
+
+
+# ==================================================================================
+# Function: completeStage
+# Purpose: Record that a stage finished: its key and the size and modification time of each of its outputs.  The
+#          manifest is written to a temporary file and renamed so a crash never leaves half of one behind
+# Parameters:
+#                 stageName - the name of the stage (e.g. "translate-es")
+#                 key - the key returned by getStageKey
+#                 outputFiles - a list of the files the stage wrote
+#                 checkpointDir - the directory holding the stage manifests
+# ==================================================================================
+def completeStage( stageName, key, outputFiles, checkpointDir=CHECKPOINT_DIR ):
+	os.makedirs( checkpointDir, exist_ok=True )
+	outputs = []
+	for fileName in outputFiles:
+		info = os.stat( fileName )
+		outputs.append( { "file": fileName, "size": info.st_size, "mtime": info.st_mtime_ns } )
+
+	stageFileName = getStageFileName( stageName, checkpointDir )
+	with open( stageFileName + ".tmp", "w", encoding="utf-8" ) as f:
+		json.dump( { "stage": stageName, "key": key, "outputs": outputs }, f, indent=2 )
+	os.replace( stageFileName + ".tmp", stageFileName )
+
+
+# ==================================================================================
+# Function: runStage
+# Purpose: Run a stage unless it already ran with the same inputs.  Returns True if the stage ran, False if it was
+#          skipped.  The stage function must write all of outputFiles
+# Parameters:
+#                 stageName - the name of the stage (e.g. "translate-es")
+#                 values - a list of the parameters of the stage (anything json can write)
+#                 inputFiles - a list of the files the stage reads
+#                 outputFiles - a list of the files the stage writes
+#                 func - the function that runs the stage
+#                 *args, **kwargs - the parameters to call func with
+# ==================================================================================
+def runStage( stageName, values, inputFiles, outputFiles, func, *args, checkpointDir=CHECKPOINT_DIR, **kwargs ):
+	key = getStageKey( [ stageName ] + list( values ), inputFiles )
+	if isStageComplete( stageName, key, checkpointDir ):
+		print( "\t==> Skipping " + stageName + ", its inputs have not changed" )
+		return False
+
+	func( *args, **kwargs )
+	completeStage( stageName, key, outputFiles, checkpointDir )
+	return True
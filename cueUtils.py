@@ -0,0 +1,221 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# cueUtils.py
+#
+# Purpose: The program provides the CueTable used to hold subtitles (phrases) in memory.  Start and end times are
+#          kept as integer milliseconds in arrays and the words of every cue share one token buffer, so a long
+#          transcript costs a few arrays rather than a dict, a list and two strings per subtitle.  Timecodes are only
+#          formatted when the SRT file is written
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: allocateWords to share translated words out over the cues
+#          10/17/2026: remove parseTimeCode, srtReader parses the timecodes now
+#
+# ==================================================================================
+
+import re
+import numpy as np
+from array import array
+
+
+# ==================================================================================
+# Class: CueTable
+# Purpose: A table of subtitle cues.  Cue i runs from starts[i] to ends[i] (in milliseconds) and its words are
+#          tokens[wordOffsets[i]:wordOffsets[i + 1]].  Indexing or iterating the table returns Cue views
+# ==================================================================================
+class CueTable:
+	__slots__ = ( "starts", "ends", "wordOffsets", "tokens" )
+
+	def __init__( self ):
+		self.starts = array( "q" )
+		self.ends = array( "q" )
+		self.wordOffsets = array( "q", [ 0 ] )
+		self.tokens = []
+
+	# add a cue to the end of the table
+	def append( self, startMs, endMs, words ):
+		self.starts.append( startMs )
+		self.ends.append( endMs )
+		self.tokens.extend( words )
+		self.wordOffsets.append( len(self.tokens) )
+
+	def __len__( self ):
+		return len(self.starts)
+
+	def __getitem__( self, i ):
+		if i < 0:
+			i += len(self.starts)
+		if i < 0 or i >= len(self.starts):
+			raise IndexError( "cue index out of range" )
+		return Cue( self, i )
+
+	def __iter__( self ):
+		for i in range( len(self.starts) ):
+			yield Cue( self, i )
+
+	def getWords( self, i ):
+		return self.tokens[self.wordOffsets[i]:self.wordOffsets[i + 1]]
+
+	def getWordCount( self, i ):
+		return self.wordOffsets[i + 1] - self.wordOffsets[i]
+
+	def getText( self, i ):
+		return " ".join( self.tokens[self.wordOffsets[i]:self.wordOffsets[i + 1]] )
+
+	def getWordCounts( self ):
+		return np.diff( np.frombuffer( self.wordOffsets, dtype=np.int64 ) )
+
+	def getDurations( self ):
+		return np.frombuffer( self.ends, dtype=np.int64 ) - np.frombuffer( self.starts, dtype=np.int64 )
+
+	def getTotalWords( self ):
+		return len(self.tokens)
+
+	def getDurationMs( self ):
+		return self.ends[-1] if len(self.ends) > 0 else 0
+
+
+# ==================================================================================
+# Class: Cue
+# Purpose: A light view of one row of a CueTable.  It holds no data of its own
+# ==================================================================================
+class Cue:
+	__slots__ = ( "table", "index" )
+
+	def __init__( self, table, index ):
+		self.table = table
+		self.index = index
+
+	@property
+	def number( self ):
+		return self.index + 1
+
+	@property
+	def start( self ):
+		return self.table.starts[self.index]
+
+	@property
+	def end( self ):
+		return self.table.ends[self.index]
+
+	@property
+	def words( self ):
+		return self.table.getWords( self.index )
+
+	@property
+	def text( self ):
+		return self.table.getText( self.index )
+
+	def __repr__( self ):
+		return "Cue(" + str(self.number) + ", " + formatTimeCode( self.start ) + " --> " + formatTimeCode( self.end ) + ", " + repr(self.text) + ")"
+
+
+# ==================================================================================
+# Function: formatTimeCode
+# Purpose: Format a number of milliseconds as an SRT timecode (HH:MM:SS,mmm)
+# Parameters:
+#                 ms - the time in milliseconds
+# ==================================================================================
+def formatTimeCode( ms ):
+	seconds, ms = divmod( int(ms), 1000 )
+	minutes, seconds = divmod( seconds, 60 )
+	hours, minutes = divmod( minutes, 60 )
+	return "%02d:%02d:%02d,%03d" % ( hours, minutes, seconds, ms )
+
+
+# ==================================================================================
+# Function: secondsToMs
+# Purpose: Convert a time in seconds (a float, or a string as found in the Transcribe output) to whole milliseconds
+# Parameters:
+#                 seconds - the time in seconds
+# ==================================================================================
+def secondsToMs( seconds ):
+	return int( round( float(seconds) * 1000 ) )
+
+
+# ==================================================================================
+# Function: appendWord
+# Purpose: Add a word to a list of tokens the way it reads in a subtitle: words start a new token, while punctuation
+#          is attached to the token before it (e.g. "session" + "." becomes "session.")
+# Parameters:
+#                 tokens - the list of tokens for the cue being built
+#                 word - the word or punctuation mark to add
+# ==================================================================================
+def appendWord( tokens, word ):
+	if len(tokens) == 0 or re.match( '[a-zA-Z0-9]', word ):
+		tokens.append( word )
+	else:
+		tokens[-1] += word
+
+
+# ==================================================================================
+# Function: allocateWords
+# Purpose: Share totalWords words out over the cues in proportion to their weight, using the largest remainder method:
+#          every cue gets the whole part of its share, then the words left over go one each to the cues with the
+#          largest fractional parts.  The counts always add up to exactly totalWords and each is within one word of
+#          its exact share, whatever the language
+# Parameters:
+#                 wordCounts - the number of words in each original cue
+#                 totalWords - the number of (translated) words to share out
+#                 durations - the length of each cue in milliseconds, or None to go by word counts alone
+#                 durationWeight - how much the durations count against the word counts, from 0 (not at all) to 1 (only)
+# ==================================================================================
+def allocateWords( wordCounts, totalWords, durations=None, durationWeight=0.0 ):
+	weights = np.asarray( wordCounts, dtype=np.float64 )
+	if weights.sum() > 0:
+		weights = weights / weights.sum()
+	if durations is not None and durationWeight > 0:
+		durations = np.maximum( np.asarray( durations, dtype=np.float64 ), 0 )
+		if durations.sum() > 0:
+			weights = weights * ( 1 - durationWeight ) + durations / durations.sum() * durationWeight
+	if len(weights) == 0:
+		return np.zeros( 0, dtype=np.int64 )
+	if weights.sum() <= 0:
+		weights = np.ones( len(weights) )
+
+	# the exact share of each cue, from the cumulative shares so rounding error doesn't build up along the table
+	boundaries = np.cumsum( weights ) / weights.sum() * totalWords
+	quotas = np.maximum( np.diff( boundaries, prepend=0.0 ), 0.0 )
+
+	counts = np.floor( quotas ).astype( np.int64 )
+	remainder = totalWords - int( counts.sum() )
+	if remainder > 0:
+		# a stable sort keeps ties in cue order
+		largest = np.argsort( -( quotas - counts ), kind="stable" )[:remainder]
+		counts[largest] += 1
+	return counts
+
+
+# ==================================================================================
+# Function: redistributeWords
+# Purpose: Return a new CueTable with the times of the given cues and the words split between them by counts
+# Parameters:
+#                 cues - the CueTable whose start and end times are kept
+#                 words - the list of words to put in the cues, in order
+#                 counts - the number of words for each cue (e.g. from allocateWords), adding up to len(words)
+# ==================================================================================
+def redistributeWords( cues, words, counts ):
+	table = CueTable()
+	table.starts = array( "q", cues.starts )
+	table.ends = array( "q", cues.ends )
+	offsets = np.concatenate( ( [ 0 ], np.cumsum( counts, dtype=np.int64 ) ) ).astype( np.int64 )
+	table.wordOffsets = array( "q" )
+	table.wordOffsets.frombytes( offsets.tobytes() )
+	table.tokens = list( words )
+	return table
@@ -0,0 +1,270 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# dubbingUtils.py
+#
+# Purpose: The program builds the dubbed audio track on the timeline of the translated SRT file.  The speech for each
+#          cue is synthesized as PCM and placed in a single NumPy buffer at the start time of its cue, instead of the
+#          chunks being joined back to back, so the dub stays in step with the video.  A cue whose speech runs into the
+#          next one is sped up, or pushed back a little (never more than the tolerance), and the whole track is
+#          encoded to MP3 once at the end
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: hold the delay of each cue to the tolerance, speeding up or trimming speech that still doesn't fit
+#
+# ==================================================================================
+
+import os
+import numpy as np
+from audioUtils import *
+from srtReader import *
+from ffmpegUtils import *
+
+# Polly returns PCM at 8000 or 16000 Hz
+DUB_SAMPLE_RATE = 16000
+
+# How far (in seconds) a cue's speech may run into the next cue, or start after its own cue, before it is sped up
+DUB_TOLERANCE = 0.25
+
+# The most a cue's speech is sped up as a rule.  Past this it is pushed back instead, so it stays intelligible
+DUB_MAX_SPEEDUP = 1.35
+
+# Speech that still runs more than the tolerance into the next cue is sped up as far as this, and what doesn't fit
+# after that is cut off, so a cue never starts more than the tolerance late and the delay can't build up
+DUB_HARD_SPEEDUP = 1.75
+
+# The length of the fade at the end of speech that is cut off (in samples, 10 ms at 16000 Hz)
+TRIM_FADE = 160
+
+# The length of the frames used to speed up speech (in samples, 32 ms at 16000 Hz)
+STRETCH_FRAME = 512
+
+
+# ==================================================================================
+# Function: createDubbedAudioTrack
+# Purpose: Synthesize the cues of a translated SRT file and write them to an MP3 file, each at the time of its cue.
+#          Returns the timing report of buildDubTimeline
+# Parameters:
+#                 srtFileName - the translated SRT file (e.g. "subtitles-es.srt")
+#                 targetLangCode - the language code of the SRT file (e.g. Spanish = "es")
+#                 audioFileName - the name (including extension) of the target audio file (e.g. "audio-es.mp3")
+#                 duration - the length of the video in seconds, so the track is at least as long; or None
+#                 srtEncoding - the code page the SRT file was written in, or None to detect it
+#                 tolerance - how far in seconds speech may run over or start late before it is sped up
+#                 maxSpeedup - the most the speech of a cue is sped up
+# ==================================================================================
+def createDubbedAudioTrack( srtFileName, targetLangCode, audioFileName, duration=None, srtEncoding=None, tolerance=DUB_TOLERANCE, \
+	maxSpeedup=DUB_MAX_SPEEDUP ):
+	print( "\n==> createDubbedAudioTrack " )
+
+	cues = readSRT( srtFileName, srtEncoding )
+	texts = [ cues.getText( i ) for i in range( len(cues) ) ]
+	spoken = [ i for i in range( len(texts) ) if len(texts[i].strip()) > 0 ]
+
+	# Synthesize the cues with text as raw 16 bit samples, so there is nothing to decode
+	pcmParts = synthesizeChunks( [ texts[i] for i in spoken ], getVoiceId( targetLangCode ), outputFormat="pcm", sampleRate=str(DUB_SAMPLE_RATE) )
+	speech = [ np.zeros( 0, dtype=np.int16 ) ] * len(texts)
+	for i, pcm in zip( spoken, pcmParts ):
+		speech[i] = np.frombuffer( pcm, dtype="<i2" )
+
+	starts = np.frombuffer( cues.starts, dtype=np.int64 )
+	track, report = buildDubTimeline( starts, speech, DUB_SAMPLE_RATE, duration, tolerance, maxSpeedup )
+	printDubReport( report )
+
+	encodePCM( track, DUB_SAMPLE_RATE, audioFileName )
+	return report
+
+
+# ==================================================================================
+# Function: buildDubTimeline
+# Purpose: Place the speech of each cue in one buffer at the start of its cue.  Speech that would run more than
+#          tolerance into the next cue is sped up, by at most maxSpeedup, and may push the next cue back by up to
+#          tolerance.  Speech that still doesn't fit is sped up further, up to DUB_HARD_SPEEDUP, and then cut off, so no
+#          cue ever starts more than tolerance late.  Returns the buffer and a report of the corrections: how many cues
+#          were sped up, sped up past maxSpeedup, cut off or pushed back, and the drift from the cue times with the
+#          timeline and without it (the chunks joined back to back)
+# Parameters:
+#                 starts - the start time of each cue in milliseconds
+#                 speech - the 16 bit samples of each cue (empty for a cue with no text)
+#                 sampleRate - the sample rate of the speech in Hz
+#                 duration - the length of the video in seconds, so the track is at least as long; or None
+#                 tolerance - how far in seconds speech may run over or start late before it is sped up
+#                 maxSpeedup - the most the speech of a cue is sped up
+# ==================================================================================
+def buildDubTimeline( starts, speech, sampleRate, duration=None, tolerance=DUB_TOLERANCE, maxSpeedup=DUB_MAX_SPEEDUP ):
+	starts = np.asarray( starts, dtype=np.int64 ) * sampleRate // 1000
+	toleranceSamples = int( tolerance * sampleRate )
+	endOfVideo = int( duration * sampleRate ) if duration != None else None
+
+	# First work out where each cue goes and how much it has to be sped up
+	positions = np.zeros( len(speech), dtype=np.int64 )
+	placed = []
+	speedups = 0
+	hardSpeedups = 0
+	trims = 0
+	savedSamples = 0
+	trimmedSamples = 0
+	cursor = 0
+	for i in range( len(speech) ):
+		samples = speech[i]
+		position = max( int(starts[i]), cursor )
+
+		# the speech may run up to tolerance into the next cue (or past the end of the video)
+		if i + 1 < len(speech):
+			limit = int(starts[i + 1]) + toleranceSamples
+		elif endOfVideo != None:
+			limit = endOfVideo + toleranceSamples
+		else:
+			limit = None
+
+		if limit != None and len(samples) > 0 and position + len(samples) > limit:
+			# up to maxSpeedup, the speech may end as late as the next cue starts plus the tolerance
+			factor = min( maxSpeedup, len(samples) / float( max( limit - position, 1 ) ) )
+			if factor > 1.0:
+				stretched = timeStretch( samples, factor )
+				savedSamples += len(samples) - len(stretched)
+				samples = stretched
+				speedups += 1
+
+			# and it must, so that the next cue starts at most the tolerance late: faster still, then cut off
+			if position + len(samples) > limit:
+				factor = min( DUB_HARD_SPEEDUP / maxSpeedup, len(samples) / float( max( limit - position, 1 ) ) )
+				if factor > 1.0:
+					stretched = timeStretch( samples, factor )
+					savedSamples += len(samples) - len(stretched)
+					samples = stretched
+					hardSpeedups += 1
+			if position + len(samples) > limit:
+				keep = max( limit - position, 0 )
+				trimmedSamples += len(samples) - keep
+				samples = fadeOut( samples[:keep] )
+				trims += 1
+
+		positions[i] = position
+		placed.append( samples )
+		if len(samples) > 0:
+			cursor = position + len(samples)
+
+	# then copy the speech into a buffer allocated once for the whole track
+	length = max( cursor, endOfVideo or 0 )
+	track = np.zeros( length, dtype=np.int16 )
+	for position, samples in zip( positions, placed ):
+		track[position:position + len(samples)] = samples
+
+	# Drift is how late each cue's speech starts compared with its cue, with the timeline and with the old back to back join
+	hasSpeech = np.array( [ len(samples) > 0 for samples in speech ], dtype=bool )
+	lengths = np.array( [ len(samples) for samples in speech ], dtype=np.int64 )
+	backToBack = np.concatenate( ( [ 0 ], np.cumsum( lengths )[:-1] ) ) if len(lengths) > 0 else lengths
+	drift = ( positions - starts )[hasSpeech] / float( sampleRate )
+	naiveDrift = np.abs( backToBack - starts )[hasSpeech] / float( sampleRate )
+
+	report = { "cues": int( hasSpeech.sum() ), "speedups": speedups, "speedupSeconds": savedSamples / float( sampleRate ), \
+		"hardSpeedups": hardSpeedups, "trimmed": trims, "trimmedSeconds": trimmedSamples / float( sampleRate ), \
+		"shifted": int( ( drift > 0 ).sum() ), "maxDrift": float( drift.max() ) if len(drift) > 0 else 0.0, \
+		"meanDrift": float( drift.mean() ) if len(drift) > 0 else 0.0, \
+		"maxDriftBackToBack": float( naiveDrift.max() ) if len(naiveDrift) > 0 else 0.0, \
+		"meanDriftBackToBack": float( naiveDrift.mean() ) if len(naiveDrift) > 0 else 0.0, \
+		"seconds": length / float( sampleRate ) }
+	return track, report
+
+
+# ==================================================================================
+# Function: timeStretch
+# Purpose: Speed up speech without raising its pitch, by overlap-adding windowed frames taken further apart than they
+#          are put back together.  Returns about len(samples) / factor samples
+# Parameters:
+#                 samples - the 16 bit samples to speed up
+#                 factor - how much faster to make it (e.g. 1.2 for 20% faster)
+# ==================================================================================
+def timeStretch( samples, factor ):
+	frame = STRETCH_FRAME
+	synthesisHop = frame // 2
+	analysisHop = max( 1, int( round( synthesisHop * factor ) ) )
+
+	samples = samples.astype( np.float32 )
+	if len(samples) < frame:
+		samples = np.pad( samples, ( 0, frame - len(samples) ) )
+
+	frames = ( len(samples) - frame ) // analysisHop + 1
+	window = np.hanning( frame ).astype( np.float32 )
+	offsets = np.arange( frame )
+
+	# every frame at once: frame k is read from k * analysisHop and written to k * synthesisHop
+	reads = np.arange( frames )[:, None] * analysisHop + offsets
+	writes = np.arange( frames )[:, None] * synthesisHop + offsets
+	output = np.zeros( ( frames - 1 ) * synthesisHop + frame, dtype=np.float32 )
+	weights = np.zeros( len(output), dtype=np.float32 )
+	np.add.at( output, writes, samples[reads] * window )
+	np.add.at( weights, writes, np.broadcast_to( window, writes.shape ) )
+
+	output /= np.maximum( weights, 1e-3 )
+	return np.clip( np.round( output ), -32768, 32767 ).astype( np.int16 )
+
+
+# ==================================================================================
+# Function: fadeOut
+# Purpose: Fade the end of speech that was cut off down to silence, so it doesn't end on a click
+# Parameters:
+#                 samples - the 16 bit samples
+# ==================================================================================
+def fadeOut( samples ):
+	samples = samples.copy()
+	length = min( TRIM_FADE, len(samples) )
+	if length > 0:
+		samples[-length:] = ( samples[-length:] * np.linspace( 1.0, 0.0, length ) ).astype( np.int16 )
+	return samples
+
+
+# ==================================================================================
+# Function: encodePCM
+# Purpose: Encode 16 bit mono samples to an audio file (MP3 for a .mp3 name) with a single ffmpeg run.  The file is
+#          written under a temporary name and renamed so a crash never leaves half a track behind
+# Parameters:
+#                 samples - the 16 bit samples of the track
+#                 sampleRate - the sample rate in Hz
+#                 audioFileName - the name (including extension) of the target audio file (e.g. "audio-es.mp3")
+# ==================================================================================
+def encodePCM( samples, sampleRate, audioFileName ):
+	rawFileName = audioFileName + ".pcm"
+	samples.astype( "<i2" ).tofile( rawFileName )
+
+	root, extension = os.path.splitext( audioFileName )
+	tempFileName = root + ".tmp" + extension
+	print( "\t==> Encoding " + "%.1f" % ( len(samples) / float( sampleRate ) ) + " seconds of audio to " + audioFileName )
+	try:
+		runFFmpeg( [ "-f", "s16le", "-ar", str(sampleRate), "-ac", "1", "-i", rawFileName, tempFileName ] )
+	finally:
+		os.remove( rawFileName )
+	os.replace( tempFileName, audioFileName )
+
+
+# ==================================================================================
+# Function: printDubReport
+# Purpose: Print the corrections made by buildDubTimeline
+# Parameters:
+#                 report - the report returned by buildDubTimeline
+# ==================================================================================
+def printDubReport( report ):
+	print( "\t==> Placed " + str(report["cues"]) + " cues on a " + "%.1f" % report["seconds"] + " second timeline" )
+	print( "\t==> Sped up " + str(report["speedups"]) + " cues (" + "%.1f" % report["speedupSeconds"] + " seconds saved), " + \
+		str(report["shifted"]) + " cues start late" )
+	if report["hardSpeedups"] > 0 or report["trimmed"] > 0:
+		print( "\t==> " + str(report["hardSpeedups"]) + " cues sped up past the usual limit, " + str(report["trimmed"]) + " cut off (" + \
+			"%.1f" % report["trimmedSeconds"] + " seconds of speech dropped) to keep the delay within the tolerance" )
+	print( "\t==> Drift from the cue times: max " + "%.2f" % report["maxDrift"] + "s, mean " + "%.2f" % report["meanDrift"] + \
+		"s (back to back it would be max " + "%.2f" % report["maxDriftBackToBack"] + "s, mean " + "%.2f" % report["meanDriftBackToBack"] + "s)" )
@@ -0,0 +1,205 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# durationUtils.py
+#
+# Purpose: The program predicts how long a Polly voice takes to say a phrase, without calling Polly.  Each voice has a
+#          linear model over a few counts taken from the text (words, syllables, characters, pauses, digits), fitted
+#          by least squares to the phrases measured so far and kept in a local file.  Phrases the model isn't sure
+#          about are measured with Polly instead, and what is measured is added to the model
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: keep the models next to this module, and fit them to speech mark measurements only
+#
+# ==================================================================================
+
+import os
+import re
+import json
+import numpy as np
+from audioUtils import *
+
+# The directory holding one model file per voice.  It sits next to this module so that every video of a batch adds
+# to the same models, whichever working directory it runs in
+DURATION_MODEL_DIR = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), "durationModels" )
+
+# The number of measured phrases kept per voice, the most recent ones
+DURATION_MAX_SAMPLES = 20000
+
+# A voice needs this many measured phrases before its predictions are trusted at all
+DURATION_MIN_SAMPLES = 50
+
+# A prediction is trusted when its standard error is at most this fraction of the prediction
+DURATION_MAX_RELATIVE_ERROR = 0.2
+
+# Vowels in the alphabets of the voices, to count syllables as groups of vowels
+VOWEL_GROUPS = re.compile( "[aeiouyàáâãäåæèéêëìíîïòóôõöøùúûüýÿаеёиоуыэюяіїєαεηιουωάέήίόύώ]+", re.IGNORECASE )
+PAUSES = re.compile( "[,;:—–]" )
+SENTENCE_ENDS = re.compile( "[.?!。？！]+" )
+DIGITS = re.compile( "[0-9]" )
+
+
+# ==================================================================================
+# Function: getPhraseFeatures
+# Purpose: Return the counts the model uses for each phrase, one row per phrase: a constant, words, syllables,
+#          characters, pauses, sentence ends and digits
+# Parameters:
+#                 phrases - the list of phrases
+# ==================================================================================
+def getPhraseFeatures( phrases ):
+	features = np.ones( ( len(phrases), 7 ), dtype=np.float64 )
+	for i, phrase in enumerate( phrases ):
+		features[i, 1] = len( phrase.split() )
+		features[i, 2] = len( VOWEL_GROUPS.findall( phrase ) )
+		features[i, 3] = len( phrase )
+		features[i, 4] = len( PAUSES.findall( phrase ) )
+		features[i, 5] = len( SENTENCE_ENDS.findall( phrase ) )
+		features[i, 6] = len( DIGITS.findall( phrase ) )
+	return features
+
+
+# ==================================================================================
+# Function: loadDurationModel
+# Purpose: Return the model of a voice: its measured phrases (as feature rows and durations in microseconds) and the
+#          fit made from them.  A voice with no model file gets an empty model
+# Parameters:
+#                 voiceId - the Amazon Polly voice (e.g. "Penelope")
+#                 modelDir - the directory holding the model files
+# ==================================================================================
+def loadDurationModel( voiceId, modelDir=DURATION_MODEL_DIR ):
+	try:
+		with open( os.path.join( modelDir, voiceId + ".json" ), "r", encoding="utf-8" ) as f:
+			model = json.load( f )
+	except ( IOError, ValueError ):
+		return { "voiceId": voiceId, "features": [], "durations": [], "fit": None }
+	return model
+
+
+# ==================================================================================
+# Function: saveDurationModel
+# Purpose: Write the model of a voice to its file, under a temporary name first so a crash never leaves half of it
+# Parameters:
+#                 model - the model returned by loadDurationModel
+#                 modelDir - the directory holding the model files
+# ==================================================================================
+def saveDurationModel( model, modelDir=DURATION_MODEL_DIR ):
+	os.makedirs( modelDir, exist_ok=True )
+	fileName = os.path.join( modelDir, model["voiceId"] + ".json" )
+	with open( fileName + ".tmp", "w", encoding="utf-8" ) as f:
+		json.dump( model, f )
+	os.replace( fileName + ".tmp", fileName )
+
+
+# ==================================================================================
+# Function: fitDurationModel
+# Purpose: Fit the weights of a model to its measured phrases by least squares, along with what is needed to tell how
+#          sure a prediction is: the spread of the errors and the inverse of the (slightly regularized) normal matrix
+# Parameters:
+#                 model - the model returned by loadDurationModel
+# ==================================================================================
+def fitDurationModel( model ):
+	if len(model["durations"]) <= 7:
+		model["fit"] = None
+		return model
+
+	X = np.asarray( model["features"], dtype=np.float64 )
+	y = np.asarray( model["durations"], dtype=np.float64 )
+
+	normal = X.T @ X + np.eye( X.shape[1] ) * 1e-6
+	normalInverse = np.linalg.inv( normal )
+	weights = normalInverse @ X.T @ y
+	residuals = y - X @ weights
+	sigma = float( np.sqrt( residuals @ residuals / max( len(y) - X.shape[1], 1 ) ) )
+
+	model["fit"] = { "weights": weights.tolist(), "sigma": sigma, "normalInverse": normalInverse.tolist(), "samples": len(y), \
+		"maxFeatures": X.max( axis=0 ).tolist() }
+	return model
+
+
+# ==================================================================================
+# Function: recordPhraseDurations
+# Purpose: Add measured phrases to the model of a voice, refit it and save it.  The durations must be measured with
+#          speech marks (see audioUtils.getPhraseDurations), from the start of a phrase to the start of the next.  The
+#          length of a phrase synthesized on its own also counts the silence and padding at either end of the MP3, so
+#          it doesn't belong in the same model
+# Parameters:
+#                 voiceId - the Amazon Polly voice (e.g. "Penelope")
+#                 phrases - the list of phrases that were measured
+#                 seconds - the duration of each phrase in seconds, measured with speech marks
+#                 modelDir - the directory holding the model files
+# ==================================================================================
+def recordPhraseDurations( voiceId, phrases, seconds, modelDir=DURATION_MODEL_DIR ):
+	if len(phrases) == 0:
+		return
+	model = loadDurationModel( voiceId, modelDir )
+	model["features"] = ( model["features"] + getPhraseFeatures( phrases ).tolist() )[-DURATION_MAX_SAMPLES:]
+	model["durations"] = ( model["durations"] + [ int( round( s * 1000000 ) ) for s in seconds ] )[-DURATION_MAX_SAMPLES:]
+	saveDurationModel( fitDurationModel( model ), modelDir )
+
+
+# ==================================================================================
+# Function: predictPhraseDurations
+# Purpose: Predict how long a voice takes to say each phrase, for all of the phrases at once.  Returns the durations in
+#          microseconds and whether each prediction is trusted: the model must have enough measured phrases, the
+#          phrase must not be longer than any it was fitted to, and the standard error must be small enough
+# Parameters:
+#                 voiceId - the Amazon Polly voice (e.g. "Penelope")
+#                 phrases - the list of phrases
+#                 modelDir - the directory holding the model files
+#                 maxRelativeError - the largest standard error, as a fraction of the prediction, that is trusted
+# ==================================================================================
+def predictPhraseDurations( voiceId, phrases, modelDir=DURATION_MODEL_DIR, maxRelativeError=DURATION_MAX_RELATIVE_ERROR ):
+	fit = loadDurationModel( voiceId, modelDir )["fit"]
+	if fit == None or fit["samples"] < DURATION_MIN_SAMPLES:
+		return np.zeros( len(phrases), dtype=np.int64 ), np.zeros( len(phrases), dtype=bool )
+
+	X = getPhraseFeatures( phrases )
+	predicted = np.maximum( X @ np.asarray( fit["weights"] ), 0 )
+
+	# the standard error of a new observation: sigma * sqrt( 1 + x (X'X)^-1 x' )
+	leverage = np.einsum( "ij,jk,ik->i", X, np.asarray( fit["normalInverse"] ), X )
+	error = fit["sigma"] * np.sqrt( 1 + np.maximum( leverage, 0 ) )
+	inRange = np.all( X <= np.asarray( fit["maxFeatures"] ), axis=1 )
+	confident = inRange & ( predicted > 0 ) & ( error <= predicted * maxRelativeError )
+
+	return np.round( predicted ).astype( np.int64 ), confident
+
+
+# ==================================================================================
+# Function: estimatePhraseDurations
+# Purpose: Return how long in microseconds each phrase takes to say in the target language.  The voice's model predicts
+#          them all at once; the phrases it isn't sure about are measured with Polly speech marks (see
+#          audioUtils.getPhraseDurations) and added to the model, so the next transcript needs fewer of them
+# Parameters:
+#                 phrases - the list of phrases of translated text
+#                 targetLangCode - the language code used for the target Amazon Polly output
+#                 modelDir - the directory holding the model files
+# ==================================================================================
+def estimatePhraseDurations( phrases, targetLangCode, modelDir=DURATION_MODEL_DIR ):
+	voiceId = getVoiceId( targetLangCode )
+	durations, confident = predictPhraseDurations( voiceId, phrases, modelDir )
+
+	unsure = np.flatnonzero( ~confident )
+	print( "\t==> Predicted " + str(len(phrases) - len(unsure)) + " of " + str(len(phrases)) + " phrase durations for " + voiceId + \
+		", measuring the other " + str(len(unsure)) + " with Polly" )
+	if len(unsure) > 0:
+		unsurePhrases = [ phrases[i] for i in unsure ]
+		seconds = getPhraseDurations( unsurePhrases, targetLangCode )
+		durations[unsure] = np.round( np.asarray( seconds ) * 1000000 ).astype( np.int64 )
+		recordPhraseDurations( voiceId, unsurePhrases, seconds, modelDir )
+	return durations
@@ -0,0 +1,152 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# encodingUtils.py
+#
+# Purpose: The program provides the named encoding profiles used when writing videos (x264 preset, threads, CRF and
+#          audio bitrate) and the calibration that measures each profile on a sample of the input, so that a run can
+#          pick the fastest profile that meets a size target
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: measure MB per minute against the length of the trimmed sample
+#
+# ==================================================================================
+
+import os
+import json
+import time
+import tempfile
+from ffmpegUtils import *
+
+# The encoding profiles.  threads = 0 lets x264 choose the number of threads
+ENCODING_PROFILES = {
+	"draft":    { "preset": "ultrafast", "threads": 0, "crf": 30, "audioBitrate": "64k" },
+	"fast":     { "preset": "veryfast",  "threads": 0, "crf": 26, "audioBitrate": "96k" },
+	"balanced": { "preset": "medium",    "threads": 0, "crf": 23, "audioBitrate": "128k" },
+	"small":    { "preset": "slow",      "threads": 0, "crf": 28, "audioBitrate": "96k" },
+	"quality":  { "preset": "slow",      "threads": 0, "crf": 18, "audioBitrate": "192k" },
+}
+DEFAULT_ENCODING_PROFILE = "balanced"
+
+# The file the calibration results are written to
+CALIBRATION_FILE = "encoding-calibration.json"
+
+
+# ==================================================================================
+# Function: getEncodingProfile
+# Purpose: Return the settings of a named encoding profile
+# Parameters:
+#                 profileName - the name of the profile (e.g. "fast"), or None for the default profile
+# ==================================================================================
+def getEncodingProfile( profileName ):
+	if profileName == None:
+		profileName = DEFAULT_ENCODING_PROFILE
+	if profileName not in ENCODING_PROFILES:
+		raise ValueError( "Unknown encoding profile " + profileName + ", expected one of " + ", ".join( ENCODING_PROFILES ) )
+	return ENCODING_PROFILES[profileName]
+
+
+# ==================================================================================
+# Function: getMoviePyParams
+# Purpose: Return the keyword arguments for MoviePy's write_videofile that encode with a profile
+# Parameters:
+#                 profileName - the name of the profile (e.g. "fast"), or None for the default profile
+# ==================================================================================
+def getMoviePyParams( profileName ):
+	profile = getEncodingProfile( profileName )
+	return { "codec": "libx264", "preset": profile["preset"], "threads": profile["threads"] or None, \
+		"audio_bitrate": profile["audioBitrate"], "ffmpeg_params": [ "-crf", str(profile["crf"]) ] }
+
+
+# ==================================================================================
+# Function: getFFmpegParams
+# Purpose: Return the ffmpeg output options that encode with a profile
+# Parameters:
+#                 profileName - the name of the profile (e.g. "fast"), or None for the default profile
+# ==================================================================================
+def getFFmpegParams( profileName ):
+	profile = getEncodingProfile( profileName )
+	return [ "-c:v", "libx264", "-preset", profile["preset"], "-crf", str(profile["crf"]), "-threads", str(profile["threads"]), \
+		"-c:a", "aac", "-b:a", profile["audioBitrate"] ]
+
+
+# ==================================================================================
+# Function: calibrateProfiles
+# Purpose: Encode the first seconds of a video with each profile and record how fast it went and how big the result
+#          was, as frames per second and megabytes per minute of video.  The results are written to a JSON file for
+#          pickEncodingProfile and returned
+# Parameters:
+#                 originalClipName - the filename of the orignal content (e.g. "originalVideo.mp4")
+#                 seconds - the length of the sample in seconds
+#                 calibrationFileName - the file to write the results to
+#                 profileNames - the profiles to measure, or None for all of them
+# ==================================================================================
+def calibrateProfiles( originalClipName, seconds=30, calibrationFileName=CALIBRATION_FILE, profileNames=None ):
+	# videoUtils imports this module, so its getMediaDuration is imported here rather than at the top
+	from videoUtils import getMediaDuration
+
+	workDir = tempfile.mkdtemp( prefix="calibrate-" )
+	sampleFileName = os.path.join( workDir, "sample.mp4" )
+	trimVideo( originalClipName, sampleFileName, seconds )
+
+	# a source shorter than the sample gives a shorter sample, and the sizes must be per minute of what was encoded
+	seconds = getMediaDuration( sampleFileName ) or seconds
+
+	results = {}
+	for profileName in ( profileNames or list( ENCODING_PROFILES ) ):
+		outputFileName = os.path.join( workDir, profileName + ".mp4" )
+		started = time.time()
+		frames = runFFmpeg( [ "-i", sampleFileName ] + getFFmpegParams( profileName ) + [ outputFileName ] )
+		elapsed = time.time() - started
+		size = os.path.getsize( outputFileName )
+		os.remove( outputFileName )
+
+		results[profileName] = { "seconds": elapsed, "fps": frames / elapsed if elapsed > 0 else 0, "bytes": size, \
+			"mbPerMinute": size / 1048576.0 / seconds * 60 }
+		print( "\t==> " + profileName + ": " + "%.1f" % results[profileName]["fps"] + " frames per second, " + \
+			"%.1f" % results[profileName]["mbPerMinute"] + " MB per minute" )
+
+	os.remove( sampleFileName )
+	os.rmdir( workDir )
+
+	with open( calibrationFileName, "w", encoding="utf-8" ) as f:
+		json.dump( { "infile": originalClipName, "sampleSeconds": seconds, "profiles": results }, f, indent=2 )
+	return results
+
+
+# ==================================================================================
+# Function: pickEncodingProfile
+# Purpose: Return the name of the fastest calibrated profile whose output is no bigger than the size target.  If none
+#          of them is small enough, the smallest one is returned
+# Parameters:
+#                 mbPerMinute - the size target, in megabytes per minute of video
+#                 calibrationFileName - the file written by calibrateProfiles
+# ==================================================================================
+def pickEncodingProfile( mbPerMinute, calibrationFileName=CALIBRATION_FILE ):
+	with open( calibrationFileName, "r", encoding="utf-8" ) as f:
+		results = json.load( f )["profiles"]
+
+	fitting = [ name for name in results if results[name]["mbPerMinute"] <= mbPerMinute ]
+	if len(fitting) == 0:
+		profileName = min( results, key=lambda name: results[name]["mbPerMinute"] )
+		print( "\t==> No profile is under " + str(mbPerMinute) + " MB per minute, using the smallest: " + profileName )
+		return profileName
+
+	profileName = max( fitting, key=lambda name: results[name]["fps"] )
+	print( "\t==> Using encoding profile " + profileName + " (" + "%.1f" % results[profileName]["mbPerMinute"] + " MB per minute)" )
+	return profileName
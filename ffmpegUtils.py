@@ -0,0 +1,321 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# ffmpegUtils.py
+#
+# Purpose: The program drives ffmpeg directly for the steps that don't need MoviePy.  burnSubtitles draws the SRT onto
+#          the video with ffmpeg's subtitles filter in a single pass, decoding and encoding each frame once, instead of
+#          compositing a TextClip onto every subtitle in Python.  concatenateClips joins the rendered segments of a
+#          video at the container level, copying the streams rather than encoding every frame a second time.
+#          muxSubtitles adds the SRT files to a copy of the video as selectable subtitle tracks, without re-encoding
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: concatenateClips
+#          10/17/2026: encodingParams for burnSubtitles
+#          10/17/2026: muxSubtitles
+#          10/17/2026: transcode the extra audio tracks for containers that can't hold MP3
+#
+# ==================================================================================
+
+import os
+import re
+import json
+import time
+import shutil
+import subprocess
+
+# Use the same ffmpeg as MoviePy, which downloads its own copy if there isn't one on the path
+try:
+	from moviepy.config import get_setting
+	FFMPEG_BINARY = get_setting( "FFMPEG_BINARY" )
+except Exception:
+	FFMPEG_BINARY = "ffmpeg"
+
+# ffprobe is used to compare the segments when it is installed next to ffmpeg or on the path.  Otherwise the stream
+# descriptions printed by ffmpeg -i are compared instead
+FFPROBE_BINARY = shutil.which( os.path.join( os.path.dirname( FFMPEG_BINARY ), "ffprobe" ) ) or shutil.which( "ffprobe" )
+
+# The stream parameters that must be the same in every segment for them to be joined without re-encoding
+STREAM_PARAMETERS = [ "codec_type", "codec_name", "profile", "pix_fmt", "width", "height", "sample_aspect_ratio", \
+	"r_frame_rate", "time_base", "sample_fmt", "sample_rate", "channels", "channel_layout" ]
+
+# Containers take ISO 639-2 language codes for their tracks
+ISO_639_2 = { "ar": "ara", "de": "deu", "en": "eng", "es": "spa", "fr": "fra", "hi": "hin", "it": "ita", "ja": "jpn", \
+	"ko": "kor", "nl": "nld", "pl": "pol", "pt": "por", "ru": "rus", "sv": "swe", "tr": "tur", "uk": "ukr", "vi": "vie", "zh": "zho" }
+
+# The subtitle codec each container can hold.  mp4 and mov only take mov_text
+SUBTITLE_CODECS = { ".mp4": "mov_text", ".m4v": "mov_text", ".mov": "mov_text", ".mkv": "srt", ".webm": "webvtt" }
+
+# The containers that can't hold the MP3 dubbed audio tracks, and the codec and bitrate they are transcoded to.  webm
+# only takes Vorbis or Opus audio
+AUDIO_CODECS = { ".webm": ( "libopus", "96k" ) }
+
+# libass lays out SRT subtitles on a 384 x 288 canvas and scales it to the video
+ASS_PLAY_RES_X = 384
+ASS_PLAY_RES_Y = 288
+
+# The colour names accepted by getASSColor, as RGB
+COLOR_NAMES = { "white": ( 255, 255, 255 ), "black": ( 0, 0, 0 ), "yellow": ( 255, 255, 0 ), "red": ( 255, 0, 0 ), \
+	"green": ( 0, 255, 0 ), "blue": ( 0, 0, 255 ), "gray": ( 128, 128, 128 ), "grey": ( 128, 128, 128 ) }
+
+
+# ==================================================================================
+# Function: getASSColor
+# Purpose: Return a colour in the &HAABBGGRR form used by ASS subtitle styles
+# Parameters:
+#                 color - a colour name (e.g. "white"), "#RRGGBB", or a list of red, green and blue (e.g. [0,0,0])
+# ==================================================================================
+def getASSColor( color ):
+	if isinstance( color, str ):
+		if color.startswith( "#" ):
+			color = ( int( color[1:3], 16 ), int( color[3:5], 16 ), int( color[5:7], 16 ) )
+		else:
+			color = COLOR_NAMES[color.lower()]
+	red, green, blue = color
+	return "&H00%02X%02X%02X" % ( blue, green, red )
+
+
+# ==================================================================================
+# Function: getSubtitleStyle
+# Purpose: Return the ASS force_style for the subtitles filter that matches the captions drawn by
+#          videoUtils.annotate: white bold text in a black box 700 pixels wide, centred 20 pixels from the top.
+#          ASS boxes hug the text rather than having a fixed size, so the box is as wide as the line, not 700 pixels
+# Parameters:
+#                 width - the width of the video in pixels
+#                 height - the height of the video in pixels
+#                 txt_color - the color of the text on the screen
+#                 fontsize - the size of the font in pixels
+#                 font - the font to use for the text.  A "-Bold" suffix (as in "Arial-Bold") selects the bold face
+#                 boxColor - the color of the box behind the text
+#                 boxWidth - the widest the text can run before it wraps, in pixels
+#                 top - the distance from the top of the video to the box, in pixels
+# ==================================================================================
+def getSubtitleStyle( width, height, txt_color='white', fontsize=22, font='Arial-Bold', boxColor=[0,0,0], boxWidth=700, top=20 ):
+	bold = font.endswith( "-Bold" )
+	if bold:
+		font = font[:-len( "-Bold" )]
+
+	# sizes are given in pixels of the video, the style wants them on the libass canvas
+	scaleX = ASS_PLAY_RES_X / float( width )
+	scaleY = ASS_PLAY_RES_Y / float( height )
+	margin = max( 0, int( round( ( width - boxWidth ) / 2.0 * scaleX ) ) )
+
+	style = [ "FontName=" + font, "Bold=" + ( "1" if bold else "0" ), "FontSize=" + str( max( 1, int( round( fontsize * scaleY ) ) ) ), \
+		"PrimaryColour=" + getASSColor( txt_color ), "OutlineColour=" + getASSColor( boxColor ), "BackColour=" + getASSColor( boxColor ), \
+		"BorderStyle=3", "Outline=1", "Shadow=0", "Alignment=8", "MarginV=" + str( int( round( top * scaleY ) ) ), \
+		"MarginL=" + str( margin ), "MarginR=" + str( margin ) ]
+	return ",".join( style )
+
+
+# ==================================================================================
+# Function: escapeFilterPath
+# Purpose: Escape a file name for use as an option value in an ffmpeg filter graph
+# Parameters:
+#                 fileName - the file name to escape
+# ==================================================================================
+def escapeFilterPath( fileName ):
+	fileName = fileName.replace( "\\", "/" )
+	for c in "':,;[]":
+		fileName = fileName.replace( c, "\\" + c )
+	return fileName
+
+
+# ==================================================================================
+# Function: runFFmpeg
+# Purpose: Run ffmpeg and return the number of frames it wrote.  If ffmpeg fails, the end of what it printed is raised
+# Parameters:
+#                 arguments - the ffmpeg command line, without the ffmpeg binary itself
+# ==================================================================================
+def runFFmpeg( arguments ):
+	command = [ FFMPEG_BINARY, "-y", "-hide_banner", "-loglevel", "error", "-stats" ] + arguments
+	result = subprocess.run( command, stdout=subprocess.PIPE, stderr=subprocess.PIPE )
+	output = result.stderr.decode( "utf-8", errors="replace" )
+	if result.returncode != 0:
+		raise RuntimeError( "ffmpeg failed (" + str(result.returncode) + "): " + output[-2000:] )
+
+	frames = re.findall( r"frame=\s*(\d+)", output )
+	return int( frames[-1] ) if len(frames) > 0 else 0
+
+
+# ==================================================================================
+# Function: burnSubtitles
+# Purpose: Draw the subtitles onto the video in one ffmpeg pass, optionally replacing the audio track.  Returns the
+#          number of frames written, the time taken and the frames per second
+# Parameters:
+#                 originalClipName - the filename of the orignal content (e.g. "originalVideo.mp4")
+#                 subtitlesFileName - the filename of the SRT file (e.g. "mySRT.srt")
+#                 outputFileName - the filename of the output video file (e.g. "outputFileName.mp4")
+#                 alternateAudioFileName - the filename of an MP3 file that should be used to replace the audio track
+#                 useOriginalAudio - boolean value as to whether or not we should leave the orignal audio in place
+#                 style - the ASS force_style of the subtitles (see getSubtitleStyle)
+#                 subtitlesEncoding - the code page the SRT file was written in (e.g. "cp1252"), or None for UTF-8
+#                 duration - the length of the output in seconds, or None for the length of the original video
+#                 encodingParams - the ffmpeg options that choose the codecs and their settings (see encodingUtils.getFFmpegParams)
+# ==================================================================================
+def burnSubtitles( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName=None, useOriginalAudio=True, \
+	style=None, subtitlesEncoding=None, duration=None, encodingParams=[ "-c:v", "libx264", "-c:a", "aac" ] ):
+
+	subtitlesFilter = "subtitles=filename=" + escapeFilterPath( subtitlesFileName )
+	if subtitlesEncoding != None:
+		subtitlesFilter += ":charenc=" + subtitlesEncoding
+	if style != None:
+		subtitlesFilter += ":force_style='" + style + "'"
+
+	arguments = [ "-i", originalClipName ]
+	if useOriginalAudio:
+		arguments += [ "-map", "0:v:0", "-map", "0:a:0?" ]
+	else:
+		arguments += [ "-i", alternateAudioFileName, "-map", "0:v:0", "-map", "1:a:0" ]
+	arguments += [ "-vf", subtitlesFilter ] + encodingParams
+	if duration != None:
+		arguments += [ "-t", str( duration ) ]
+	arguments += [ outputFileName ]
+
+	print( "\t==> Burning " + subtitlesFileName + " into " + outputFileName + " with ffmpeg" )
+	started = time.time()
+	frames = runFFmpeg( arguments )
+	elapsed = time.time() - started
+
+	stats = { "frames": frames, "seconds": elapsed, "fps": frames / elapsed if elapsed > 0 else 0 }
+	print( "\t==> " + str(frames) + " frames in " + "%.1f" % elapsed + " seconds (" + "%.1f" % stats["fps"] + " frames per second)" )
+	return stats
+
+
+# ==================================================================================
+# Function: trimVideo
+# Purpose: Copy the first seconds of a video to a new file without re-encoding it (the cut lands on a keyframe)
+# Parameters:
+#                 originalClipName - the filename of the orignal content (e.g. "originalVideo.mp4")
+#                 outputFileName - the filename of the shortened copy
+#                 seconds - the length of the copy in seconds
+# ==================================================================================
+def trimVideo( originalClipName, outputFileName, seconds ):
+	runFFmpeg( [ "-i", originalClipName, "-t", str( seconds ), "-c", "copy", outputFileName ] )
+
+
+# ==================================================================================
+# Function: getStreamSignature
+# Purpose: Return the parameters of each stream of a media file that decide whether it can be joined to another
+#          without re-encoding
+# Parameters:
+#                 fileName - the media file
+# ==================================================================================
+def getStreamSignature( fileName ):
+	if FFPROBE_BINARY != None:
+		result = subprocess.run( [ FFPROBE_BINARY, "-v", "error", "-show_streams", "-of", "json", fileName ], \
+			stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True )
+		streams = json.loads( result.stdout.decode( "utf-8" ) )["streams"]
+		return [ tuple( stream.get( name ) for name in STREAM_PARAMETERS ) for stream in streams ]
+
+	# ffmpeg -i prints one line per stream and exits with an error since no output was given
+	result = subprocess.run( [ FFMPEG_BINARY, "-hide_banner", "-i", fileName ], stdout=subprocess.PIPE, stderr=subprocess.PIPE )
+	streams = re.findall( r"Stream #\d+:\d+[^:]*: (.*)", result.stderr.decode( "utf-8", errors="replace" ) )
+	# the bitrate of each segment is different and doesn't matter
+	return [ re.sub( r",\s*\d+ kb/s|\s*\(default\)", "", stream ).strip() for stream in streams ]
+
+
+# ==================================================================================
+# Function: countAudioStreams
+# Purpose: Return the number of audio streams in a media file
+# Parameters:
+#                 fileName - the media file
+# ==================================================================================
+def countAudioStreams( fileName ):
+	streams = getStreamSignature( fileName )
+	return len( [ stream for stream in streams if stream[0] == "audio" or str( stream ).startswith( "Audio:" ) ] )
+
+
+# ==================================================================================
+# Function: concatenateClips
+# Purpose: Join media files end to end with ffmpeg's concat demuxer, copying the streams without re-encoding them.
+#          Every file must have the same codec parameters as the first; if one doesn't, a ValueError naming it is
+#          raised and nothing is written
+# Parameters:
+#                 clipFileNames - the files to join, in order
+#                 outputFileName - the filename of the joined file
+# ==================================================================================
+def concatenateClips( clipFileNames, outputFileName ):
+	signature = getStreamSignature( clipFileNames[0] )
+	for fileName in clipFileNames[1:]:
+		if getStreamSignature( fileName ) != signature:
+			raise ValueError( fileName + " has different codec parameters than " + clipFileNames[0] )
+
+	# the concat demuxer reads the files to join from a list
+	listFileName = outputFileName + ".concat.txt"
+	with open( listFileName, "w", encoding="utf-8" ) as f:
+		for fileName in clipFileNames:
+			f.write( "file '" + os.path.abspath( fileName ).replace( "'", "'\\''" ) + "'\n" )
+
+	print( "\t==> Joining " + str(len(clipFileNames)) + " clips into " + outputFileName + " without re-encoding" )
+	started = time.time()
+	try:
+		runFFmpeg( [ "-f", "concat", "-safe", "0", "-i", listFileName, "-map", "0", "-c", "copy", "-movflags", "+faststart", outputFileName ] )
+	finally:
+		os.remove( listFileName )
+	print( "\t==> Joined in " + "%.1f" % ( time.time() - started ) + " seconds" )
+
+
+# ==================================================================================
+# Function: muxSubtitles
+# Purpose: Copy a video into a new container with each SRT file added as a subtitle track (and, optionally, extra audio
+#          tracks), tagged with its language.  No stream is re-encoded except the subtitles, which are converted to the
+#          text format the container holds (mov_text for mp4 and mov), and the extra audio tracks of a container that
+#          can't hold MP3 (see AUDIO_CODECS)
+# Parameters:
+#                 originalClipName - the filename of the orignal content (e.g. "originalVideo.mp4")
+#                 subtitleTracks - a list of (SRT file name, language code, code page) for the subtitle tracks, in order
+#                 outputFileName - the filename of the output video file (e.g. "outputFileName.mp4")
+#                 audioTracks - a list of (audio file name, language code) for extra audio tracks, in order
+# ==================================================================================
+def muxSubtitles( originalClipName, subtitleTracks, outputFileName, audioTracks=[] ):
+	extension = os.path.splitext( outputFileName )[1].lower()
+	if extension not in SUBTITLE_CODECS:
+		raise ValueError( "Can't add subtitle tracks to a " + extension + " file, expected one of " + ", ".join( SUBTITLE_CODECS ) )
+
+	arguments = [ "-i", originalClipName ]
+	for fileName, lang, encoding in subtitleTracks:
+		if encoding != None:
+			arguments += [ "-sub_charenc", encoding ]
+		arguments += [ "-i", fileName ]
+	for fileName, lang in audioTracks:
+		arguments += [ "-i", fileName ]
+
+	# the original video and audio first, then the new tracks in the order given
+	arguments += [ "-map", "0:v", "-map", "0:a?" ]
+	for i in range( len(subtitleTracks) ):
+		arguments += [ "-map", str( 1 + i ) + ":s:0" ]
+	for i in range( len(audioTracks) ):
+		arguments += [ "-map", str( 1 + len(subtitleTracks) + i ) + ":a:0" ]
+	arguments += [ "-c", "copy", "-c:s", SUBTITLE_CODECS[extension] ]
+
+	for i, ( fileName, lang, encoding ) in enumerate( subtitleTracks ):
+		arguments += [ "-metadata:s:s:" + str(i), "language=" + ISO_639_2.get( lang, lang ), "-metadata:s:s:" + str(i), "title=" + lang ]
+	# the audio tracks of the original come before the new ones
+	originalAudioTracks = countAudioStreams( originalClipName ) if len(audioTracks) > 0 else 0
+	for i, ( fileName, lang ) in enumerate( audioTracks ):
+		stream = "-metadata:s:a:" + str( originalAudioTracks + i )
+		arguments += [ stream, "language=" + ISO_639_2.get( lang, lang ), stream, "title=" + lang ]
+		if extension in AUDIO_CODECS:
+			codec, bitrate = AUDIO_CODECS[extension]
+			arguments += [ "-c:a:" + str( originalAudioTracks + i ), codec, "-b:a:" + str( originalAudioTracks + i ), bitrate ]
+	arguments += [ outputFileName ]
+
+	print( "\t==> Adding " + str(len(subtitleTracks)) + " subtitle tracks and " + str(len(audioTracks)) + " audio tracks to " + outputFileName )
+	started = time.time()
+	runFFmpeg( arguments )
+	print( "\t==> Done in " + "%.1f" % ( time.time() - started ) + " seconds" )
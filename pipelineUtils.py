@@ -0,0 +1,494 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# pipelineUtils.py
+#
+# Purpose: The program provides the functions that drive the per-language stages of the pipeline
+#          (translate, SRT, audio track, video) either one language at a time or fanned out to a
+#          pool of worker processes, one process per target language
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: print the shared AWS client counters for each language
+#          10/17/2026: batch mode for a manifest of videos
+#          10/17/2026: checkpoint each stage so a rerun skips the stages whose inputs haven't changed
+#          10/17/2026: share the cores between the languages for segment rendering
+#          10/17/2026: choose the video rendering backend
+#          10/17/2026: choose the encoding profile
+#          10/17/2026: soft subtitles, muxed into one container for all of the languages
+#          10/17/2026: dub on the timeline of the translated SRT
+#          10/17/2026: stream the transcript to disk with downloadTranscript
+#          10/17/2026: upload each finished video to the output bucket
+#          10/17/2026: only dub the languages of a soft subtitle batch when softAudio asks for audio tracks
+#          10/17/2026: pass the options of each language of a batch by name
+#
+# ==================================================================================
+
+import os
+import sys
+import json
+import time
+import asyncio
+import traceback
+import functools
+import contextlib
+import concurrent.futures
+from srtUtils import *
+from audioUtils import *
+from videoUtils import *
+from awsUtils import *
+from transcribeUtils import *
+from checkpointUtils import *
+from encodingUtils import *
+from ffmpegUtils import *
+from dubbingUtils import *
+from uploadUtils import *
+
+
+# ==================================================================================
+# Function: processLanguage
+# Purpose: Run every stage of the pipeline for a single target language and return the timing of each stage.
+#          When a log file name is provided, everything the stages print is written to that file instead of the
+#          console so that languages running side by side do not interleave their output.  Each stage is checkpointed
+#          (see checkpointUtils), so a rerun only repeats the stages whose inputs have changed
+# Parameters:
+#                 lang - the language code for the translated content (e.g. Spanish = "es")
+#                 transcript - the JSON output from Amazon Transcribe, or the name of the file holding it
+#                 region - the AWS region in which to run AWS services (e.g. "us-east-1")
+#                 infile - the filename of the original content (e.g. "originalVideo.mp4")
+#                 outfilename - the output file name without the extension
+#                 outfiletype - the output file type.  E.g. mp4, mov
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 sourceSRTFileName - the SRT file for the original content used to time the translation
+#                 createAudio - boolean value as to whether or not we should synthesize the translated audio track
+#                 renderVideo - boolean value as to whether or not we should composite the final video
+#                 logFileName - the file that receives the output of this language, or None for the console
+#                 segmentJobs - the number of worker processes rendering video segments, or None for one per core
+#                 backend - the video rendering backend, 'moviepy' or 'ffmpeg' (see videoUtils.createVideo)
+#                 profile - the name of the encoding profile (see encodingUtils), or None for the default profile
+#                 dubbing - 'timeline' to place the speech of each cue at the time of its cue (see dubbingUtils), 'concat' to
+#                           join the speech of the whole translation back to back
+#                 upload - the upload settings returned by getUploadSettings, to upload the video as soon as it is
+#                          rendered, or None to leave it on local disk
+# ==================================================================================
+def processLanguage( lang, transcript, region, infile, outfilename, outfiletype, sourceLangCode='en', \
+	sourceSRTFileName="subtitles-en.srt", createAudio=True, renderVideo=True, logFileName=None, segmentJobs=None, backend='moviepy', \
+	profile=None, dubbing='timeline', upload=None ):
+
+	result = { "lang": lang, "timings": {}, "skipped": [], "total": 0, "log": logFileName, "error": None }
+	started = time.time()
+
+	# a transcript file is hashed by its contents, a transcript passed as a string by its value
+	if os.path.isfile( transcript ):
+		transcriptValues, transcriptFiles = [], [ transcript ]
+	else:
+		transcriptValues, transcriptFiles = [ transcript ], []
+
+	translationFileName = "translation-" + lang + ".txt"
+	srtFileName = "subtitles-" + lang + ".srt"
+	audioFileName = "audio-" + lang + ".mp3"
+	videoFileName = outfilename + "-" + lang + "." + outfiletype
+
+	with contextlib.ExitStack() as stack:
+		if logFileName != None:
+			log = stack.enter_context( open( logFileName, "w", encoding="utf-8" ) )
+			stack.enter_context( contextlib.redirect_stdout( log ) )
+			stack.enter_context( contextlib.redirect_stderr( log ) )
+
+		try:
+			stageStart = time.time()
+			if not runStage( "translate-" + lang, transcriptValues + [ sourceLangCode, lang ], transcriptFiles, [ translationFileName ], \
+				writeTranslation, transcript, sourceLangCode, lang, region, translationFileName ):
+				result["skipped"].append( "translate" )
+			result["timings"]["translate"] = time.time() - stageStart
+
+			stageStart = time.time()
+			if not runStage( "srt-" + lang, [ lang ], [ translationFileName, sourceSRTFileName ], [ srtFileName ], \
+				mapTranslationAndWriteToSRT, readTranslation( translationFileName ), sourceSRTFileName, lang, region, srtFileName ):
+				result["skipped"].append( "srt" )
+			result["timings"]["srt"] = time.time() - stageStart
+
+			if createAudio and dubbing == 'timeline':
+				stageStart = time.time()
+				duration = getMediaDuration( infile )
+				if not runStage( "audio-" + lang, [ lang, dubbing, duration, DUB_TOLERANCE, DUB_MAX_SPEEDUP ], [ srtFileName ], [ audioFileName ], \
+					createDubbedAudioTrack, srtFileName, lang, audioFileName, duration, getSRTEncoding( lang ) ):
+					result["skipped"].append( "audio" )
+				result["timings"]["audio"] = time.time() - stageStart
+			elif createAudio:
+				stageStart = time.time()
+				if not runStage( "audio-" + lang, transcriptValues + [ sourceLangCode, lang, dubbing ], transcriptFiles, [ audioFileName ], \
+					createAudioTrackFromTranslation, region, transcript, sourceLangCode, lang, audioFileName ):
+					result["skipped"].append( "audio" )
+				result["timings"]["audio"] = time.time() - stageStart
+
+			if renderVideo:
+				stageStart = time.time()
+				if not runStage( "video-" + lang, [ videoFileName, backend, getEncodingProfile( profile ) ], [ infile, srtFileName, audioFileName ], \
+					[ videoFileName ], createVideo, infile, srtFileName, videoFileName, audioFileName, False, clipPrefix="clip_" + lang + "_", \
+					segmentJobs=segmentJobs, backend=backend, subtitlesEncoding=getSRTEncoding( lang ), profile=profile ):
+					result["skipped"].append( "video" )
+				result["timings"]["video"] = time.time() - stageStart
+
+			# the upload starts while the other languages are still rendering
+			if renderVideo and upload != None:
+				stageStart = time.time()
+				if not uploadOutput( "upload-" + lang, videoFileName, upload ):
+					result["skipped"].append( "upload" )
+				result["timings"]["upload"] = time.time() - stageStart
+		except Exception as error:
+			# keep going with the other languages, but remember what went wrong with this one
+			traceback.print_exc()
+			result["error"] = repr( error )
+
+		printClientStats()
+
+	result["total"] = time.time() - started
+	return result
+
+
+# ==================================================================================
+# Function: writeTranslation
+# Purpose: Translate the transcript and save the translated text, so the translate stage can be checkpointed
+# Parameters:
+#                 transcript - the JSON output from Amazon Transcribe, or the name of the file holding it
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+#                 region - the AWS region in which to run AWS services (e.g. "us-east-1")
+#                 translationFileName - the file to write the translated text to
+# ==================================================================================
+def writeTranslation( transcript, sourceLangCode, targetLangCode, region, translationFileName ):
+	translation = translateTranscript( transcript, sourceLangCode, targetLangCode, region )
+	with open( translationFileName + ".tmp", "w", encoding="utf-8" ) as f:
+		f.write( translation["TranslatedText"] )
+	os.replace( translationFileName + ".tmp", translationFileName )
+
+
+# ==================================================================================
+# Function: readTranslation
+# Purpose: Read a translation saved by writeTranslation back into the structure returned by translateTranscript
+# Parameters:
+#                 translationFileName - the file the translated text was written to
+# ==================================================================================
+def readTranslation( translationFileName ):
+	with open( translationFileName, "r", encoding="utf-8" ) as f:
+		return { "TranslatedText": f.read() }
+
+
+# ==================================================================================
+# Function: transcribeToFile
+# Purpose: Run a transcription job, wait for it to complete and save the transcript, so the transcribe stage can be
+#          checkpointed
+# Parameters:
+#                 region - the AWS region in which to run AWS services (e.g. "us-east-1")
+#                 inbucket - the S3 bucket containing the input file
+#                 infile - the filename of the original content (e.g. "originalVideo.mp4")
+#                 outbucket - the S3 bucket for the output files
+#                 transcriptFileName - the file to write the transcript to
+# ==================================================================================
+def transcribeToFile( region, inbucket, infile, outbucket, transcriptFileName ):
+	response = createTranscribeJob( region, inbucket, infile, outbucket )
+
+	# wait until the job completes.  The checks are spaced out according to the length of the video
+	print( "\n==> Transcription Job: " + response["TranscriptionJob"]["TranscriptionJobName"] + "\n\tIn Progress"),
+
+	response = waitForTranscriptionJob( response["TranscriptionJob"]["TranscriptionJobName"], getMediaDuration( infile ) )
+	if response["TranscriptionJob"]["TranscriptionJobStatus"] != "COMPLETED":
+		raise RuntimeError( "Transcription job " + response["TranscriptionJob"]["TranscriptionJobStatus"] )
+
+	print( "\nJob Complete")
+	print( "\tStart Time: " + str(response["TranscriptionJob"]["CreationTime"]) )
+	print( "\tEnd Time: "  + str(response["TranscriptionJob"]["CompletionTime"]) )
+	print( "\tTranscript URI: " + str(response["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]) )
+
+	# Now stream the transcript JSON from AWS Transcribe to the file
+	downloadTranscript( str(response["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]), transcriptFileName )
+
+
+# ==================================================================================
+# Function: runLanguages
+# Purpose: Run processLanguage for each of the target languages.  With a single job the languages are handled one
+#          after another in this process; otherwise each language is sent to its own worker process and gets its
+#          own log file (outfilename-<lang>.log) so that the total time is close to that of the slowest language
+# Parameters:
+#                 langs - the list of language codes for the desired output
+#                 jobs - the maximum number of languages to process at the same time
+#                 transcript - the JSON output from Amazon Transcribe
+#                 region - the AWS region in which to run AWS services (e.g. "us-east-1")
+#                 infile - the filename of the original content (e.g. "originalVideo.mp4")
+#                 outfilename - the output file name without the extension
+#                 outfiletype - the output file type.  E.g. mp4, mov
+#                 **options - any of the optional parameters of processLanguage
+# ==================================================================================
+def runLanguages( langs, jobs, transcript, region, infile, outfilename, outfiletype, **options ):
+	started = time.time()
+
+	if jobs <= 1 or len( langs ) <= 1:
+		results = [ processLanguage( lang, transcript, region, infile, outfilename, outfiletype, **options ) for lang in langs ]
+	else:
+		workers = min( jobs, len( langs ) )
+		# the languages share the cores when it comes to rendering their segments
+		options.setdefault( "segmentJobs", max( 1, os.cpu_count() // workers ) )
+		print( "\n==> Processing " + str(len( langs )) + " languages with " + str(workers) + " worker processes" )
+		with concurrent.futures.ProcessPoolExecutor( max_workers=workers ) as pool:
+			futures = []
+			for lang in langs:
+				logFileName = outfilename + "-" + lang + ".log"
+				print( "\t" + lang + " ==> " + logFileName )
+				futures.append( pool.submit( processLanguage, lang, transcript, region, infile, outfilename, outfiletype, \
+					logFileName=logFileName, **options ) )
+			results = [ f.result() for f in futures ]
+
+	printLanguageTimings( results, time.time() - started )
+	return results
+
+
+# ==================================================================================
+# Function: muxLanguages
+# Purpose: Write a single copy of the video with the subtitles of every language as selectable tracks (the source
+#          language first), and the dubbed audio of each language as extra audio tracks.  Nothing is re-encoded, so it
+#          takes about as long as copying the file.  The step is checkpointed like the others
+# Parameters:
+#                 langs - the list of language codes for the desired output
+#                 infile - the filename of the original content (e.g. "originalVideo.mp4")
+#                 outputFileName - the filename of the output video file (e.g. "outputFileName.mp4")
+#                 workDir - the directory holding the subtitle and audio files of the languages
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 includeAudio - boolean value as to whether or not the dubbed audio tracks are added as well
+# ==================================================================================
+def muxLanguages( langs, infile, outputFileName, workDir=".", sourceLangCode="en", includeAudio=True ):
+	subtitleTracks = [ ( os.path.join( workDir, "subtitles-" + lang + ".srt" ), lang, getSRTEncoding( lang ) ) for lang in [ sourceLangCode ] + list( langs ) ]
+	audioTracks = []
+	if includeAudio:
+		audioTracks = [ ( os.path.join( workDir, "audio-" + lang + ".mp3" ), lang ) for lang in langs ]
+		audioTracks = [ track for track in audioTracks if os.path.isfile( track[0] ) ]
+
+	inputFiles = [ infile ] + [ track[0] for track in subtitleTracks ] + [ track[0] for track in audioTracks ]
+	print( "\n==> Muxing " + ", ".join( lang for fileName, lang, encoding in subtitleTracks ) + " subtitles into " + outputFileName )
+	runStage( "mux", [ outputFileName, [ track[1] for track in subtitleTracks ], [ track[1] for track in audioTracks ] ], inputFiles, \
+		[ outputFileName ], muxSubtitles, infile, subtitleTracks, outputFileName, audioTracks, checkpointDir=os.path.join( workDir, CHECKPOINT_DIR ) )
+
+
+# ==================================================================================
+# Function: uploadOutput
+# Purpose: Upload a finished output file to the output bucket, under its own name after the bucket's prefix.  The
+#          upload is checkpointed like the other stages, so a rerun only uploads the file again if it has changed.
+#          Returns True if the file was uploaded, False if it was skipped
+# Parameters:
+#                 stageName - the name of the stage (e.g. "upload-es")
+#                 fileName - the file to upload (e.g. "outputFileName-es.mp4")
+#                 upload - the upload settings returned by getUploadSettings
+#                 checkpointDir - the directory holding the stage manifests
+# ==================================================================================
+def uploadOutput( stageName, fileName, upload, checkpointDir=CHECKPOINT_DIR ):
+	bucket, prefix = parseBucket( upload["outbucket"] )
+	key = prefix + os.path.basename( fileName )
+	return runStage( stageName, [ bucket, key, upload["endpointUrl"] ], [ fileName ], [], uploadFile, fileName, bucket, key, \
+		upload["region"], upload["partSize"], upload["uploadJobs"], upload["endpointUrl"], checkpointDir=checkpointDir )
+
+
+# ==================================================================================
+# Function: printLanguageTimings
+# Purpose: Print the time spent in each stage for each language along with the total wall time
+# Parameters:
+#                 results - the list of results returned by processLanguage
+#                 wallTime - the number of seconds it took to process all of the languages
+# ==================================================================================
+def printLanguageTimings( results, wallTime ):
+	print( "\n==> Per-language timings (seconds): " )
+	for result in results:
+		stages = ", ".join( stage + "=" + ( "skipped" if stage in result.get( "skipped", [] ) else "%.1f" % seconds ) \
+			for stage, seconds in result["timings"].items() )
+		status = "FAILED: " + result["error"] if result["error"] != None else "ok"
+		print( "\t" + result["lang"] + ": total=" + "%.1f" % result["total"] + " [" + stages + "] " + status )
+	print( "\tWall time: " + "%.1f" % wallTime )
+	printDownloadStats()
+
+
+# ==================================================================================
+# Function: processLanguageInDirectory
+# Purpose: Run processLanguage from inside a working directory.  Each video in a batch gets its own directory so that
+#          the subtitle, audio and clip files of videos rendered at the same time don't collide
+# Parameters:
+#                 workDir - the working directory of the video
+#                 lang - the language code for the translated content (e.g. Spanish = "es")
+#                 *args, **options - the remaining parameters of processLanguage
+# ==================================================================================
+def processLanguageInDirectory( workDir, lang, *args, **options ):
+	os.chdir( workDir )
+	return processLanguage( lang, *args, **options )
+
+
+# ==================================================================================
+# Function: readManifest
+# Purpose: Read a batch manifest: a JSONL file with one video per line, e.g.
+#          {"inbucket": "mybucket/", "infile": "meeting.mp4", "outlangs": ["es", "ru"], "outfiletype": "mp4"}
+#          An "outfilename" may also be given; it defaults to the input file name without its extension
+# Parameters:
+#                 manifestFileName - the name of the manifest file
+# ==================================================================================
+def readManifest( manifestFileName ):
+	videos = []
+	with open( manifestFileName, "r", encoding="utf-8" ) as f:
+		for line in f:
+			if len(line.strip()) == 0:
+				continue
+			video = json.loads( line )
+			for key in [ "inbucket", "infile", "outlangs", "outfiletype" ]:
+				if key not in video:
+					raise ValueError( "Manifest entry is missing " + key + ": " + line.strip() )
+			if "outfilename" not in video:
+				video["outfilename"] = os.path.splitext( os.path.basename( video["infile"] ) )[0]
+			videos.append( video )
+	return videos
+
+
+# ==================================================================================
+# Function: runBatch
+# Purpose: Process every video of a manifest.  Each video is transcribed, then each of its languages is rendered in a
+#          shared pool of worker processes.  Transcription and rendering have their own limits, so later videos are
+#          transcribed while earlier ones are still rendering.  Stages finished by an earlier run of the same manifest are
+#          skipped (see checkpointUtils).  Returns the status and timings of every video
+# Parameters:
+#                 videos - the list of videos returned by readManifest
+#                 region - the AWS region in which to run AWS services (e.g. "us-east-1")
+#                 outbucket - the S3 bucket for the output files
+#                 transcribeJobs - the maximum number of transcription jobs running at the same time
+#                 renderJobs - the maximum number of languages being processed at the same time, across all videos
+#                 workRoot - the directory holding the working directory of each video
+#                 backend - the video rendering backend, 'moviepy' or 'ffmpeg' (see videoUtils.createVideo)
+#                 profile - the name of the encoding profile (see encodingUtils), or None for the default profile
+#                 subtitleMode - 'burn' to render a video per language with the subtitles drawn on, 'soft' to write one
+#                                copy of the video with every language as a subtitle track (see muxLanguages)
+#                 dubbing - 'timeline' or 'concat' (see processLanguage)
+#                 upload - the upload settings returned by getUploadSettings, or None to leave the videos on local disk
+#                 softAudio - boolean value as to whether or not soft subtitle videos get a dubbed audio track per language
+#                             as well.  Without it the languages are only translated and subtitled
+# ==================================================================================
+async def runBatch( videos, region, outbucket, transcribeJobs=10, renderJobs=None, workRoot="batch", backend='moviepy', profile=None, \
+	subtitleMode='burn', dubbing='timeline', upload=None, softAudio=False ):
+	loop = asyncio.get_running_loop()
+	transcribeLimit = asyncio.Semaphore( transcribeJobs )
+	renderPool = concurrent.futures.ProcessPoolExecutor( max_workers=renderJobs or os.cpu_count() )
+	segmentJobs = max( 1, os.cpu_count() // ( renderJobs or os.cpu_count() ) )
+
+	async def processVideo( video ):
+		report = { "infile": video["infile"], "outfilename": video["outfilename"], "status": "ok", "timings": {}, "skipped": [], "languages": [] }
+		started = time.time()
+		workDir = os.path.abspath( os.path.join( workRoot, video["outfilename"] ) )
+		os.makedirs( workDir, exist_ok=True )
+		infile = os.path.abspath( video["infile"] )
+
+		try:
+			transcriptFileName = os.path.join( workDir, "transcript.json" )
+			sourceSRTFileName = os.path.join( workDir, "subtitles-en.srt" )
+			checkpointDir = os.path.join( workDir, CHECKPOINT_DIR )
+
+			# Transcribe, unless the same video was already transcribed, holding one of the transcription slots only
+			# while the job runs
+			transcribeKey = await loop.run_in_executor( None, getStageKey, [ "transcribe", video["inbucket"], video["infile"] ], [ infile ] )
+			if isStageComplete( "transcribe", transcribeKey, checkpointDir ):
+				report["skipped"].append( "transcribe" )
+			else:
+				mediaDuration = await loop.run_in_executor( None, getMediaDuration, infile )
+				async with transcribeLimit:
+					stageStart = time.time()
+					response = await loop.run_in_executor( None, createTranscribeJob, region, video["inbucket"], video["infile"], outbucket )
+					jobName = response["TranscriptionJob"]["TranscriptionJobName"]
+					responses = []
+					stats = await monitorTranscriptionJobs( [ jobName ], responses.append, { jobName: mediaDuration } )
+					report["timings"]["transcribe"] = time.time() - stageStart
+					report["pickupLag"] = stats[jobName]["lag"]
+
+				response = responses[0]
+				if response["TranscriptionJob"]["TranscriptionJobStatus"] != "COMPLETED":
+					raise RuntimeError( "Transcription job " + response["TranscriptionJob"]["TranscriptionJobStatus"] )
+
+				# Save the transcript in the working directory of the video
+				stageStart = time.time()
+				download = await loop.run_in_executor( None, downloadTranscript, response["TranscriptionJob"]["Transcript"]["TranscriptFileUri"], \
+					transcriptFileName )
+				report["timings"]["download"] = time.time() - stageStart
+				report["downloadBytes"] = download["bytes"]
+				completeStage( "transcribe", transcribeKey, [ transcriptFileName ], checkpointDir )
+
+			# and the source language SRT next to it
+			stageStart = time.time()
+			if not await loop.run_in_executor( None, functools.partial( runStage, "srt-en", [ "en" ], [ transcriptFileName ], [ sourceSRTFileName ], \
+				writeTranscriptToSRT, transcriptFileName, "en", sourceSRTFileName, checkpointDir=checkpointDir ) ):
+				report["skipped"].append( "srt" )
+			report["timings"]["srt"] = time.time() - stageStart
+
+			# then send each language to the shared render pool
+			stageStart = time.time()
+			# everything after infile goes by name, so a parameter added to processLanguage can't shift the others
+			futures = [ loop.run_in_executor( renderPool, functools.partial( processLanguageInDirectory, workDir, lang, transcriptFileName, region, infile, \
+				outfilename=video["outfilename"], outfiletype=video["outfiletype"], sourceLangCode="en", sourceSRTFileName=sourceSRTFileName, \
+				createAudio=( subtitleMode == 'burn' or softAudio ), renderVideo=( subtitleMode == 'burn' ), \
+				logFileName=os.path.join( workDir, video["outfilename"] + "-" + lang + ".log" ), segmentJobs=segmentJobs, backend=backend, \
+				profile=profile, dubbing=dubbing, upload=upload ) ) for lang in video["outlangs"] ]
+			report["languages"] = await asyncio.gather( *futures )
+			report["timings"]["languages"] = time.time() - stageStart
+
+			if subtitleMode == 'soft':
+				stageStart = time.time()
+				outputFileName = os.path.join( workDir, video["outfilename"] + "." + video["outfiletype"] )
+				await loop.run_in_executor( None, functools.partial( muxLanguages, video["outlangs"], infile, outputFileName, workDir=workDir, \
+					includeAudio=softAudio ) )
+				report["timings"]["mux"] = time.time() - stageStart
+
+				if upload != None:
+					stageStart = time.time()
+					if not await loop.run_in_executor( None, uploadOutput, "upload", outputFileName, upload, checkpointDir ):
+						report["skipped"].append( "upload" )
+					report["timings"]["upload"] = time.time() - stageStart
+
+			if any( result["error"] != None for result in report["languages"] ):
+				report["status"] = "failed"
+		except Exception as error:
+			traceback.print_exc()
+			report["status"] = "failed"
+			report["error"] = repr( error )
+
+		report["timings"]["total"] = time.time() - started
+		print( "\n==> " + video["infile"] + ": " + report["status"] + " in " + "%.1f" % report["timings"]["total"] + " seconds" )
+		return report
+
+	try:
+		return await asyncio.gather( *[ processVideo( video ) for video in videos ] )
+	finally:
+		renderPool.shutdown()
+
+
+# ==================================================================================
+# Function: writeBatchReport
+# Purpose: Write the status and timings of every video in a batch to a JSON file and print a summary
+# Parameters:
+#                 reports - the list returned by runBatch
+#                 reportFileName - the name of the JSON file to write
+#                 wallTime - the number of seconds the whole batch took
+# ==================================================================================
+def writeBatchReport( reports, reportFileName, wallTime ):
+	with open( reportFileName, "w", encoding="utf-8" ) as f:
+		json.dump( { "wallTime": wallTime, "videos": reports }, f, indent=2 )
+
+	print( "\n==> Batch report: " + reportFileName )
+	for report in reports:
+		print( "\t" + report["infile"] + ": " + report["status"] + ", " + \
+			", ".join( stage + "=" + "%.1f" % seconds for stage, seconds in report["timings"].items() ) )
+	print( "\tWall time: " + "%.1f" % wallTime )
+	printDownloadStats()
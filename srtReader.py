@@ -0,0 +1,108 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# srtReader.py
+#
+# Purpose: The program reads SubRip Subtitle files (.SRT) into a CueTable in a single pass.  The whole file is matched
+#          with one precompiled regular expression, so cues with several lines of text, Windows line endings and a
+#          missing blank line at the end of the file are all handled the same way.  Very large files are memory
+#          mapped rather than read into memory
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import os
+import re
+import mmap
+from cueUtils import *
+
+# Files larger than this are memory mapped instead of being read in whole
+SRT_MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# One cue: the cue number on a line of its own, the start and end timecodes, then every line of text up to the
+# next blank line (or the end of the file)
+SRT_CUE_PATTERN = re.compile(
+	rb'^(?:\xef\xbb\xbf)?[ \t]*\d+[ \t]*\r?\n'
+	rb'[ \t]*(\d+):(\d+):(\d+)[,.](\d+)[ \t]*-->[ \t]*(\d+):(\d+):(\d+)[,.](\d+)[^\r\n]*(?:\r?\n|\Z)'
+	rb'((?:[ \t]*\S[^\r\n]*(?:\r?\n|\Z))*)',
+	re.MULTILINE )
+
+
+# ==================================================================================
+# Function: readSRT
+# Purpose: Read an SRT file into a CueTable.  Multi-line cue text is joined into a single line
+# Parameters:
+#                 srtFileName - the name of the SRT file (e.g. "mySRT.srt")
+#                 encoding - the code page the file was written in, or None to try UTF-8 and fall back to cp1252
+#                 useMmap - True or False to force memory mapping on or off, None to decide by file size
+# ==================================================================================
+def readSRT( srtFileName, encoding=None, useMmap=None ):
+	with open( srtFileName, "rb" ) as f:
+		size = os.fstat( f.fileno() ).st_size
+		if useMmap == None:
+			useMmap = size > SRT_MMAP_THRESHOLD
+
+		# mmap can't map an empty file
+		if useMmap and size > 0:
+			with mmap.mmap( f.fileno(), 0, access=mmap.ACCESS_READ ) as data:
+				return parseSRT( data, encoding )
+		return parseSRT( f.read(), encoding )
+
+
+# ==================================================================================
+# Function: parseSRT
+# Purpose: Parse the bytes of an SRT file into a CueTable
+# Parameters:
+#                 data - the contents of the SRT file (bytes, or a memory map of the file)
+#                 encoding - the code page the file was written in, or None to try UTF-8 and fall back to cp1252
+# ==================================================================================
+def parseSRT( data, encoding=None ):
+	cues = CueTable()
+	for match in SRT_CUE_PATTERN.finditer( data ):
+		sh, sm, ss, sms, eh, em, es, ems, text = match.groups()
+		start = ( ( int(sh) * 60 + int(sm) ) * 60 + int(ss) ) * 1000 + getMilliseconds( sms )
+		end = ( ( int(eh) * 60 + int(em) ) * 60 + int(es) ) * 1000 + getMilliseconds( ems )
+		cues.append( start, end, decodeText( text, encoding ).split() )
+	return cues
+
+
+# ==================================================================================
+# Function: getMilliseconds
+# Purpose: Return the milliseconds in the fraction part of a timecode.  It is a fraction of a second, so "5" is 500
+# Parameters:
+#                 digits - the digits after the comma in the timecode
+# ==================================================================================
+def getMilliseconds( digits ):
+	return int( digits[:3].ljust( 3, b"0" ) )
+
+
+# ==================================================================================
+# Function: decodeText
+# Purpose: Decode the text of a cue
+# Parameters:
+#                 text - the bytes of the cue text
+#                 encoding - the code page the file was written in, or None to try UTF-8 and fall back to cp1252
+# ==================================================================================
+def decodeText( text, encoding ):
+	if encoding != None:
+		return text.decode( encoding, errors="replace" )
+	try:
+		return text.decode( "utf-8" )
+	except UnicodeDecodeError:
+		return text.decode( "cp1252", errors="replace" )
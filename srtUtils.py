@@ -23,6 +23,17 @@
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: translate chunks concurrently with translateChunks
+#          10/17/2026: pack Translate requests by UTF-8 size with packChunks
+#          10/17/2026: stream the transcript instead of loading it whole
+#          10/17/2026: hold phrases in a CueTable with integer millisecond times
+#          10/17/2026: read SRT files with srtReader
+#          10/17/2026: share translated words out with allocateWords
+#          10/17/2026: time the phrases of a translation with batched speech marks
+#          10/17/2026: predict phrase durations offline with durationUtils
+#          10/17/2026: translate with translatePieces, so each sentence or phrase is cached on its own
+#          10/17/2026: only speech mark measurements go into the duration models
+#          10/17/2026: translateTranscriptSRTtoSRT writes in the code page of the target language
 #
 # ==================================================================================
 
@@ -32,17 +43,11 @@ import re
 import codecs
 import math
 from audioUtils import *
-
-
-
-# ==================================================================================
-# Function: newPhrase
-# Purpose: simply create a phrase tuple
-# Parameters: 
-#                 None
-# ==================================================================================
-def newPhrase():
-	return { 'start_time': '', 'end_time': '', 'words' : [] }
+from translateUtils import *
+from transcribeUtils import *
+from cueUtils import *
+from srtReader import *
+from durationUtils import *
 
 
 	
@@ -52,13 +57,22 @@ def newPhrase():
 # Parameters: 
 #                 seconds - the duration in seconds to convert to HH:MM:SS,mmm 
 # ==================================================================================	
-	# Format and return a string that contains the converted number of seconds into SRT format
 def getTimeCode( seconds ):
-	t_hund = int(seconds % 1 * 1000)
-	t_seconds = int( seconds )
-	t_secs = ((float( t_seconds) / 60) % 1) * 60
-	t_mins = int( t_seconds / 60 )
-	return str( "%02d:%02d:%02d,%03d" % (00, t_mins, int(t_secs), t_hund ))
+	return formatTimeCode( secondsToMs( seconds ) )
+	
+
+# ==================================================================================
+# Function: getSRTEncoding
+# Purpose: Return the code page used to write the SRT file for a language
+# Parameters: 
+#                 langCode - the language code of the subtitles (e.g. Spanish = "es")
+# ==================================================================================	
+def getSRTEncoding( langCode ):
+	if langCode == "en" or langCode == "es":
+		return "cp1252"
+	elif langCode == "ru":
+		return "cp1251"
+	return "utf-8"
 	
 
 # ==================================================================================
@@ -93,19 +107,23 @@ def writeTranslationToSRT( transcript, sourceLangCode, targetLangCode, srtFileNa
 	# Now create phrases from the translation
 	textToTranslate = str(translation["TranslatedText"])
 	#phrases = getPhrasesFromTranslation( textToTranslate, targetLangCode )
-	#writeSRT( phrases, srtFileName )
+	#writeSRT( phrases, srtFileName, getSRTEncoding( targetLangCode ) )
 
 # ==================================================================================
 # Function: getPhrasesFromTranslation
 # Purpose: Based on the JSON translation provided by Amazon Translate, get the phrases from the translation 
-#          and write it out to an SRT file.  Note that since we are using a block of translated text rather than
+#          as a CueTable.  Note that since we are using a block of translated text rather than
 #          a JSON structure with the timing for the start and end of each word as in the output of Transcribe,
 #          we will need to calculate the start and end-time for each phrase
 # Parameters: 
 #                 translation - the JSON output from Amazon Translate
 #                 targetLangCode - the language code for the translated content (e.g. Spanich = "ES")
+#                 timing - 'model' to predict the phrase durations with the voice's duration model and only measure
+#                          the phrases it isn't sure about (see durationUtils.estimatePhraseDurations),
+#                          'marks' to time many phrases per Polly request with speech marks (see getPhraseDurations),
+#                          'synthesize' to synthesize and measure each phrase on its own
 # ==================================================================================	
-def getPhrasesFromTranslation( translation, targetLangCode ):
+def getPhrasesFromTranslation( translation, targetLangCode, timing='model' ):
 
 	# Now create phrases from the translation
 	words = translation.split()
@@ -113,205 +131,119 @@ def getPhrasesFromTranslation( translation, targetLangCode ):
 	#print( words ) #debug statement
 	
 	#set up some variables for the first pass
-	phrase =  newPhrase()
-	phrases = []
-	nPhrase = True
-	x = 0
-	c = 0
-	seconds = 0
+	phrases = CueTable()
+	microseconds = 0
 
 	print("==> Creating phrases from translation...")
 
-	for word in words:
+	# ten words to a phrase
+	phraseWords = [ words[i:i+10] for i in range( 0, len(words), 10 ) ]
+	phraseTexts = [ " ".join( w ) for w in phraseWords ]
 
-		# if it is a new phrase, then get the start_time of the first item
-		if nPhrase == True:
-			phrase["start_time"] = getTimeCode( seconds )
-			nPhrase = False
-			c += 1
-				
-		# Append the word to the phrase...
-		phrase["words"].append(word)
-		x += 1
-		
-		
-		# now add the phrase to the phrases, generate a new phrase, etc.
-		if x == 10:
-		
-			# For Translations, we now need to calculate the end time for the phrase
-			psecs = getSecondsFromTranslation( getPhraseText( phrase), targetLangCode, "phraseAudio" + str(c) + ".mp3" ) 
-			seconds += psecs
-			phrase["end_time"] = getTimeCode( seconds )
-		
-			#print c, phrase
-			phrases.append(phrase)
-			phrase = newPhrase()
-			nPhrase = True
-			#seconds += .001
-			x = 0
-			
-		# This if statement is to address a defect in the SubtitleClip.   If the Subtitles end up being
-		# a different duration than the content, MoviePy will sometimes fail with unexpected errors while
-		# processing the subclip.   This is limiting it to something less than the total duration for our example
-		# however, you may need to modify or eliminate this line depending on your content.
-		#if c == 30:
-		#	break
+	# For Translations, we now need to calculate the end time for each phrase.  What the speech marks measure is
+	# added to the voice's duration model.  A phrase synthesized on its own is measured with the silence at either
+	# end of its MP3, so it isn't
+	if timing == 'model':
+		durations = estimatePhraseDurations( phraseTexts, targetLangCode )
+	else:
+		if timing == 'marks':
+			seconds = getPhraseDurations( phraseTexts, targetLangCode )
+			recordPhraseDurations( getVoiceId( targetLangCode ), phraseTexts, seconds )
+		else:
+			seconds = [ getSecondsFromTranslation( text, targetLangCode ) for text in phraseTexts ]
+		durations = [ int( round( psecs * 1000000 ) ) for psecs in seconds ]
+
+	# the times are added up in microseconds and only rounded to milliseconds for the cue, so rounding doesn't drift
+	for w, pmicros in zip( phraseWords, durations ):
+		start = microseconds
+		microseconds += int( pmicros )
+
+		phrases.append( int( round( start / 1000.0 ) ), int( round( microseconds / 1000.0 ) ), w )
 			
 	return phrases
 	
 
 # ==================================================================================
 # Function: getPhrasesFromTranscript
-# Purpose: Based on the JSON transcript provided by Amazon Transcribe, get the phrases from the translation 
-#          and write it out to an SRT file
+# Purpose: Based on the JSON transcript provided by Amazon Transcribe, get the phrases from the transcript
+#          as a CueTable
 # Parameters: 
-#                 transcript - the JSON output from Amazon Transcribe
+#                 transcript - the JSON output from Amazon Transcribe, or the name of a file holding it
 # ==================================================================================
 def getPhrasesFromTranscript( transcript ):
 
 	# This function is intended to be called with the JSON structure output from the Transcribe service.  However,
 	# if you only have the translation of the transcript, then you should call getPhrasesFromTranslation instead
 
-	# Now create phrases from the translation
-	ts = json.loads( transcript )
-	items = ts['results']['items']
+	# Now create phrases from the translation.  The items are streamed out of the transcript one at a time
+	# so that a long meeting is never held in memory
+	items = iterTranscriptItems( transcript )
 	#print( items )
 	
 	#set up some variables for the first pass
-	phrase =  newPhrase()
-	phrases = []
-	nPhrase = True
+	phrases = CueTable()
+	words = []
+	start = None
+	end = None
 	x = 0
-	c = 0
 
 	print("==> Creating phrases from transcript...")
 
 	for item in items:
 
-		# if it is a new phrase, then get the start_time of the first item
-		if nPhrase == True:
-			if item["type"] == "pronunciation":
-				phrase["start_time"] = getTimeCode( float(item["start_time"]) )
-				nPhrase = False
-			c+= 1
-		else:	
-			# get the end_time if the item is a pronuciation and store it
-			# We need to determine if this pronunciation or puncuation here
-			# Punctuation doesn't contain timing information, so we'll want
-			# to set the end_time to whatever the last word in the phrase is.
-			if item["type"] == "pronunciation":
-				phrase["end_time"] = getTimeCode( float(item["end_time"]) )
+		# Punctuation doesn't contain timing information, so the phrase starts with its first pronunciation
+		# and ends with its last one
+		if item["type"] == "pronunciation":
+			if start == None:
+				start = secondsToMs( item["start_time"] )
+			end = secondsToMs( item["end_time"] )
 				
 		# in either case, append the word to the phrase...
-		phrase["words"].append(item['alternatives'][0]["content"])
+		appendWord( words, item['alternatives'][0]["content"] )
 		x += 1
 		
-		# now add the phrase to the phrases, generate a new phrase, etc.
+		# now add the phrase to the phrases, start a new phrase, etc.
 		if x == 10:
-			#print c, phrase
-			phrases.append(phrase)
-			phrase = newPhrase()
-			nPhrase = True
+			if start != None:
+				phrases.append( start, end, words )
+			words = []
+			start = None
+			end = None
 			x = 0
-			
+
+	# and whatever is left over at the end
+	if start != None:
+		phrases.append( start, end, words )
+
 	return phrases
 
-#new function for translation to SRT
-def mapTranslationAndWriteToSRT(translation, sourceLangSRTFileName, targetLangCode, region, targetLangSRTFileName):
-	phrases = []
-	tempObject = []
-	originalWordCount = 0
-	with open(sourceLangSRTFileName) as orig:
-		for line in orig:
-			l = line.strip()
-			if len(l) != 0:
-				tempObject.append(l)
-			else:
-				phrases.append(tempObject[:])
-				originalWordCount = originalWordCount + len(tempObject[2].split())
-				tempObject = []
-	if len(phrases) > 0:
-		duration = phrases[-1][1].split(' --> ')[1]
-	
-	hr, min, sec = duration.split(':')
-	sec, ms = sec.split(',')
-	ms = int(hr) * 60 * 60 * 1000 + int(min) * 60 * 1000 + int(sec) * 1000
-
-	#Calculate time percent of each phrase out of total time
-	#also calculate the word percents
-	phraseTimePercents = []
-	phraseWordPercents = []
-	for p in phrases:
-		startTime, endTime = p[1].split(' --> ')
-		startHr, startMin, startSec = startTime.split(':')
-		startSec, startMS = startSec.split(',')
-		startMS = int(startHr) * 60 * 60 * 1000 + int(startMin) * 60 * 1000 + int(startSec) * 1000
-		endHr, endMin, endSec = endTime.split(':')
-		endSec, endMS = endSec.split(',')
-		endMS = int(endHr) * 60 * 60 * 1000 + int(endMin) * 60 * 1000 + int(endSec) * 1000
-		phraseTimePercent = (endMS - startMS) / ms
-		phraseTimePercents.append(phraseTimePercent)
-		phraseWordPercent = len(p[2].split()) / originalWordCount
-		phraseWordPercents.append(phraseWordPercent)
+# ==================================================================================
+# Function: mapTranslationAndWriteToSRT
+# Purpose: Split the translated words over the phrases of the original SRT in proportion to the words in each phrase
+#          (and, optionally, to how long each phrase is on screen), then write the translated SRT with the original times
+# Parameters: 
+#                 translation - the JSON output from Amazon Translate
+#                 sourceLangSRTFileName - the srt file in source language
+#                 targetLangCode - the language code for the translated content (e.g. Spanich = "ES")
+#                 region - the AWS region in which to run the Translation (e.g. "us-east-1")
+#                 targetLangSRTFileName - fileName for the SRT to write to
+#                 durationWeight - how much the phrase durations count against the word counts, from 0 to 1
+# ==================================================================================
+def mapTranslationAndWriteToSRT(translation, sourceLangSRTFileName, targetLangCode, region, targetLangSRTFileName, durationWeight=0.0):
+	phrases = readSRT( sourceLangSRTFileName )
 
 	translationText = translation["TranslatedText"]
 	allTranslatedWords = translationText.split()
-	numTranslatedWords = len(allTranslatedWords)
-
-	#split the translated words up
-	translatedPhrases = []
-	startIndex = 0
-	endIndex = 0
-	for i in range(0, len(phraseWordPercents)):
-		if targetLangCode == 'es':
-			if i % 5 == 0: #TODO: verify if this mods distribution is transferable to other videos!
-				phraseWordCount = math.ceil(phraseWordPercents[i] * numTranslatedWords)
-			else:
-				phraseWordCount = math.floor(phraseWordPercents[i] * numTranslatedWords)
-		elif targetLangCode == 'ru': #TODO: verify if these silly mods are transferable to other videos!
-			if i % 2 == 0:
-				phraseWordCount = math.floor(phraseWordPercents[i] * numTranslatedWords) + 1
-			elif i % 3 == 0:
-				phraseWordCount = math.floor(phraseWordPercents[i] * numTranslatedWords) + 1
-			elif i % 5 == 0:
-				phraseWordCount = math.floor(phraseWordPercents[i] * numTranslatedWords) + 1
-			else:
-				phraseWordCount = math.floor(phraseWordPercents[i] * numTranslatedWords)
-		else:
-			phraseWordCount = math.floor(phraseWordPercents[i] * numTranslatedWords)
-		endIndex = startIndex + phraseWordCount
-		if endIndex > numTranslatedWords:
-			endIndex = numTranslatedWords
-		translatedPhrases.append([phrases[i][0], phrases[i][1], ' '.join(allTranslatedWords[startIndex:endIndex])])
-		startIndex = endIndex
-	if endIndex < numTranslatedWords:
-		translatedPhrases[-1][2] = translatedPhrases[-1][2] + ' ' + ' '.join(allTranslatedWords[endIndex:len(allTranslatedWords)])
-	print(originalWordCount, numTranslatedWords)
+
+	#split the translated words up, keeping the times of the original phrases
+	counts = allocateWords( phrases.getWordCounts(), len(allTranslatedWords), phrases.getDurations(), durationWeight )
+	translatedPhrases = redistributeWords( phrases, allTranslatedWords, counts )
+	print(phrases.getTotalWords(), len(allTranslatedWords))
 
 	#for tp in translatedPhrases:
 	#	print(tp)
 
-	print("==> Writing phrases to disk...")
-	#e = codecs.open(filename,"w+", "utf-8")
-	if targetLangCode == "es":
-		e = codecs.open(targetLangSRTFileName,"w+", "cp1252")
-	elif targetLangCode == "ru":
-		e = codecs.open(targetLangSRTFileName,"w+", "cp1251")
-	else:
-		e = codecs.open(filename,"w+", "utf-8")
-
-	x = 1
-	
-	for t in translatedPhrases:
-		# write out the phrase number
-		e.write( t[0] + "\n" )
-		
-		# write out the start and end time
-		e.write( t[1] + "\n" )
-					
-		# write out the srt file
-		e.write(t[2] + "\n\n" )
-	e.close()
+	writeSRT( translatedPhrases, targetLangSRTFileName, getSRTEncoding( targetLangCode ) )
 
 # ==================================================================================
 # Function: translateTranscriptSRTtoSRT
@@ -326,92 +258,21 @@ def mapTranslationAndWriteToSRT(translation, sourceLangSRTFileName, targetLangCo
 def translateTranscriptSRTtoSRT( transcriptSRT, sourceLangCode, targetLangCode, region , srtFileName):
 	# Get the translation in the target language.  We want to do this for multiple phrases from the SRT
 	# at a time. This really matters in some lanaguages
-	phrases = []
-	counter = 0
-	tempObject = []
-	with open(transcriptSRT) as orig:
-		for line in orig:
-			l = line.strip()
-			if len(l) != 0:
-				tempObject.append(l)
-			else:
-				phrases.append(tempObject[:])
-				tempObject = []
-
-	#set up the Amazon Translate client
-	translate = boto3.client(service_name='translate', region_name=region, use_ssl=True)
-	
+	phrases = readSRT( transcriptSRT )
+
 	# call Translate  with the text, source language code, and target language code.  The result is a JSON structure containing
 	# the translated text
 	# Have to do this by sentence chunks because there can only be 5000 bytes sent at once
   
-	#try fifty phrases from srt at a time
-	chunkLen = 50
-	chunks = []
-	counter = 0
-	chunk = ''
-	for p in phrases:
-		counter = counter + 1
-		if counter % chunkLen == 0:
-			chunks.append(chunk)
-			counter = 0
-			chunk = ''
-		else:
-			chunk = chunk + ' ' + p[2]
-	if len(chunk) > 0:
-		chunks.append(chunk)
-
-	translatedChunks = []
-	for c in chunks:
-		translatedChunk = translate.translate_text(Text=c, SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
-		translatedChunks.append(translatedChunk["TranslatedText"])
-
-	#now divide translated content into approximate lengths to match original phrase counters
-	translatedWithoutTimes = []
-	numPhrases = len(phrases)
-	allWords = (' '.join(translatedChunks).split())
-	numWords = len(allWords)
-	wordsPerPhrase = int(round(numWords / numPhrases))
-	discrepancy = numWords - (numPhrases * wordsPerPhrase)
-	if discrepancy > 0:
-		addExtraWordPerEvery = math.ceil(numPhrases / discrepancy) 
-
-	startIndex = 0
-	for i in range(0, numPhrases):
-		if startIndex + wordsPerPhrase > numWords:
-			translatedWithoutTimes.append(' '.join(allWords[startIndex:(startIndex + (numWords - startIndex + wordsPerPhrase))]))
-		elif i % addExtraWordPerEvery == 0:
-			if startIndex + 1 + wordsPerPhrase < numWords:
-				translatedWithoutTimes.append(' '.join(allWords[startIndex:startIndex + wordsPerPhrase + 1]))
-				startIndex = startIndex + 1
-			else:
-				translatedWithoutTimes.append(' '.join(allWords[startIndex:startIndex + wordsPerPhrase]))
-		else:
-			translatedWithoutTimes.append(' '.join(allWords[startIndex:startIndex + wordsPerPhrase]))
-		startIndex = startIndex + wordsPerPhrase
+	#each phrase is cached on its own, the ones not in the cache are packed into as few requests as will hold them
+	translatedPhrases = translatePieces( [phrases.getText(i) for i in range(len(phrases))], sourceLangCode, targetLangCode, region )
 
-	translatedWithTimes = []
-	for i in range(len(phrases)):
-		translatedWithTimes.append((phrases[i][0], phrases[i][1], translatedWithoutTimes[i]))
+	#now divide translated content to match the original phrases
+	allWords = (' '.join(translatedPhrases).split())
+	counts = allocateWords( phrases.getWordCounts(), len(allWords) )
+	translatedWithTimes = redistributeWords( phrases, allWords, counts )
 
-	for t in translatedWithTimes:
-		print(t)
-
-	print("==> Writing phrases to disk...")
-	#e = codecs.open(filename,"w+", "utf-8")
-	e = codecs.open(srtFileName,"w+", "cp1252")
-	x = 1
-	
-	for t in translatedWithTimes:
-		# write out the phrase number
-		e.write( t[0] + "\n" )
-		
-		# write out the start and end time
-		e.write( t[1] + "\n" )
-					
-		# write out the srt file
-		e.write(t[2] + "\n\n" )
-	e.close()
+	writeSRT( translatedWithTimes, srtFileName, getSRTEncoding( targetLangCode ) )
 
 # ==================================================================================
 # Function: translateTranscript
@@ -426,66 +287,48 @@ def translateTranscript( transcript, sourceLangCode, targetLangCode, region ):
 	# Get the translation in the target language.  We want to do this first so that the translation is in the full context
 	# of what is said vs. 1 phrase at a time.  This really matters in some lanaguages
 
-	# stringify the transcript
-	ts = json.loads( transcript )
-
 	# pull out the transcript text and put it in the txt variable
-	txt = ts["results"]["transcripts"][0]["transcript"]
+	txt = getTranscriptText( transcript )
 		
-	#set up the Amazon Translate client
-	translate = boto3.client(service_name='translate', region_name=region, use_ssl=True)
-	
 	# call Translate  with the text, source language code, and target language code.  The result is a JSON structure containing
 	# the translated text
 	# Have to do this by sentence chunks because there can only be 5000 bytes sent at once
-	sentences = re.split(r'(?<=\.)', txt)
+	sentences = splitSentences( txt )
 	#print(txt)
   
-	translatedChunks = []
-	for i in range(0, len(sentences), 10):
-		if (len(sentences) - i > 0 and len(sentences) - i < 10):
-			chunk = " ".join(sentences[i:i+(len(sentences) - i)])
-			translatedChunk = translate.translate_text(Text=chunk, SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
-			translatedChunks.append(translatedChunk["TranslatedText"])
-		else:
-			chunk = " ".join(sentences[i:i+10])
-			translatedChunk = translate.translate_text(Text=chunk, SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
-			translatedChunks.append(translatedChunk["TranslatedText"])
+	translatedSentences = translatePieces( sentences, sourceLangCode, targetLangCode, region )
 	#translation = translate.translate_text(Text=txt,SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
-	translation = {"TranslatedText": "".join(translatedChunks)} #kind of hacky
+	translation = {"TranslatedText": " ".join( sentence for sentence in translatedSentences if len(sentence) > 0 )} #kind of hacky
 	return translation
 	
 	
 
 # ==================================================================================
 # Function: writeSRT
-# Purpose: Iterate through the phrases and write them to the SRT file
+# Purpose: Iterate through the phrases and write them to the SRT file.  This is the only place the
+#          times are turned into timecodes
 # Parameters: 
-#                 phrases - the array of JSON tuples containing the phrases to show up as subtitles
+#                 phrases - the CueTable containing the phrases to show up as subtitles
 #                 filename - the name of the SRT output file (e.g. "mySRT.srt")
+#                 encoding - the code page to write the file in
 # ==================================================================================
-def writeSRT( phrases, filename ):
+def writeSRT( phrases, filename, encoding="cp1252" ):
 	print("==> Writing phrases to disk...")
 
 	# open the files
 	#e = codecs.open(filename,"w+", "utf-8")
-	e = codecs.open(filename,"w+", "cp1252")
-	x = 1
+	e = codecs.open(filename,"w+", encoding)
 	
-	for phrase in phrases:
+	for i in range( len(phrases) ):
 
-		# determine how many words are in the phrase
-		length = len(phrase["words"])
-		
 		# write out the phrase number
-		e.write( str(x) + "\n" )
-		x += 1
+		e.write( str(i + 1) + "\n" )
 		
 		# write out the start and end time
-		e.write( phrase["start_time"] + " --> " + phrase["end_time"] + "\n" )
+		e.write( formatTimeCode( phrases.starts[i] ) + " --> " + formatTimeCode( phrases.ends[i] ) + "\n" )
 					
-		# write out the full phase.  Use spacing if it is a word, or punctuation without spacing
-		out = getPhraseText( phrase )
+		# write out the full phase.  Punctuation was already attached to its word when the phrase was built
+		out = phrases.getText( i )
 
 		# write out the srt file
 		e.write(out + "\n\n" )
@@ -494,36 +337,3 @@ def writeSRT( phrases, filename ):
 		#print out
 		
 	e.close()
-	
-
-# ==================================================================================
-# Function: getPhraseText
-# Purpose: For a given phrase, return the string of words including punctuation
-# Parameters: 
-#                 phrase - the array of JSON tuples containing the words to show up as subtitles
-# ==================================================================================
-
-def getPhraseText( phrase ):
-
-	length = len(phrase["words"])
-		
-	out = ""
-	for i in range( 0, length ):
-		if re.match( '[a-zA-Z0-9]', phrase["words"][i]):
-			if i > 0:
-				out += " " + phrase["words"][i]
-			else:
-				out += phrase["words"][i]
-		else:
-			out += phrase["words"][i]
-			
-	return out
-	
-
-			
-
-	
-
-
-	
-	
\ No newline at end of file
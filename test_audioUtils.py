@@ -0,0 +1,123 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_audioUtils.py
+#
+# Purpose: pytest checks of getMP3Duration on generated layer III frames: MPEG 1, 2 and 2.5, with and without an ID3v2
+#          tag in front, and with a Xing or Info frame
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import pytest
+
+pytest.importorskip( "boto3" )
+pytest.importorskip( "moviepy" )
+
+from audioUtils import *
+
+# the bits of the version in the frame header, for each MPEG version
+VERSION_BITS = { 1: 3, 2: 2, 2.5: 0 }
+
+
+# ==================================================================================
+# Function: makeFrame
+# Purpose: Return one silent MPEG layer III frame.  The frame is all zeros after its header, unless a Xing/Info tag is
+#          asked for, in which case the tag is written where a decoder looks for it
+# Parameters:
+#                 version - the MPEG version, 1, 2 or 2.5
+#                 bitrate - the bitrate in kbps
+#                 sampleRate - the sample rate in Hz
+#                 mono - boolean value as to whether or not the frame has one channel
+#                 padding - 1 for a frame with the padding byte
+#                 tag - b"Xing" or b"Info" to write a Xing/Info tag into the frame, or None
+#                 frames - the number of frames the Xing/Info tag gives, or None for a tag without a frame count
+# ==================================================================================
+def makeFrame( version, bitrate, sampleRate, mono=False, padding=0, tag=None, frames=None ):
+	bitrateIndex = MP3_BITRATES[( 1 if version == 1 else 2, 3 )].index( bitrate )
+	sampleRateIndex = MP3_SAMPLE_RATES[version].index( sampleRate )
+	header = bytes( [ 0xFF, 0xE0 | ( VERSION_BITS[version] << 3 ) | ( 1 << 1 ) | 1, ( bitrateIndex << 4 ) | ( sampleRateIndex << 2 ) | ( padding << 1 ), \
+		( 3 if mono else 0 ) << 6 ] )
+
+	length = ( 144 if version == 1 else 72 ) * bitrate * 1000 // sampleRate + padding
+	frame = bytearray( header + bytes( length - 4 ) )
+	if tag != None:
+		if version == 1:
+			offset = 4 + ( 17 if mono else 32 )
+		else:
+			offset = 4 + ( 9 if mono else 17 )
+		frame[offset:offset + 4] = tag
+		if frames != None:
+			frame[offset + 4:offset + 12] = ( 1 ).to_bytes( 4, "big" ) + frames.to_bytes( 4, "big" )
+	return bytes( frame )
+
+
+# ==================================================================================
+# Function: makeID3Tag
+# Purpose: Return an ID3v2 tag with a body of the given size.  The body has bytes that look like a frame sync in it, so
+#          the tag must be skipped by its size rather than by searching for the first frame
+# Parameters:
+#                 size - the size of the body of the tag
+# ==================================================================================
+def makeID3Tag( size ):
+	synchsafe = bytes( [ ( size >> 21 ) & 0x7F, ( size >> 14 ) & 0x7F, ( size >> 7 ) & 0x7F, size & 0x7F ] )
+	body = ( b"\xff\xfb\x90\x00" * ( size // 4 + 1 ) )[:size]
+	return b"ID3\x04\x00\x00" + synchsafe + body
+
+
+@pytest.mark.parametrize( "version, bitrate, sampleRate, mono, frameSamples", [
+	( 1, 128, 44100, False, 1152 ),
+	( 1, 32, 32000, True, 1152 ),
+	( 2, 64, 22050, True, 576 ),
+	( 2, 160, 24000, False, 576 ),
+	( 2.5, 8, 8000, True, 576 ),
+	( 2.5, 32, 11025, False, 576 ),
+] )
+@pytest.mark.parametrize( "id3", [ False, True ] )
+def test_frames( version, bitrate, sampleRate, mono, frameSamples, id3 ):
+	# padded and unpadded frames, the way an encoder mixes them to hold the bitrate
+	data = b"".join( makeFrame( version, bitrate, sampleRate, mono, padding=i % 3 == 0 ) for i in range( 90 ) )
+	if id3:
+		data = makeID3Tag( 1000 ) + data
+
+	assert getMP3Duration( data ) == pytest.approx( 90 * frameSamples / sampleRate )
+
+
+@pytest.mark.parametrize( "version, sampleRate, frameSamples", [ ( 1, 44100, 1152 ), ( 2, 24000, 576 ), ( 2.5, 12000, 576 ) ] )
+def test_xing_frame_count( version, sampleRate, frameSamples ):
+	bitrate = 64 if version == 1 else 32
+	data = makeID3Tag( 200 ) + makeFrame( version, bitrate, sampleRate, tag=b"Xing", frames=5000 ) + \
+		b"".join( makeFrame( version, bitrate, sampleRate ) for i in range( 10 ) )
+
+	# the count in the Xing frame is taken instead of walking the frames
+	assert getMP3Duration( data ) == pytest.approx( 5000 * frameSamples / sampleRate )
+
+
+def test_info_frame_without_count_is_not_audio():
+	data = makeFrame( 1, 128, 44100, mono=True, tag=b"Info" ) + b"".join( makeFrame( 1, 128, 44100, mono=True ) for i in range( 40 ) )
+
+	assert getMP3Duration( data ) == pytest.approx( 40 * 1152 / 44100 )
+
+
+def test_trailing_id3v1_tag_and_no_frames():
+	data = b"".join( makeFrame( 2, 64, 22050 ) for i in range( 10 ) ) + b"TAG" + bytes( 125 )
+
+	assert getMP3Duration( data ) == pytest.approx( 10 * 576 / 22050 )
+	assert getMP3Duration( b"" ) == 0.0
+	assert getMP3Duration( makeID3Tag( 50 ) ) == 0.0
@@ -0,0 +1,76 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_cueUtils.py
+#
+# Purpose: pytest checks that allocateWords hands out exactly the translated words it is given, never a negative count,
+#          on large random cue tables
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import numpy as np
+import pytest
+from cueUtils import *
+
+CUES = 100000
+
+
+# ==================================================================================
+# Function: randomCues
+# Purpose: Return random word counts and durations (in milliseconds) for a table of cues, with some cues that have no
+#          words and some that take no time
+# Parameters:
+#                 seed - the seed of the random numbers
+# ==================================================================================
+def randomCues( seed ):
+	rng = np.random.default_rng( seed )
+	wordCounts = rng.integers( 0, 25, size=CUES )
+	durations = rng.integers( 0, 8000, size=CUES )
+	wordCounts[rng.random( CUES ) < 0.1] = 0
+	durations[rng.random( CUES ) < 0.1] = 0
+	return wordCounts, durations
+
+
+@pytest.mark.parametrize( "durationWeight", [ 0.0, 0.35, 1.0 ] )
+@pytest.mark.parametrize( "seed", [ 1, 2, 3 ] )
+def test_allocateWords_conserves_words( seed, durationWeight ):
+	wordCounts, durations = randomCues( seed )
+	totalWords = int( wordCounts.sum() * np.random.default_rng( seed ).uniform( 0.5, 1.5 ) )
+
+	counts = allocateWords( wordCounts, totalWords, durations, durationWeight )
+
+	assert len(counts) == CUES
+	assert counts.sum() == totalWords
+	assert counts.min() >= 0
+
+
+@pytest.mark.parametrize( "durationWeight", [ 0.0, 0.5, 1.0 ] )
+def test_allocateWords_all_cues_empty( durationWeight ):
+	wordCounts = np.zeros( CUES, dtype=np.int64 )
+	durations = np.zeros( CUES, dtype=np.int64 )
+
+	counts = allocateWords( wordCounts, 12345, durations, durationWeight )
+
+	assert counts.sum() == 12345
+	assert counts.min() >= 0
+
+
+def test_allocateWords_no_cues():
+	assert len(allocateWords( [], 10 )) == 0
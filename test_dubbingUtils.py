@@ -0,0 +1,85 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_dubbingUtils.py
+#
+# Purpose: pytest checks that buildDubTimeline keeps every cue within the tolerance of its start time, with synthetic
+#          speech standing in for Polly
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import numpy as np
+import pytest
+
+pytest.importorskip( "boto3" )
+pytest.importorskip( "moviepy" )
+
+from dubbingUtils import *
+
+RATE = DUB_SAMPLE_RATE
+
+
+# ==================================================================================
+# Function: syntheticSpeech
+# Purpose: Return a tone of the given length standing in for the speech of a cue
+# Parameters:
+#                 seconds - the length of the speech
+# ==================================================================================
+def syntheticSpeech( seconds ):
+	t = np.arange( int( seconds * RATE ) ) / float( RATE )
+	return ( np.sin( 2 * np.pi * 220 * t ) * 8000 ).astype( np.int16 )
+
+
+def test_dense_dialogue_stays_within_tolerance():
+	# cues every 2 seconds, each with 4 seconds of speech: more than DUB_MAX_SPEEDUP can absorb
+	starts = np.arange( 200, dtype=np.int64 ) * 2000
+	speech = [ syntheticSpeech( 4.0 ) for i in range( len(starts) ) ]
+
+	track, report = buildDubTimeline( starts, speech, RATE, duration=400.0 )
+
+	assert report["maxDrift"] <= DUB_TOLERANCE
+	assert report["hardSpeedups"] > 0
+	assert report["trimmed"] > 0
+	# the last cue may run the tolerance past the end of the video
+	assert 400 * RATE <= len(track) <= ( 400 + DUB_TOLERANCE ) * RATE
+
+
+def test_mixed_dialogue_stays_within_tolerance():
+	rng = np.random.default_rng( 7 )
+	starts = np.cumsum( rng.integers( 300, 4000, size=500 ) ).astype( np.int64 )
+	speech = [ syntheticSpeech( seconds ) if rng.random() > 0.1 else np.zeros( 0, dtype=np.int16 ) \
+		for seconds in rng.uniform( 0.2, 5.0, size=len(starts) ) ]
+
+	track, report = buildDubTimeline( starts, speech, RATE )
+
+	assert report["maxDrift"] <= DUB_TOLERANCE
+	assert report["maxDrift"] <= report["maxDriftBackToBack"]
+
+
+def test_sparse_dialogue_is_left_alone():
+	starts = np.arange( 20, dtype=np.int64 ) * 5000
+	speech = [ syntheticSpeech( 2.0 ) for i in range( len(starts) ) ]
+
+	track, report = buildDubTimeline( starts, speech, RATE )
+
+	assert report["maxDrift"] == 0
+	assert report["speedups"] == 0
+	assert report["trimmed"] == 0
+	assert np.array_equal( track[:len(speech[0])], speech[0] )
@@ -0,0 +1,115 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_durationUtils.py
+#
+# Purpose: pytest checks that a duration model fitted to synthetic measurements predicts them again, and trusts only
+#          the predictions it should: enough samples, phrases like the ones it was fitted to, and a small error
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import numpy as np
+import pytest
+
+pytest.importorskip( "boto3" )
+pytest.importorskip( "moviepy" )
+
+from durationUtils import *
+
+WORDS = [ "the", "motion", "carries", "council", "budget", "approved", "resident", "meeting", "agenda", "public", "item", "vote" ]
+
+
+# ==================================================================================
+# Function: randomPhrases
+# Purpose: Return random phrases of up to ten words, some with a pause or a number in them
+# Parameters:
+#                 rng - the numpy random generator
+#                 count - the number of phrases
+# ==================================================================================
+def randomPhrases( rng, count ):
+	phrases = []
+	for i in range( count ):
+		words = list( rng.choice( WORDS, size=rng.integers( 1, 11 ) ) )
+		if rng.random() < 0.3:
+			words[0] += ","
+		if rng.random() < 0.2:
+			words.append( str( rng.integers( 1, 100 ) ) )
+		phrases.append( " ".join( words ) + "." )
+	return phrases
+
+
+# ==================================================================================
+# Function: syntheticSeconds
+# Purpose: Return made up measurements: a fixed time per syllable, pause and digit, plus noise
+# Parameters:
+#                 rng - the numpy random generator
+#                 phrases - the list of phrases
+#                 noise - the standard deviation of the noise in seconds
+# ==================================================================================
+def syntheticSeconds( rng, phrases, noise ):
+	features = getPhraseFeatures( phrases )
+	seconds = 0.1 + 0.18 * features[:, 2] + 0.25 * features[:, 4] + 0.3 * features[:, 5] + 0.12 * features[:, 6]
+	return list( seconds + rng.normal( 0, noise, size=len(phrases) ) )
+
+
+def test_fit_recovers_the_durations( tmp_path ):
+	rng = np.random.default_rng( 3 )
+	phrases = randomPhrases( rng, 500 )
+	recordPhraseDurations( "Test", phrases, syntheticSeconds( rng, phrases, 0.02 ), str(tmp_path) )
+
+	newPhrases = randomPhrases( rng, 200 )
+	durations, confident = predictPhraseDurations( "Test", newPhrases, str(tmp_path) )
+	expected = np.asarray( syntheticSeconds( rng, newPhrases, 0.0 ) ) * 1000000
+
+	# a few new phrases may count more of something than any measured one, the rest are trusted and close
+	assert durations.dtype == np.int64
+	assert confident.mean() > 0.9
+	assert np.abs( durations - expected )[confident].max() < 100000
+
+
+def test_too_few_samples_are_not_trusted( tmp_path ):
+	rng = np.random.default_rng( 4 )
+	phrases = randomPhrases( rng, DURATION_MIN_SAMPLES - 1 )
+	recordPhraseDurations( "Test", phrases, syntheticSeconds( rng, phrases, 0.02 ), str(tmp_path) )
+
+	durations, confident = predictPhraseDurations( "Test", phrases, str(tmp_path) )
+
+	assert not confident.any()
+
+
+def test_unsure_predictions_are_split_out( tmp_path ):
+	rng = np.random.default_rng( 5 )
+	phrases = randomPhrases( rng, 500 )
+	recordPhraseDurations( "Test", phrases, syntheticSeconds( rng, phrases, 0.02 ), str(tmp_path) )
+
+	# a phrase much longer than any it was fitted to is measured instead
+	longPhrase = " ".join( [ "council" ] * 40 ) + "."
+	durations, confident = predictPhraseDurations( "Test", [ "the motion carries.", longPhrase ], str(tmp_path) )
+	assert list( confident ) == [ True, False ]
+
+
+def test_noisy_voice_is_not_trusted( tmp_path ):
+	rng = np.random.default_rng( 6 )
+	phrases = randomPhrases( rng, 500 )
+	recordPhraseDurations( "Test", phrases, syntheticSeconds( rng, phrases, 1.5 ), str(tmp_path) )
+
+	durations, confident = predictPhraseDurations( "Test", randomPhrases( rng, 100 ), str(tmp_path) )
+
+	assert not confident.any()
@@ -0,0 +1,177 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_transcribeUtils.py
+#
+# Purpose: pytest checks of the transcript downloader against a local HTTP server standing in for S3: a compressed
+#          transcript, a server that is briefly unavailable, and a connection that drops part way through
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: the retry budget of a download, and a caller's file object left open
+#
+# ==================================================================================
+
+import os
+import json
+import gzip
+import threading
+import http.server
+import pytest
+
+pytest.importorskip( "boto3" )
+pytest.importorskip( "requests" )
+
+import transcribeUtils
+from transcribeUtils import *
+
+TRANSCRIPT = json.dumps( { "jobName": "test", "results": { "transcripts": [ { "transcript": "Motion carries." } ], \
+	"items": [ { "start_time": str(i), "end_time": str(i + 1), "alternatives": [ { "content": "word" + str(i) } ], "type": "pronunciation" } \
+	for i in range( 20000 ) ] } } ).encode( "utf-8" )
+COMPRESSED = gzip.compress( TRANSCRIPT )
+
+# how long the server waits before it answers, so there is a first byte latency to measure
+HEADER_DELAY = 0.05
+
+
+# ==================================================================================
+# Class: StandInHandler
+# Purpose: Serves the transcript at /gzip (compressed when asked for), /flaky (503 on the first request), /drop
+#          (the connection is closed half way through the first response) and /down (503 every time)
+# ==================================================================================
+class StandInHandler( http.server.BaseHTTPRequestHandler ):
+	requests = {}
+
+	def do_GET( self ):
+		count = StandInHandler.requests.get( self.path, 0 ) + 1
+		StandInHandler.requests[self.path] = count
+		threading.Event().wait( HEADER_DELAY )
+
+		if ( self.path == "/flaky" and count == 1 ) or self.path == "/down":
+			self.send_response( 503 )
+			self.send_header( "Content-Length", "0" )
+			self.end_headers()
+			return
+
+		compressed = "gzip" in self.headers.get( "Accept-Encoding", "" )
+		body = COMPRESSED if compressed else TRANSCRIPT
+		self.send_response( 200 )
+		self.send_header( "Content-Length", str(len(body)) )
+		if compressed:
+			self.send_header( "Content-Encoding", "gzip" )
+		self.end_headers()
+
+		if self.path == "/drop" and count == 1:
+			self.wfile.write( body[:len(body) // 2] )
+			self.wfile.flush()
+			self.close_connection = True
+			return
+		self.wfile.write( body )
+
+	def log_message( self, *args ):
+		pass
+
+
+@pytest.fixture
+def server( monkeypatch ):
+	monkeypatch.setattr( transcribeUtils.time, "sleep", lambda seconds: None )
+	StandInHandler.requests = {}
+	httpd = http.server.ThreadingHTTPServer( ( "127.0.0.1", 0 ), StandInHandler )
+	thread = threading.Thread( target=httpd.serve_forever, daemon=True )
+	thread.start()
+	yield "http://127.0.0.1:" + str(httpd.server_port)
+	httpd.shutdown()
+	httpd.server_close()
+
+
+def test_gzip_download( server, tmp_path ):
+	fileName = str( tmp_path / "transcript.json" )
+	before = getDownloadStats()
+
+	result = downloadTranscript( server + "/gzip", fileName )
+
+	with open( fileName, "rb" ) as f:
+		assert f.read() == TRANSCRIPT
+	assert not os.path.exists( fileName + ".tmp" )
+	assert result["bytes"] == len(COMPRESSED)
+	assert result["decodedBytes"] == len(TRANSCRIPT)
+	assert result["firstByteSeconds"] >= HEADER_DELAY
+	assert result["seconds"] >= result["firstByteSeconds"]
+
+	after = getDownloadStats()
+	assert after["downloads"] - before["downloads"] == 1
+	assert after["bytes"] - before["bytes"] == len(COMPRESSED)
+	assert after["decodedBytes"] - before["decodedBytes"] == len(TRANSCRIPT)
+	assert after["retries"] == before["retries"]
+
+
+def test_retry_after_503( server, tmp_path ):
+	fileName = str( tmp_path / "transcript.json" )
+	before = getDownloadStats()
+
+	downloadTranscript( server + "/flaky", fileName )
+
+	with open( fileName, "rb" ) as f:
+		assert f.read() == TRANSCRIPT
+	assert StandInHandler.requests["/flaky"] == 2
+	assert getDownloadStats()["retries"] - before["retries"] == 1
+
+
+def test_retry_after_dropped_connection( server, tmp_path ):
+	fileName = str( tmp_path / "transcript.json" )
+	before = getDownloadStats()
+
+	result = downloadTranscript( server + "/drop", fileName )
+
+	with open( fileName, "rb" ) as f:
+		assert f.read() == TRANSCRIPT
+	assert not os.path.exists( fileName + ".tmp" )
+	assert StandInHandler.requests["/drop"] == 2
+	assert result["decodedBytes"] == len(TRANSCRIPT)
+	assert getDownloadStats()["retries"] - before["retries"] == 1
+
+
+def test_stream_into_parser( server ):
+	items = list( iterTranscriptItems( server + "/gzip" ) )
+
+	assert len(items) == 20000
+	assert items[-1]["alternatives"][0]["content"] == "word19999"
+	assert getTranscriptText( server + "/gzip" ) == "Motion carries."
+
+
+def test_retries_share_one_budget( server, tmp_path ):
+	fileName = str( tmp_path / "transcript.json" )
+
+	with pytest.raises( Exception ):
+		downloadTranscript( server + "/down", fileName, maxAttempts=5 )
+
+	# the request and the body don't each get their own attempts
+	assert StandInHandler.requests["/down"] == 5
+	assert not os.path.exists( fileName )
+
+
+def test_file_object_is_left_open( tmp_path ):
+	fileName = str( tmp_path / "transcript.json" )
+	with open( fileName, "wb" ) as f:
+		f.write( TRANSCRIPT )
+
+	with open( fileName, "r", encoding="utf-8" ) as f:
+		assert getTranscriptText( f ) == "Motion carries."
+		assert not f.closed
+		f.seek( 0 )
+		assert len(list( iterTranscriptItems( f ) )) == 20000
+		assert not f.closed
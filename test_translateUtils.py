@@ -0,0 +1,95 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_translateUtils.py
+#
+# Purpose: pytest checks that translatePieces caches each sentence or cue on its own, so a piece is found again
+#          whatever else it was packed with, using a stand-in Translate client
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import threading
+import pytest
+
+pytest.importorskip( "boto3" )
+
+import translateUtils
+from translateUtils import *
+
+
+# ==================================================================================
+# Class: StandInTranslate
+# Purpose: A Translate client that upper cases its text line by line and remembers every text it was sent.  With
+#          joinLines it joins the lines of a request instead, the way a translation that doesn't keep them would
+# ==================================================================================
+class StandInTranslate:
+	def __init__( self, joinLines=False ):
+		self.lock = threading.Lock()
+		self.texts = []
+		self.joinLines = joinLines
+
+	def translate_text( self, Text, SourceLanguageCode, TargetLanguageCode ):
+		with self.lock:
+			self.texts.append( Text )
+		separator = " " if self.joinLines else "\n"
+		return { "TranslatedText": separator.join( line.upper() for line in Text.split( "\n" ) ) }
+
+
+@pytest.fixture
+def standIn( monkeypatch, tmp_path ):
+	def install( translate ):
+		monkeypatch.setattr( translateUtils, "getClient", lambda *args: translate )
+		return translate, str( tmp_path / "cache.sqlite" )
+	return install
+
+
+def test_pieces_come_back_in_order( standIn ):
+	translate, cacheFileName = standIn( StandInTranslate() )
+	pieces = [ "sentence " + str(i) + "." for i in range( 2000 ) ] + [ "", "sentence 5." ]
+
+	translated = translatePieces( pieces, "en", "es", "us-east-1", cacheFileName=cacheFileName )
+
+	assert translated == [ piece.upper() for piece in pieces ]
+	# packed into a few requests, and the repeated sentence and the empty one were not sent
+	assert len(translate.texts) < 10
+	assert sum( len(text.split( "\n" )) for text in translate.texts ) == 2000
+
+
+def test_pieces_hit_the_cache_however_they_are_packed( standIn ):
+	translate, cacheFileName = standIn( StandInTranslate() )
+	translatePieces( [ "one.", "two.", "three." ], "en", "es", "us-east-1", cacheFileName=cacheFileName )
+	translate.texts = []
+
+	# a cue that repeats a sentence of the transcript, packed with one that is new
+	translated = translatePieces( [ "two.", "four." ], "en", "es", "us-east-1", cacheFileName=cacheFileName )
+
+	assert translated == [ "TWO.", "FOUR." ]
+	assert translate.texts == [ "four." ]
+
+
+def test_lines_not_kept( standIn ):
+	translate, cacheFileName = standIn( StandInTranslate( joinLines=True ) )
+
+	translated = translatePieces( [ "one.", "two." ], "en", "es", "us-east-1", cacheFileName=cacheFileName )
+
+	# the whole request goes to the first piece, and neither piece is cached
+	assert " ".join( translated ).split() == [ "ONE.", "TWO." ]
+	translatePieces( [ "one.", "two." ], "en", "es", "us-east-1", cacheFileName=cacheFileName )
+	assert len(translate.texts) == 2
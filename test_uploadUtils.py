@@ -0,0 +1,175 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# test_uploadUtils.py
+#
+# Purpose: pytest checks of uploadFile against a stand-in S3 client that checks the checksums it is sent the way S3
+#          does, and returns ETags that are not MD5s, the way an encrypted bucket does
+#
+# Change Log:
+#          10/17/2026: Initial version
+#
+# ==================================================================================
+
+import os
+import uuid
+import base64
+import hashlib
+import threading
+import pytest
+
+pytest.importorskip( "boto3" )
+
+import uploadUtils
+from uploadUtils import *
+
+
+# ==================================================================================
+# Class: StandInS3
+# Purpose: An in-memory S3 client with the calls uploadFile makes.  failParts maps a part number to the number of
+#          times its upload fails before it goes through (-1 for always), and partDelay(partNumber) says how long each
+#          part takes, so parts can be made to finish out of order
+# ==================================================================================
+class StandInS3:
+	def __init__( self, failParts=None, partDelay=None ):
+		self.lock = threading.Lock()
+		self.objects = {}
+		self.uploads = {}
+		self.aborted = []
+		self.partCalls = 0
+		self.finished = []
+		self.failParts = dict( failParts or {} )
+		self.partDelay = partDelay
+
+	def checkBody( self, Body, ContentMD5, ChecksumSHA256 ):
+		if base64.b64encode( hashlib.md5( Body ).digest() ).decode( "ascii" ) != ContentMD5:
+			raise Exception( "BadDigest" )
+		if base64.b64encode( hashlib.sha256( Body ).digest() ).decode( "ascii" ) != ChecksumSHA256:
+			raise Exception( "BadDigest" )
+
+	def put_object( self, Bucket, Key, Body, ContentMD5, ChecksumSHA256 ):
+		self.checkBody( Body, ContentMD5, ChecksumSHA256 )
+		self.objects[( Bucket, Key )] = Body
+		return { "ETag": '"' + uuid.uuid4().hex + '"', "ChecksumSHA256": ChecksumSHA256 }
+
+	def create_multipart_upload( self, Bucket, Key, ChecksumAlgorithm ):
+		uploadId = uuid.uuid4().hex
+		self.uploads[uploadId] = {}
+		return { "UploadId": uploadId }
+
+	def upload_part( self, Bucket, Key, UploadId, PartNumber, Body, ContentMD5, ChecksumSHA256 ):
+		with self.lock:
+			self.partCalls += 1
+			failures = self.failParts.get( PartNumber, 0 )
+			if failures != 0:
+				self.failParts[PartNumber] = failures - 1
+				raise Exception( "SlowDown" )
+		if self.partDelay != None:
+			threading.Event().wait( self.partDelay( PartNumber ) )
+		self.checkBody( Body, ContentMD5, ChecksumSHA256 )
+		etag = '"' + uuid.uuid4().hex + '"'
+		with self.lock:
+			self.uploads[UploadId][PartNumber] = ( etag, Body )
+			self.finished.append( PartNumber )
+		return { "ETag": etag, "ChecksumSHA256": ChecksumSHA256 }
+
+	def complete_multipart_upload( self, Bucket, Key, UploadId, MultipartUpload ):
+		parts = MultipartUpload["Parts"]
+		numbers = [ part["PartNumber"] for part in parts ]
+		assert numbers == sorted( numbers )
+		stored = self.uploads.pop( UploadId )
+		for part in parts:
+			assert stored[part["PartNumber"]][0] == part["ETag"]
+		self.objects[( Bucket, Key )] = b"".join( stored[number][1] for number in numbers )
+		digests = b"".join( base64.b64decode( part["ChecksumSHA256"] ) for part in parts )
+		return { "ETag": '"' + uuid.uuid4().hex + '-' + str(len(parts)) + '"', \
+			"ChecksumSHA256": base64.b64encode( hashlib.sha256( digests ).digest() ).decode( "ascii" ) + "-" + str(len(parts)) }
+
+	def abort_multipart_upload( self, Bucket, Key, UploadId ):
+		self.aborted.append( UploadId )
+		self.uploads.pop( UploadId, None )
+
+	def head_object( self, Bucket, Key ):
+		return { "ContentLength": len(self.objects[( Bucket, Key )]) }
+
+
+@pytest.fixture
+def standIn( monkeypatch ):
+	# small parts keep the files small; the retries don't wait
+	monkeypatch.setattr( uploadUtils, "MIN_PART_SIZE", 1024 )
+	monkeypatch.setattr( uploadUtils.time, "sleep", lambda seconds: None )
+
+	def install( s3 ):
+		monkeypatch.setattr( uploadUtils, "getClient", lambda *args: s3 )
+		return s3
+	return install
+
+
+def writeFile( tmp_path, size ):
+	fileName = str( tmp_path / "video-es.mp4" )
+	data = os.urandom( size )
+	with open( fileName, "wb" ) as f:
+		f.write( data )
+	return fileName, data
+
+
+def test_single_put( tmp_path, standIn ):
+	s3 = standIn( StandInS3() )
+	fileName, data = writeFile( tmp_path, 3000 )
+
+	result = uploadFile( fileName, "bucket", "out/video-es.mp4", partSize=4096 )
+
+	assert result["parts"] == 1
+	assert s3.objects[( "bucket", "out/video-es.mp4" )] == data
+	assert s3.partCalls == 0
+
+
+def test_multipart_out_of_order( tmp_path, standIn ):
+	# the later parts finish first
+	s3 = standIn( StandInS3( partDelay=lambda partNumber: 0.01 * ( 10 - partNumber ) ) )
+	fileName, data = writeFile( tmp_path, 10 * 4096 - 100 )
+
+	result = uploadFile( fileName, "bucket", "video-es.mp4", partSize=4096, uploadJobs=10 )
+
+	assert result["parts"] == 10
+	assert s3.finished != sorted( s3.finished )
+	assert s3.objects[( "bucket", "video-es.mp4" )] == data
+	assert s3.aborted == []
+
+
+def test_multipart_retry( tmp_path, standIn ):
+	s3 = standIn( StandInS3( failParts={ 2: 2, 5: 1 } ) )
+	fileName, data = writeFile( tmp_path, 6 * 4096 )
+
+	result = uploadFile( fileName, "bucket", "video-es.mp4", partSize=4096, uploadJobs=3 )
+
+	assert result["parts"] == 6
+	assert s3.partCalls == 6 + 3
+	assert s3.objects[( "bucket", "video-es.mp4" )] == data
+
+
+def test_multipart_abort( tmp_path, standIn ):
+	# part 1 never goes through, and the others are slow, so most of them are still waiting when it gives up
+	s3 = standIn( StandInS3( failParts={ 1: -1 }, partDelay=lambda partNumber: 0.05 ) )
+	fileName, data = writeFile( tmp_path, 40 * 4096 )
+
+	with pytest.raises( Exception ):
+		uploadFile( fileName, "bucket", "video-es.mp4", partSize=4096, uploadJobs=2 )
+
+	assert len(s3.aborted) == 1
+	assert ( "bucket", "video-es.mp4" ) not in s3.objects
+	assert s3.partCalls < 40
@@ -23,12 +23,30 @@
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: use the shared clients from awsUtils
+#          10/17/2026: stream the items and text out of large transcripts
+#          10/17/2026: asyncio monitor for transcription jobs
+#          10/17/2026: pooled, streaming, compressed transcript download with retries
+#          10/17/2026: retry a download that comes up short of its Content-Length
+#          10/17/2026: one retry budget per download; leave a caller's file object open
+#          10/17/2026: keep a streamed transcript open until all of it is decoded
 #
 # ==================================================================================
 
 import boto3
+from awsUtils import *
 import uuid
 import requests
+import io
+import re
+import json
+import random
+import asyncio
+import datetime
+import os
+import time
+import threading
+import contextlib
 
 # ==================================================================================
 # Function: createTranscribeJob
@@ -41,8 +59,8 @@ import requests
 # ==================================================================================
 def createTranscribeJob( region, bucket, mediaFile, outbucket ):
 
-	# Set up the Transcribe client 
-	transcribe = boto3.client('transcribe')
+	# Get the shared Transcribe client 
+	transcribe = getClient('transcribe')
 	
 	# Set up the full uri for the bucket and media file
 	mediaUri = "https://" + "s3-" + region + ".amazonaws.com/" + bucket + mediaFile 
@@ -68,22 +86,483 @@ def createTranscribeJob( region, bucket, mediaFile, outbucket ):
 #                 jobName - the unique jobName used to start the Amazon Transcribe job
 # ==================================================================================
 def getTranscriptionJobStatus( jobName ):
-	transcribe = boto3.client('transcribe')
+	transcribe = getClient('transcribe')
 	
 	response = transcribe.get_transcription_job( TranscriptionJobName=jobName )
 	return response
 	
 	
+# ==================================================================================
+# Function: getPollDelay
+# Purpose: Helper function to return how long to wait before checking on a transcription job again.  Longer media takes
+#          longer to transcribe, so the first checks come at a fraction of its duration and then back off from there.
+#          A little jitter keeps many jobs from all being checked at the same moment
+# Parameters: 
+#                 mediaDuration - the length of the media in seconds, or None if it is not known
+#                 polls - the number of times the job has been checked so far
+#                 minDelay - the shortest time to wait, in seconds
+#                 maxDelay - the longest time to wait, in seconds
+# ==================================================================================
+def getPollDelay( mediaDuration, polls, minDelay=2, maxDelay=30 ):
+	if mediaDuration == None:
+		mediaDuration = 600
+	delay = min( maxDelay, max( minDelay, mediaDuration / 100 ) * ( 1.5 ** polls ) )
+	return delay * random.uniform( 0.8, 1.2 )
+
+
+# ==================================================================================
+# Function: monitorTranscriptionJobs
+# Purpose: Watch any number of transcription jobs at the same time and call onComplete for each one the moment it
+#          finishes, while the others keep being watched.  Returns, for each job, the final status, the number of
+#          checks it took and the lag in seconds between the job completing and us picking it up
+# Parameters: 
+#                 jobNames - the list of unique jobNames used to start the Amazon Transcribe jobs
+#                 onComplete - function (or coroutine function) called with the get_transcription_job response of each
+#                              finished job
+#                 mediaDurations - dictionary of the media length in seconds for each jobName, where known
+#                 minDelay - the shortest time to wait between checks, in seconds
+#                 maxDelay - the longest time to wait between checks, in seconds
+# ==================================================================================
+async def monitorTranscriptionJobs( jobNames, onComplete, mediaDurations=None, minDelay=2, maxDelay=30 ):
+	loop = asyncio.get_running_loop()
+	if mediaDurations == None:
+		mediaDurations = {}
+	results = {}
+
+	async def watch( jobName ):
+		polls = 0
+		while True:
+			# boto3 blocks, so the calls run on the default thread pool
+			response = await loop.run_in_executor( None, getTranscriptionJobStatus, jobName )
+			polls += 1
+			status = response["TranscriptionJob"]["TranscriptionJobStatus"]
+			if status == "COMPLETED" or status == "FAILED":
+				break
+			await asyncio.sleep( getPollDelay( mediaDurations.get( jobName ), polls, minDelay, maxDelay ) )
+
+		lag = None
+		if "CompletionTime" in response["TranscriptionJob"]:
+			completionTime = response["TranscriptionJob"]["CompletionTime"]
+			lag = ( datetime.datetime.now( completionTime.tzinfo ) - completionTime ).total_seconds()
+		results[jobName] = { "status": status, "polls": polls, "lag": lag }
+		print( "\n==> Transcription Job " + jobName + ": " + status + " after " + str(polls) + " checks" + \
+			( "" if lag == None else ", picked up " + "%.1f" % lag + " seconds after it completed" ) )
+
+		# start the downstream stages right away, without holding up the other jobs
+		if asyncio.iscoroutinefunction( onComplete ):
+			await onComplete( response )
+		else:
+			await loop.run_in_executor( None, onComplete, response )
+
+	await asyncio.gather( *[ watch( jobName ) for jobName in jobNames ] )
+	return results
+
+
+# ==================================================================================
+# Function: waitForTranscriptionJob
+# Purpose: Helper function that waits for a single transcription job to finish and returns its final
+#          get_transcription_job response
+# Parameters: 
+#                 jobName - the unique jobName used to start the Amazon Transcribe job
+#                 mediaDuration - the length of the media in seconds, or None if it is not known
+# ==================================================================================
+def waitForTranscriptionJob( jobName, mediaDuration=None ):
+	responses = []
+	asyncio.run( monitorTranscriptionJobs( [ jobName ], responses.append, { jobName: mediaDuration } ) )
+	return responses[0]
+	
+	
+# The number of connections the transcript session keeps open, and how long to wait for the server (connect, read)
+DOWNLOAD_POOL_CONNECTIONS = 10
+DOWNLOAD_TIMEOUT = ( 10, 60 )
+
+# The HTTP statuses worth retrying.  Anything else (e.g. 403 for an expired signed URI) fails straight away
+RETRY_STATUSES = [ 429, 500, 502, 503, 504 ]
+
+downloadLock = threading.Lock()
+downloadSessions = {}
+downloadStats = { "downloads": 0, "bytes": 0, "decodedBytes": 0, "seconds": 0.0, "firstByteSeconds": 0.0, "retries": 0 }
+
+
+# ==================================================================================
+# Function: getDownloadSession
+# Purpose: Return the shared requests session used to download transcripts, creating it the first time it is asked for,
+#          so downloads reuse its pool of connections.  Worker processes get their own session
+# Parameters: 
+#                 None
+# ==================================================================================
+def getDownloadSession():
+	with downloadLock:
+		session = downloadSessions.get( os.getpid() )
+		if session == None:
+			session = requests.Session()
+			adapter = requests.adapters.HTTPAdapter( pool_connections=DOWNLOAD_POOL_CONNECTIONS, pool_maxsize=DOWNLOAD_POOL_CONNECTIONS )
+			session.mount( "https://", adapter )
+			session.mount( "http://", adapter )
+			session.headers.update( { "Accept-Encoding": "gzip, deflate" } )
+			downloadSessions[os.getpid()] = session
+		return session
+
+
+# ==================================================================================
+# Function: sendTranscriptRequest
+# Purpose: Send the GET for a transcript on the shared session, once, and return the streaming response once its
+#          headers are in.  A status in RETRY_STATUSES is raised as a RetryError so the callers can retry it along with
+#          connection errors and timeouts
+# Parameters: 
+#                 transcriptURI - the signed S3 URI for the Transcribe output
+# ==================================================================================
+def sendTranscriptRequest( transcriptURI ):
+	response = getDownloadSession().get( transcriptURI, stream=True, timeout=DOWNLOAD_TIMEOUT )
+	if response.status_code in RETRY_STATUSES:
+		response.close()
+		raise requests.exceptions.RetryError( "HTTP " + str(response.status_code) )
+	response.raise_for_status()
+	return response
+
+
+# ==================================================================================
+# Function: requestTranscript
+# Purpose: Send the GET for a transcript and return the streaming response once its headers are in.  Connection
+#          errors, timeouts and the statuses in RETRY_STATUSES are retried with backoff
+# Parameters: 
+#                 transcriptURI - the signed S3 URI for the Transcribe output
+#                 maxAttempts - the number of times the request is sent before giving up
+# ==================================================================================
+def requestTranscript( transcriptURI, maxAttempts=5 ):
+	attempt = 1
+	while True:
+		try:
+			return sendTranscriptRequest( transcriptURI )
+		except ( requests.exceptions.RetryError, requests.exceptions.ConnectionError, requests.exceptions.Timeout ) as e:
+			if attempt >= maxAttempts:
+				raise
+			retryDownload( attempt, str(e) )
+			attempt += 1
+
+
+# ==================================================================================
+# Function: retryDownload
+# Purpose: Count a retry and wait before the next attempt, backing off with a little jitter
+# Parameters: 
+#                 attempt - the number of the attempt that failed
+#                 error - what went wrong, for the message
+# ==================================================================================
+def retryDownload( attempt, error ):
+	delay = ( 2 ** attempt ) * 0.25 + random.uniform( 0, 0.5 )
+	print( "\t==> Transcript download failed (" + error + "), retrying in " + "%.1f" % delay + " seconds" )
+	with downloadLock:
+		downloadStats["retries"] += 1
+	time.sleep( delay )
+
+
+# ==================================================================================
+# Function: recordDownload
+# Purpose: Add a finished download to the counters returned by getDownloadStats
+# Parameters: 
+#                 wireBytes - the bytes that came over the connection (compressed, if the server compressed them)
+#                 decodedBytes - the bytes of the transcript once decompressed, or None if not known
+#                 seconds - how long the download took, from sending the request to the last byte
+#                 firstByteSeconds - how long it took for the response headers to come back
+# ==================================================================================
+def recordDownload( wireBytes, decodedBytes, seconds, firstByteSeconds ):
+	with downloadLock:
+		downloadStats["downloads"] += 1
+		downloadStats["bytes"] += wireBytes
+		downloadStats["decodedBytes"] += decodedBytes if decodedBytes != None else wireBytes
+		downloadStats["seconds"] += seconds
+		downloadStats["firstByteSeconds"] += firstByteSeconds
+
+
+# ==================================================================================
+# Function: downloadTranscript
+# Purpose: Stream a transcript straight to a file, decompressing it on the way if the server sent it compressed.  The
+#          file is written under a temporary name and renamed, and a download that breaks off part way is started
+#          again, as is one that comes up short of its Content-Length or whose request fails.  The request and the
+#          body share one count of attempts.  Returns the bytes over the wire, the bytes written, the seconds taken and
+#          the seconds to the first byte
+# Parameters: 
+#                 transcriptURI - the signed S3 URI for the Transcribe output
+#                 transcriptFileName - the file to write the transcript to (e.g. "transcript.json")
+#                 maxAttempts - the number of requests sent before giving up
+#                 chunkSize - the number of bytes written at a time
+# ==================================================================================
+def downloadTranscript( transcriptURI, transcriptFileName, maxAttempts=5, chunkSize=1 << 16 ):
+	tempFileName = transcriptFileName + ".tmp"
+	attempt = 1
+	while True:
+		started = time.time()
+		response = None
+		decodedBytes = 0
+		try:
+			response = sendTranscriptRequest( transcriptURI )
+			firstByte = time.time() - started
+			with open( tempFileName, "wb" ) as f:
+				for chunk in response.iter_content( chunk_size=chunkSize ):
+					f.write( chunk )
+					decodedBytes += len(chunk)
+			wireBytes = response.raw.tell()
+
+			# a connection that closes early doesn't always raise an error, so check the length as well
+			expectedBytes = response.headers.get( "Content-Length" )
+			if expectedBytes != None and wireBytes != int( expectedBytes ):
+				raise requests.exceptions.ChunkedEncodingError( "the download ended after " + str(wireBytes) + " of " + expectedBytes + " bytes" )
+			break
+		except ( requests.exceptions.RetryError, requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError, \
+			requests.exceptions.ConnectionError, requests.exceptions.Timeout ) as e:
+			if attempt >= maxAttempts:
+				raise
+			retryDownload( attempt, str(e) )
+			attempt += 1
+		finally:
+			if response != None:
+				response.close()
+
+	os.replace( tempFileName, transcriptFileName )
+	seconds = time.time() - started
+	recordDownload( wireBytes, decodedBytes, seconds, firstByte )
+	print( "\t==> Downloaded the transcript to " + transcriptFileName + ": " + str(wireBytes) + " bytes over the wire, " + \
+		str(decodedBytes) + " bytes decoded, in " + "%.2f" % seconds + " seconds (first byte after " + "%.2f" % firstByte + ")" )
+	return { "bytes": wireBytes, "decodedBytes": decodedBytes, "seconds": seconds, "firstByteSeconds": firstByte }
+
+
+# ==================================================================================
+# Function: streamTranscript
+# Purpose: Context manager that opens a transcript URI as a text stream, decompressed as it is read, so it can go
+#          straight into iterJSONArray without being saved or held as a string.  Only the request itself is retried;
+#          the download is recorded when the stream is closed
+# Parameters: 
+#                 transcriptURI - the signed S3 URI for the Transcribe output
+#                 maxAttempts - the number of times the request is sent before giving up
+# ==================================================================================
+@contextlib.contextmanager
+def streamTranscript( transcriptURI, maxAttempts=5 ):
+	started = time.time()
+	response = requestTranscript( transcriptURI, maxAttempts )
+	firstByte = time.time() - started
+	try:
+		# urllib3 closes the response once the last byte is in, which would cut off the text still being decoded
+		response.raw.decode_content = True
+		response.raw.auto_close = False
+		yield io.TextIOWrapper( response.raw, encoding="utf-8" )
+	finally:
+		recordDownload( response.raw.tell(), None, time.time() - started, firstByte )
+		response.close()
+
+
 # ==================================================================================
 # Function: getTranscript
-# Purpose: Helper function to return the transcript based on the signed URI in S3 as produced by the Transcript job
+# Purpose: Helper function to return the transcript based on the signed URI in S3 as produced by the Transcript job.
+#          Prefer downloadTranscript or streamTranscript for long transcripts, which never hold the whole text
 # Parameters: 
 #                 transcriptURI - the signed S3 URI for the Transcribe output
 # ==================================================================================
 def getTranscript( transcriptURI ):
-	# Get the resulting Transcription Job and store the JSON response in transcript
-	result = requests.get( transcriptURI )
+	with streamTranscript( transcriptURI ) as f:
+		return f.read()
+
+
+# ==================================================================================
+# Function: getDownloadStats
+# Purpose: Return the transcript download counters: downloads, bytes over the wire and decoded, seconds, seconds to the
+#          first byte and retries
+# Parameters: 
+#                 None
+# ==================================================================================
+def getDownloadStats():
+	with downloadLock:
+		return dict( downloadStats )
+
+
+# ==================================================================================
+# Function: printDownloadStats
+# Purpose: Print the counters returned by getDownloadStats
+# Parameters: 
+#                 None
+# ==================================================================================
+def printDownloadStats():
+	stats = getDownloadStats()
+	if stats["downloads"] == 0:
+		return
+	print( "\t==> Transcript downloads: " + str(stats["downloads"]) + ", " + str(stats["bytes"]) + " bytes over the wire (" + \
+		str(stats["decodedBytes"]) + " decoded), " + "%.2f" % ( stats["seconds"] / stats["downloads"] ) + " seconds each, first byte after " + \
+		"%.2f" % ( stats["firstByteSeconds"] / stats["downloads"] ) + " seconds, " + str(stats["retries"]) + " retries" )
+
+
+# ==================================================================================
+# Function: openTranscript
+# Purpose: Helper function to open a transcript for streaming.  The transcript can be the JSON text itself (as returned
+#          by getTranscript), the name of a file holding it, a URI to stream it from, or a file object that is already open.
+#          A file object belongs to the caller, so it is handed back in a context that leaves it open
+# Parameters: 
+#                 transcript - the JSON output from Amazon Transcribe, a file name, a URI, or a file object
+# ==================================================================================
+def openTranscript( transcript ):
+	if not isinstance( transcript, str ):
+		return contextlib.nullcontext( transcript )
+	if transcript.startswith( "https://" ) or transcript.startswith( "http://" ):
+		return streamTranscript( transcript )
+	if transcript.lstrip().startswith( "{" ):
+		return io.StringIO( transcript )
+	return open( transcript, "r", encoding="utf-8" )
+
+
+# ==================================================================================
+# Function: iterTranscriptItems
+# Purpose: Generator that returns the entries of results.items from a transcript one at a time, without ever loading
+#          the whole document, so memory stays flat however long the meeting is
+# Parameters: 
+#                 transcript - the JSON output from Amazon Transcribe, a file name, a URI, or a file object
+# ==================================================================================
+def iterTranscriptItems( transcript ):
+	with openTranscript( transcript ) as f:
+		for item in iterJSONArray( f, [ "results", "items" ] ):
+			yield item
+
+
+# ==================================================================================
+# Function: getTranscriptText
+# Purpose: Helper function to return the full text of a transcript (results.transcripts[0].transcript), streaming past
+#          the rest of the document
+# Parameters: 
+#                 transcript - the JSON output from Amazon Transcribe, a file name, a URI, or a file object
+# ==================================================================================
+def getTranscriptText( transcript ):
+	with openTranscript( transcript ) as f:
+		for entry in iterJSONArray( f, [ "results", "transcripts" ] ):
+			return entry["transcript"]
+	return ""
+
+
+# ==================================================================================
+# Function: iterJSONArray
+# Purpose: Generator that incrementally reads a JSON document and returns, one at a time, the entries of the array found
+#          by following the keys in path from the top level object (e.g. ["results", "items"]).  Everything else in the
+#          document is scanned past without being decoded, and only one entry is held in memory at a time
+# Parameters: 
+#                 f - the file object to read the JSON document from
+#                 path - the list of object keys that lead to the array
+#                 chunkSize - the number of characters to read from the file at a time
+# ==================================================================================
+def iterJSONArray( f, path, chunkSize=1 << 16 ):
+	decoder = json.JSONDecoder()
+	scalarEnd = re.compile( r'[\s,\]}]' )
+	state = { "buf": "", "pos": 0, "eof": False }
+
+	# read more of the file, dropping what has already been consumed.  Returns False at the end of the file
+	def fill( size=chunkSize ):
+		if state["eof"]:
+			return False
+		data = f.read( size )
+		if len(data) == 0:
+			state["eof"] = True
+			return False
+		state["buf"] = state["buf"][state["pos"]:] + data
+		state["pos"] = 0
+		return True
+
+	# return the next character that isn't white space, without consuming it
+	def peek():
+		while True:
+			buf = state["buf"]
+			pos = state["pos"]
+			while pos < len(buf) and buf[pos] in " \t\r\n":
+				pos += 1
+			state["pos"] = pos
+			if pos < len(buf):
+				return buf[pos]
+			if not fill():
+				raise ValueError( "Unexpected end of JSON document" )
+
+	def expect( c ):
+		if peek() != c:
+			raise ValueError( "Expected '" + c + "' at '" + state["buf"][state["pos"]:state["pos"] + 20] + "'" )
+		state["pos"] += 1
+
+	# decode one complete value.  Large values are read in growing pieces so decoding them stays linear
+	def decode():
+		# numbers, true, false and null may be cut short at the end of the buffer, so read on until they are followed
+		# by something
+		if peek() not in '{["':
+			while scalarEnd.search( state["buf"], state["pos"] ) == None and fill():
+				pass
+		size = chunkSize
+		while True:
+			try:
+				value, end = decoder.raw_decode( state["buf"], state["pos"] )
+				if end < len(state["buf"]) or state["eof"]:
+					state["pos"] = end
+					return value
+			except json.JSONDecodeError:
+				if state["eof"]:
+					raise
+			fill( size )
+			size *= 2
+
+	# move past the closing quote of the string that starts at the current position
+	def skipString():
+		state["pos"] += 1
+		while True:
+			buf = state["buf"]
+			end = buf.find( '"', state["pos"] )
+			if end < 0:
+				# keep any trailing backslashes so an escaped quote on the next read is still seen as escaped
+				state["pos"] = len(buf.rstrip( "\\" ))
+				if not fill():
+					raise ValueError( "Unterminated string in JSON document" )
+				continue
+			backslashes = 0
+			while end - 1 - backslashes >= state["pos"] and buf[end - 1 - backslashes] == "\\":
+				backslashes += 1
+			state["pos"] = end + 1
+			if backslashes % 2 == 0:
+				return
+
+	# move past one value of any kind without decoding it
+	def skipValue():
+		c = peek()
+		if c == '"':
+			skipString()
+		elif c == "{" or c == "[":
+			depth = 0
+			while True:
+				c = peek()
+				if c == '"':
+					skipString()
+					continue
+				state["pos"] += 1
+				if c == "{" or c == "[":
+					depth += 1
+				elif c == "}" or c == "]":
+					depth -= 1
+					if depth == 0:
+						return
+		else:
+			decode()
 
-	return result.text
+	# walk down the path of keys
+	for depth, key in enumerate( path ):
+		expect( "{" )
+		while True:
+			if peek() == "}":
+				return
+			name = decode()
+			expect( ":" )
+			if name == key:
+				break
+			skipValue()
+			if peek() == ",":
+				state["pos"] += 1
 
-	
\ No newline at end of file
+	# and return the entries of the array found there
+	expect( "[" )
+	if peek() == "]":
+		return
+	while True:
+		yield decode()
+		c = peek()
+		state["pos"] += 1
+		if c == "]":
+			return
+		if c != ",":
+			raise ValueError( "Expected ',' or ']' in JSON array" )
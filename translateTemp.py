@@ -25,6 +25,8 @@
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: -jobs to process the target languages in parallel worker processes
+#          10/17/2026: pass the transcript file name rather than a re-serialized copy of it
 #
 # ==================================================================================
 
@@ -38,6 +40,7 @@ import time
 from videoUtils import *
 from audioUtils import *
 import json
+from pipelineUtils import *
 
 # Get the command line arguments and parse them
 parser = argparse.ArgumentParser( prog='translatevideo.py', description='Process a video found in the input file, process it, and write tit out to the output file')
@@ -48,37 +51,37 @@ parser.add_argument('-outbucket', required=True, help='The S3 bucket containing
 parser.add_argument('-outfilename', required=True, help='The file name without the extension')
 parser.add_argument('-outfiletype', required=True, help='The output file type.  E.g. mp4, mov')
 parser.add_argument('-outlang', required=True, nargs='+', help='The language codes for the desired output.  E.g. en = English, de = German')		
-args = parser.parse_args()
+parser.add_argument('-jobs', type=int, default=1, help='The number of target languages to process at the same time, each in its own process')
 
-# print out parameters and key header information for the user
-print( "==> translatevideo.py:\n")
-print( "==> Parameters: ")
-print("\tInput bucket/object: " + args.inbucket + args.infile )
-print( "\tOutput bucket/object: " + args.outbucket + args.outfilename + "." + args.outfiletype )
+# The worker processes started for -jobs import this module, so only run the pipeline from the main process
+if __name__ == "__main__":
+	args = parser.parse_args()
 
-print( "\n==> Target Language Translation Output: " )
+	# print out parameters and key header information for the user
+	print( "==> translatevideo.py:\n")
+	print( "==> Parameters: ")
+	print("\tInput bucket/object: " + args.inbucket + args.infile )
+	print( "\tOutput bucket/object: " + args.outbucket + args.outfilename + "." + args.outfiletype )
 
-for lang in args.outlang:
-	print( "\t" + args.outbucket + args.outfilename + "-" + lang + "." + args.outfiletype)
-	
-# Now get the transcript JSON from AWS Transcribe
+	print( "\n==> Target Language Translation Output: " )
 
-with open('CC-Budget-Worksession-111318-Transcript.json', 'r') as f:
-  transcriptJSON = json.load(f)
-#print( "\n==> Transcript: \n" + transcript)
+	for lang in args.outlang:
+		print( "\t" + args.outbucket + args.outfilename + "-" + lang + "." + args.outfiletype)
+		
+	# Now get the transcript JSON from AWS Transcribe
 
-# Create the SRT File for the original transcript and write it out.  
-#writeTranscriptToSRT( transcript, 'en', "subtitles-en.srt" )  
-#createVideo( args.infile, "subtitles-en.srt", args.outfilename + "-en." + args.outfiletype, "audio-en.mp3", True)
+	# the utils stream the transcript straight from the file, so there is no need to load it here
+	transcript = 'CC-Budget-Worksession-111318-Transcript.json'
+	#print( "\n==> Transcript: \n" + transcript)
 
-# Now write out the translation to the transcript for each of the target languages
-for lang in args.outlang:
-	#writeTranslationToSRT(json.dumps(transcriptJSON), 'en', lang, "subtitles-" + lang + ".srt", args.region ) 	
-	translation = translateTranscript( json.dumps(transcriptJSON), 'en', lang, args.region )
-	mapTranslationAndWriteToSRT(translation, "subtitles-en.srt", lang, args.region, "subtitles-" + lang + ".srt")
+	# Create the SRT File for the original transcript and write it out.  
+	#writeTranscriptToSRT( transcript, 'en', "subtitles-en.srt" )  
+	#createVideo( args.infile, "subtitles-en.srt", args.outfilename + "-en." + args.outfiletype, "audio-en.mp3", True)
 
-	#Now that we have the subtitle files, let's create the audio track
-	#createAudioTrackFromTranslation( args.region, json.dumps(transcriptJSON), 'en', lang, "audio-" + lang + ".mp3" )
+	# Now write out the translation to the transcript for each of the target languages, args.jobs of them at a time.
+	# Only the translation and the SRT are produced here; flip createAudio/renderVideo to run the remaining stages
+	runLanguages( args.outlang, args.jobs, transcript, args.region, args.infile, args.outfilename, args.outfiletype, \
+		createAudio=False, renderVideo=False )
 
 	# Finally, create the composited videos
 	#subtitles only
@@ -86,10 +89,3 @@ for lang in args.outlang:
 	#english subtitles and other lang voiceover
 	#if lang != 'en':
 	#	createVideoVoiceOverOnly( args.infile[0:-4] + "-ac-subtitles-en.mp4", "subtitles-en.srt", args.outfilename + "-voiceover-" + lang + "." + args.outfiletype, "audio-" + lang + ".mp3", False)
-
-	
-	
-	
-
-
-	
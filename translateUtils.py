@@ -0,0 +1,378 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# translateUtils.py
+#
+# Purpose: The program provides a number of utility functions for leveraging the Amazon Translate API
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: on-disk translation cache
+#          10/17/2026: use the shared clients from awsUtils
+#          10/17/2026: cache each sentence or cue on its own with translatePieces, in a cache file that doesn't move with the cwd
+#
+# ==================================================================================
+
+import os
+import re
+import time
+import random
+import sqlite3
+import hashlib
+import concurrent.futures
+from awsUtils import *
+
+# Amazon Translate rejects any request whose text is larger than this many UTF-8 bytes
+MAX_TRANSLATE_BYTES = 5000
+
+# Translations are kept on disk so that reruns and repeated text don't call Amazon Translate again.  Once the
+# cached translations add up to more than TRANSLATION_CACHE_MAX_BYTES the least recently used ones are dropped.  The
+# file sits next to this module so that every video of a batch shares it, whichever working directory it runs in
+TRANSLATION_CACHE_FILE = os.path.join( os.path.dirname( os.path.abspath( __file__ ) ), "translationCache.sqlite" )
+TRANSLATION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# hits, misses and evictions for the translation cache since this process started
+translationCacheStats = { "hits": 0, "misses": 0, "evictions": 0 }
+
+
+# ==================================================================================
+# Function: translatePieces
+# Purpose: Translate a list of pieces of text (sentences, SRT cues, ...) and return the translation of each piece in
+#          the same order.  Each piece is looked up in the cache on its own, so a sentence or cue that was translated
+#          before is found again however it was packed.  The rest are packed one piece per line into as few Translate
+#          requests as will hold them, and the lines of each translated request are handed back to their pieces.  If
+#          Translate doesn't keep the lines of a request, the whole request is given to its first piece and its pieces
+#          are left out of the cache
+# Parameters:
+#                 pieces - the list of strings to translate
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+#                 region - the AWS region in which to run the Translation (e.g. "us-east-1")
+#                 maxWorkers - the maximum number of Translate requests in flight at the same time
+#                 maxAttempts - the number of times a request is sent before giving up on it
+#                 cacheFileName - the SQLite file holding previous translations, or None to always call Amazon Translate
+#                 maxBytes - the largest request to build, in UTF-8 bytes
+# ==================================================================================
+def translatePieces( pieces, sourceLangCode, targetLangCode, region, maxWorkers=8, maxAttempts=4, cacheFileName=TRANSLATION_CACHE_FILE, \
+	maxBytes=MAX_TRANSLATE_BYTES ):
+
+	# a line break marks the end of a piece, so the pieces are sent on one line each
+	pieces = [ " ".join( piece.split() ) for piece in pieces ]
+
+	# Look up the pieces we have already translated, only the rest go to Amazon Translate
+	cache = None
+	translatedPieces = [ None ] * len(pieces)
+	if cacheFileName != None:
+		cache = openTranslationCache( cacheFileName )
+		translatedPieces = lookupTranslations( cache, pieces, sourceLangCode, targetLangCode )
+	# the same text only needs to be translated once, however many times it shows up, and empty text not at all
+	missing = list( dict.fromkeys( pieces[i] for i in range(len(pieces)) if translatedPieces[i] == None and len(pieces[i]) > 0 ) )
+
+	print( "\t==> Translating " + str(len(missing)) + " of " + str(len(pieces)) + " pieces from " + sourceLangCode + " to " + targetLangCode )
+
+	results = {}
+	if len(missing) > 0:
+		# the piece each line of the requests belongs to.  A piece too big for one request is sent as several lines
+		owners = [ piece for piece in missing for part in splitOversized( piece, maxBytes ) ]
+		chunks = packChunks( missing, maxBytes, separator="\n" )
+		translatedChunks = translateChunks( chunks, sourceLangCode, targetLangCode, region, maxWorkers, maxAttempts )
+
+		parts = { piece: [] for piece in missing }
+		unsure = set()
+		line = 0
+		for chunk, translatedChunk in zip( chunks, translatedChunks ):
+			chunkOwners = owners[line:line + chunk.count( "\n" ) + 1]
+			line += len(chunkOwners)
+			translatedLines = [ translatedLine.strip() for translatedLine in translatedChunk.split( "\n" ) ]
+			if len(translatedLines) == len(chunkOwners):
+				for owner, translatedLine in zip( chunkOwners, translatedLines ):
+					parts[owner].append( translatedLine )
+			else:
+				parts[chunkOwners[0]].append( " ".join( translatedChunk.split() ) )
+				unsure.update( chunkOwners )
+		results = { piece: " ".join( part for part in parts[piece] if len(part) > 0 ) for piece in missing }
+
+		if cache != None:
+			storeTranslations( cache, [ ( piece, results[piece] ) for piece in missing if piece not in unsure ], sourceLangCode, targetLangCode )
+		if len(unsure) > 0:
+			print( "\t==> Translate didn't keep the lines of " + str(len(unsure)) + " pieces, they are not cached" )
+
+	for i in range(len(pieces)):
+		if translatedPieces[i] == None:
+			translatedPieces[i] = results.get( pieces[i], pieces[i] )
+
+	if cache != None:
+		cache.close()
+		print( "\t==> Translation cache: " + str(translationCacheStats["hits"]) + " hits, " + str(translationCacheStats["misses"]) + \
+			" misses, " + str(translationCacheStats["evictions"]) + " evictions" )
+
+	return translatedPieces
+
+
+# ==================================================================================
+# Function: translateChunks
+# Purpose: Translate a list of text chunks with Amazon Translate, several chunks at a time, and return the
+#          translated chunks in the same order as the input.  Each chunk is retried on its own if it fails
+# Parameters:
+#                 chunks - the list of strings to translate.  Each one must fit in a single Translate request
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+#                 region - the AWS region in which to run the Translation (e.g. "us-east-1")
+#                 maxWorkers - the maximum number of Translate requests in flight at the same time
+#                 maxAttempts - the number of times a chunk is sent before giving up on it
+# ==================================================================================
+def translateChunks( chunks, sourceLangCode, targetLangCode, region, maxWorkers=8, maxAttempts=4 ):
+
+	# the same text only needs to be translated once, however many times it shows up
+	missing = list( dict.fromkeys( chunks ) )
+	if len(missing) == 0:
+		return []
+
+	#get the shared Amazon Translate client.  boto3 clients are safe to share between threads
+	translate = getClient( 'translate', region )
+
+	# map hands back the results in the order of the chunks no matter which request finishes first
+	with concurrent.futures.ThreadPoolExecutor( max_workers=maxWorkers ) as pool:
+		results = dict( zip( missing, pool.map( lambda chunk: translateChunk( translate, chunk, sourceLangCode, targetLangCode, maxAttempts ), missing ) ) )
+
+	return [ results[chunk] for chunk in chunks ]
+
+
+# ==================================================================================
+# Function: translateChunk
+# Purpose: Translate a single chunk of text, backing off and retrying if the call fails
+# Parameters:
+#                 translate - the Amazon Translate client
+#                 chunk - the text to translate
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+#                 maxAttempts - the number of times the chunk is sent before giving up on it
+# ==================================================================================
+def translateChunk( translate, chunk, sourceLangCode, targetLangCode, maxAttempts=4 ):
+
+	# Translate rejects empty text, and there is nothing to translate anyway
+	if len(chunk.strip()) == 0:
+		return chunk
+
+	attempt = 1
+	while True:
+		try:
+			response = translate.translate_text(Text=chunk, SourceLanguageCode=sourceLangCode, TargetLanguageCode=targetLangCode)
+			return response["TranslatedText"]
+		except Exception as error:
+			if attempt >= maxAttempts:
+				raise
+			# exponential backoff with jitter so throttled requests don't all come back at the same time
+			delay = ( 2 ** attempt ) * 0.25 + random.uniform( 0, 0.5 )
+			print( "\t==> Translate failed (" + str(error) + "), retrying in " + "%.1f" % delay + " seconds" )
+			time.sleep( delay )
+			attempt += 1
+
+
+# ==================================================================================
+# Function: splitSentences
+# Purpose: Split a block of text into sentences, keeping the punctuation with the sentence it ends
+# Parameters:
+#                 text - the text to split (e.g. the transcript from Amazon Transcribe)
+# ==================================================================================
+def splitSentences( text ):
+	return [ sentence for sentence in re.split( r'(?<=[.?!])\s+', text.strip() ) if len(sentence) > 0 ]
+
+
+# ==================================================================================
+# Function: packChunks
+# Purpose: Pack pieces of text (sentences, SRT phrases, ...) into as few Translate requests as possible.  Pieces are
+#          never split across requests unless a single piece is larger than a whole request on its own, and every
+#          request is kept at or under maxBytes of UTF-8
+# Parameters:
+#                 pieces - the list of strings to pack, in order
+#                 maxBytes - the largest request to build, in UTF-8 bytes
+#                 separator - the string used to join the pieces that share a request
+# ==================================================================================
+def packChunks( pieces, maxBytes=MAX_TRANSLATE_BYTES, separator=" " ):
+	separatorBytes = len( separator.encode("utf-8") )
+
+	chunks = []
+	current = []
+	currentBytes = 0
+	for piece in pieces:
+		for part in splitOversized( piece, maxBytes ):
+			partBytes = len( part.encode("utf-8") )
+
+			# start a new request when this part would push the current one over the limit
+			if len(current) > 0 and currentBytes + separatorBytes + partBytes > maxBytes:
+				chunks.append( separator.join(current) )
+				current = []
+				currentBytes = 0
+
+			if len(current) > 0:
+				currentBytes += separatorBytes
+			current.append( part )
+			currentBytes += partBytes
+
+	if len(current) > 0:
+		chunks.append( separator.join(current) )
+
+	requests, fillRatio = getPackStats( chunks, maxBytes )
+	print( "\t==> Packed " + str(len(pieces)) + " pieces into " + str(requests) + " requests (" + "%.1f" % (fillRatio * 100) + "% full)" )
+	return chunks
+
+
+# ==================================================================================
+# Function: getPackStats
+# Purpose: Return the number of requests and how full they are on average compared to the limit
+# Parameters:
+#                 chunks - the list of packed strings returned by packChunks
+#                 maxBytes - the largest request size, in UTF-8 bytes
+# ==================================================================================
+def getPackStats( chunks, maxBytes=MAX_TRANSLATE_BYTES ):
+	if len(chunks) == 0:
+		return 0, 0.0
+	totalBytes = sum( len( chunk.encode("utf-8") ) for chunk in chunks )
+	return len(chunks), totalBytes / ( len(chunks) * maxBytes )
+
+
+# ==================================================================================
+# Function: splitOversized
+# Purpose: Return the piece as a list of parts that each fit in maxBytes.  Pieces are split between words, and a
+#          single word that is still too large is cut between UTF-8 characters, never in the middle of one
+# Parameters:
+#                 piece - the string to split
+#                 maxBytes - the largest part to return, in UTF-8 bytes
+# ==================================================================================
+def splitOversized( piece, maxBytes ):
+	if len( piece.encode("utf-8") ) <= maxBytes:
+		return [ piece ]
+
+	parts = []
+	current = ""
+	for word in piece.split():
+		while len( word.encode("utf-8") ) > maxBytes:
+			if len(current) > 0:
+				parts.append( current )
+				current = ""
+			head, word = splitBytes( word, maxBytes )
+			parts.append( head )
+
+		candidate = word if len(current) == 0 else current + " " + word
+		if len( candidate.encode("utf-8") ) > maxBytes:
+			parts.append( current )
+			current = word
+		else:
+			current = candidate
+
+	if len(current) > 0:
+		parts.append( current )
+	return parts
+
+
+# ==================================================================================
+# Function: splitBytes
+# Purpose: Cut a string into a head of at most maxBytes of UTF-8 and the remaining tail, on a character boundary
+# Parameters:
+#                 text - the string to cut
+#                 maxBytes - the largest head to return, in UTF-8 bytes
+# ==================================================================================
+def splitBytes( text, maxBytes ):
+	encoded = text.encode("utf-8")
+	cut = maxBytes
+	# UTF-8 continuation bytes look like 10xxxxxx; back up until the cut lands on the start of a character
+	while cut > 0 and ( encoded[cut] & 0xC0 ) == 0x80:
+		cut -= 1
+	return encoded[:cut].decode("utf-8"), encoded[cut:].decode("utf-8")
+
+
+# ==================================================================================
+# Function: openTranslationCache
+# Purpose: Open (and create if needed) the SQLite translation cache and return the connection
+# Parameters:
+#                 cacheFileName - the SQLite file holding previous translations
+# ==================================================================================
+def openTranslationCache( cacheFileName=TRANSLATION_CACHE_FILE ):
+	# several language worker processes can share the file, so wait on their writes rather than failing
+	cache = sqlite3.connect( cacheFileName, timeout=60 )
+	cache.execute( "CREATE TABLE IF NOT EXISTS translations ( key TEXT PRIMARY KEY, source_lang TEXT, target_lang TEXT, " + \
+		"translated TEXT, bytes INTEGER, last_used REAL )" )
+	cache.execute( "CREATE INDEX IF NOT EXISTS translations_last_used ON translations ( last_used )" )
+	cache.commit()
+	return cache
+
+
+# ==================================================================================
+# Function: getTranslationKey
+# Purpose: Return the cache key for a piece of text: a hash of the language pair and the text itself
+# Parameters:
+#                 text - the text to translate
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+# ==================================================================================
+def getTranslationKey( text, sourceLangCode, targetLangCode ):
+	return hashlib.sha256( (sourceLangCode + "\0" + targetLangCode + "\0" + text).encode("utf-8") ).hexdigest()
+
+
+# ==================================================================================
+# Function: lookupTranslations
+# Purpose: Return the cached translation of each piece of text, or None for the pieces that are not in the cache
+# Parameters:
+#                 cache - the connection returned by openTranslationCache
+#                 chunks - the list of strings to look up
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+# ==================================================================================
+def lookupTranslations( cache, chunks, sourceLangCode, targetLangCode ):
+	now = time.time()
+	translatedChunks = []
+	for chunk in chunks:
+		key = getTranslationKey( chunk, sourceLangCode, targetLangCode )
+		row = cache.execute( "SELECT translated FROM translations WHERE key = ?", (key,) ).fetchone()
+		if row == None:
+			translationCacheStats["misses"] += 1
+			translatedChunks.append( None )
+		else:
+			translationCacheStats["hits"] += 1
+			cache.execute( "UPDATE translations SET last_used = ? WHERE key = ?", (now, key) )
+			translatedChunks.append( row[0] )
+	cache.commit()
+	return translatedChunks
+
+
+# ==================================================================================
+# Function: storeTranslations
+# Purpose: Save new translations in the cache, then drop the least recently used ones if the cache is over its size
+# Parameters:
+#                 cache - the connection returned by openTranslationCache
+#                 pairs - the list of (original text, translated text) tuples to save
+#                 sourceLangCode - the language code for the original content (e.g. English = "en")
+#                 targetLangCode - the language code for the translated content (e.g. Spanish = "es")
+#                 maxBytes - the size the cached translations are trimmed back to
+# ==================================================================================
+def storeTranslations( cache, pairs, sourceLangCode, targetLangCode, maxBytes=TRANSLATION_CACHE_MAX_BYTES ):
+	now = time.time()
+	for text, translated in pairs:
+		cache.execute( "INSERT OR REPLACE INTO translations VALUES ( ?, ?, ?, ?, ?, ? )", \
+			( getTranslationKey( text, sourceLangCode, targetLangCode ), sourceLangCode, targetLangCode, translated, \
+			len( translated.encode("utf-8") ), now ) )
+
+	total = cache.execute( "SELECT COALESCE( SUM(bytes), 0 ) FROM translations" ).fetchone()[0]
+	if total > maxBytes:
+		for key, size in cache.execute( "SELECT key, bytes FROM translations ORDER BY last_used" ).fetchall():
+			if total <= maxBytes:
+				break
+			cache.execute( "DELETE FROM translations WHERE key = ?", (key,) )
+			translationCacheStats["evictions"] += 1
+			total -= size
+	cache.commit()
@@ -0,0 +1,85 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# translatebatch.py
+#
+# Purpose: This code drives translatevideo.py's process for a whole backlog of videos listed in a JSONL manifest,
+#          one video per line:
+#              {"inbucket": "mybucket/", "infile": "meeting.mp4", "outlangs": ["es", "ru"], "outfiletype": "mp4"}
+#          Transcription jobs and language renders each have their own limit, so later videos are transcribed while
+#          earlier ones render.  A status and timing report for every video is written at the end
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: -backend to burn the subtitles in with ffmpeg
+#          10/17/2026: -profile and -sizetarget to choose the encoding profile
+#          10/17/2026: -subtitles soft to add the subtitles as tracks instead of burning them in
+#          10/17/2026: -dubbing to choose between the cue timeline and the old back to back audio track
+#          10/17/2026: upload the finished videos to -outbucket, -partsize, -uploadjobs and -endpointurl
+#          10/17/2026: -softaudio, so -subtitles soft no longer dubs the languages unless asked to
+#          10/17/2026: pass the options to runBatch by name
+#
+# ==================================================================================
+
+
+import argparse
+import asyncio
+import time
+from pipelineUtils import *
+from encodingUtils import *
+from uploadUtils import *
+
+# Get the command line arguments and parse them
+parser = argparse.ArgumentParser( prog='translatebatch.py', description='Process every video listed in a manifest file')
+parser.add_argument('-region', required=True, help="The AWS region containing the S3 buckets" )
+parser.add_argument('-manifest', required=True, help='The JSONL file listing the videos to process')
+parser.add_argument('-outbucket', required=True, help='The S3 bucket containing the output files')
+parser.add_argument('-transcribejobs', type=int, default=10, help='The number of transcription jobs to run at the same time')
+parser.add_argument('-renderjobs', type=int, default=None, help='The number of languages to process at the same time, across all videos.  Defaults to the number of cores')
+parser.add_argument('-workdir', default='batch', help='The directory that holds a working directory for each video')
+parser.add_argument('-report', default='batch-report.json', help='The file to write the status and timing report to')
+parser.add_argument('-backend', choices=['moviepy', 'ffmpeg'], default='moviepy', help='How the subtitles are put on the video: composited by MoviePy, or burned in with a single ffmpeg pass')
+parser.add_argument('-profile', choices=list(ENCODING_PROFILES), default=DEFAULT_ENCODING_PROFILE, help='The encoding profile (x264 preset, threads, CRF and audio bitrate)')
+parser.add_argument('-sizetarget', type=float, default=None, help='Use the fastest profile whose output is at most this many MB per minute, as measured by calibrateencoding.py')
+parser.add_argument('-calibration', default=CALIBRATION_FILE, help='The file written by calibrateencoding.py')
+parser.add_argument('-subtitles', choices=['burn', 'soft'], default='burn', help='burn: a video per language with the subtitles drawn on.  soft: one video with a selectable subtitle track per language')
+parser.add_argument('-softaudio', action='store_true', help='With -subtitles soft, also dub each language and add it as an audio track.  Without it only the subtitles are added')
+parser.add_argument('-dubbing', choices=['timeline', 'concat'], default='timeline', help='timeline: each cue is spoken at the time of its subtitle.  concat: the speech is joined back to back')
+parser.add_argument('-partsize', type=float, default=UPLOAD_PART_SIZE // 1048576, help='The size in MB of each part of the multipart uploads to -outbucket')
+parser.add_argument('-uploadjobs', type=int, default=UPLOAD_JOBS, help='The number of parts of each upload to send at the same time')
+parser.add_argument('-endpointurl', default=None, help='Upload to this S3 compatible endpoint instead of Amazon S3')
+
+# The render worker processes import this module, so only run the batch from the main process
+if __name__ == "__main__":
+	args = parser.parse_args()
+
+	videos = readManifest( args.manifest )
+
+	print( "==> translatebatch.py:\n")
+	print( "==> " + str(len(videos)) + " videos in " + args.manifest + ": " )
+	for video in videos:
+		print( "\t" + video["inbucket"] + video["infile"] + " ==> " + ", ".join( video["outlangs"] ) )
+
+	# Pick the fastest calibrated encoding profile that meets the size target, if there is one
+	if args.sizetarget != None:
+		args.profile = pickEncodingProfile( args.sizetarget, args.calibration )
+
+	started = time.time()
+	reports = asyncio.run( runBatch( videos, args.region, args.outbucket, transcribeJobs=args.transcribejobs, renderJobs=args.renderjobs, \
+		workRoot=args.workdir, backend=args.backend, profile=args.profile, subtitleMode=args.subtitles, dubbing=args.dubbing, \
+		upload=getUploadSettings( args.outbucket, args.region, args.partsize, args.uploadjobs, args.endpointurl ), softAudio=args.softaudio ) )
+	writeBatchReport( reports, args.report, time.time() - started )
@@ -25,6 +25,15 @@
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: -jobs to process the target languages in parallel worker processes
+#          10/17/2026: wait on the transcription job with waitForTranscriptionJob instead of a fixed 30 second poll
+#          10/17/2026: checkpoint the transcript and the source SRT so a rerun doesn't transcribe the video again
+#          10/17/2026: -backend to burn the subtitles in with ffmpeg
+#          10/17/2026: -profile and -sizetarget to choose the encoding profile
+#          10/17/2026: -subtitles soft to add the subtitles as tracks instead of burning them in
+#          10/17/2026: -dubbing to choose between the cue timeline and the old back to back audio track
+#          10/17/2026: upload the finished videos to -outbucket, -partsize, -uploadjobs and -endpointurl
+#          10/17/2026: -softaudio, so -subtitles soft no longer dubs the languages unless asked to
 #
 # ==================================================================================
 
@@ -35,6 +44,10 @@ from srtUtils import *
 import time
 from videoUtils import *
 from audioUtils import *
+from pipelineUtils import *
+from encodingUtils import *
+from checkpointUtils import *
+from uploadUtils import *
 
 # Get the command line arguments and parse them
 parser = argparse.ArgumentParser( prog='translatevideo.py', description='Process a video found in the input file, process it, and write tit out to the output file')
@@ -45,57 +58,56 @@ parser.add_argument('-outbucket', required=True, help='The S3 bucket containing
 parser.add_argument('-outfilename', required=True, help='The file name without the extension')
 parser.add_argument('-outfiletype', required=True, help='The output file type.  E.g. mp4, mov')
 parser.add_argument('-outlang', required=True, nargs='+', help='The language codes for the desired output.  E.g. en = English, de = German')		
-args = parser.parse_args()
-
-# print out parameters and key header information for the user
-print( "==> translatevideo.py:\n")
-print( "==> Parameters: ")
-print("\tInput bucket/object: " + args.inbucket + args.infile )
-print( "\tOutput bucket/object: " + args.outbucket + args.outfilename + "." + args.outfiletype )
-
-print( "\n==> Target Language Translation Output: " )
-
-for lang in args.outlang:
-	print( "\t" + args.outbucket + args.outfilename + "-" + lang + "." + args.outfiletype)
-	
-	
-# Create Transcription Job
-response = createTranscribeJob( args.region, args.inbucket, args.infile )
-
-# loop until the job successfully completes
-print( "\n==> Transcription Job: " + response["TranscriptionJob"]["TranscriptionJobName"] + "\n\tIn Progress"),
-
-while( response["TranscriptionJob"]["TranscriptionJobStatus"] == "IN_PROGRESS"):
-	print( "."),
-	time.sleep( 30 )
-	response = getTranscriptionJobStatus( response["TranscriptionJob"]["TranscriptionJobName"] )
-
-print( "\nJob Complete")
-print( "\tStart Time: " + str(response["TranscriptionJob"]["CreationTime"]) )
-print( "\tEnd Time: "  + str(response["TranscriptionJob"]["CompletionTime"]) )
-print( "\tTranscript URI: " + str(response["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]) )
-
-# Now get the transcript JSON from AWS Transcribe
-transcript = getTranscript( str(response["TranscriptionJob"]["Transcript"]["TranscriptFileUri"]) ) 
-# print( "\n==> Transcript: \n" + transcript)
-
-# Create the SRT File for the original transcript and write it out.  
-#writeTranscriptToSRT( transcript, 'en', "subtitles-en.srt" )  
-#createVideo( args.infile, "subtitles-en.srt", args.outfilename + "-en." + args.outfiletype, "audio-en.mp3", True)
-
-# Now write out the translation to the transcript for each of the target languages
-for lang in args.outlang:
-	#writeTranslationToSRT(transcript, 'en', lang, "subtitles-" + lang + ".srt", args.region ) 	
-	translation = translateTranscript( json.dumps(transcriptJSON), 'en', lang, args.region )
-	#mapTranslationAndWriteToSRT(translation, "subtitles-en.srt", lang, args.region, "subtitles-" + lang + ".srt")
-
-	#Now that we have the subtitle files, let's create the audio track
-#	createAudioTrackFromTranslation( args.region, transcript, 'en', lang, "audio-" + lang + ".mp3" )
-	
-	# Finally, create the composited video
-#	createVideo( args.infile, "subtitles-" + lang + ".srt", args.outfilename + "-" + lang + "." + args.outfiletype, "audio-" + lang + ".mp3", False)
-	
-	
-
-
-	
+parser.add_argument('-jobs', type=int, default=1, help='The number of target languages to process at the same time, each in its own process')
+parser.add_argument('-backend', choices=['moviepy', 'ffmpeg'], default='moviepy', help='How the subtitles are put on the video: composited by MoviePy, or burned in with a single ffmpeg pass')
+parser.add_argument('-profile', choices=list(ENCODING_PROFILES), default=DEFAULT_ENCODING_PROFILE, help='The encoding profile (x264 preset, threads, CRF and audio bitrate)')
+parser.add_argument('-sizetarget', type=float, default=None, help='Use the fastest profile whose output is at most this many MB per minute, as measured by calibrateencoding.py')
+parser.add_argument('-calibration', default=CALIBRATION_FILE, help='The file written by calibrateencoding.py')
+parser.add_argument('-subtitles', choices=['burn', 'soft'], default='burn', help='burn: a video per language with the subtitles drawn on.  soft: one video with a selectable subtitle track per language')
+parser.add_argument('-softaudio', action='store_true', help='With -subtitles soft, also dub each language and add it as an audio track.  Without it only the subtitles are added')
+parser.add_argument('-dubbing', choices=['timeline', 'concat'], default='timeline', help='timeline: each cue is spoken at the time of its subtitle.  concat: the speech is joined back to back')
+parser.add_argument('-partsize', type=float, default=UPLOAD_PART_SIZE // 1048576, help='The size in MB of each part of the multipart uploads to -outbucket')
+parser.add_argument('-uploadjobs', type=int, default=UPLOAD_JOBS, help='The number of parts of each upload to send at the same time')
+parser.add_argument('-endpointurl', default=None, help='Upload to this S3 compatible endpoint instead of Amazon S3')
+
+# The worker processes started for -jobs import this module, so only run the pipeline from the main process
+if __name__ == "__main__":
+	args = parser.parse_args()
+
+	# print out parameters and key header information for the user
+	print( "==> translatevideo.py:\n")
+	print( "==> Parameters: ")
+	print("\tInput bucket/object: " + args.inbucket + args.infile )
+	print( "\tOutput bucket/object: " + args.outbucket + args.outfilename + "." + args.outfiletype )
+
+	print( "\n==> Target Language Translation Output: " )
+
+	for lang in args.outlang:
+		print( "\t" + args.outbucket + args.outfilename + "-" + lang + "." + args.outfiletype)
+		
+		
+	# Pick the fastest calibrated encoding profile that meets the size target, if there is one
+	if args.sizetarget != None:
+		args.profile = pickEncodingProfile( args.sizetarget, args.calibration )
+
+	# Transcribe the video and save the transcript, unless the same video was already transcribed
+	transcript = "transcript.json"
+	runStage( "transcribe", [ args.inbucket, args.infile ], [ args.infile ], [ transcript ], \
+		transcribeToFile, args.region, args.inbucket, args.infile, args.outbucket, transcript )
+
+	# Create the SRT File for the original transcript and write it out.  The translations are timed against it
+	runStage( "srt-en", [ "en" ], [ transcript ], [ "subtitles-en.srt" ], writeTranscriptToSRT, transcript, 'en', "subtitles-en.srt" )
+	#createVideo( args.infile, "subtitles-en.srt", args.outfilename + "-en." + args.outfiletype, "audio-en.mp3", True)
+
+	# Now translate, subtitle, dub and render each of the target languages, args.jobs of them at a time
+	# Each language's video is uploaded to the output bucket as soon as it is rendered.  Soft subtitles only need the
+	# SRT files, so the languages are only dubbed if -softaudio asks for audio tracks as well
+	upload = getUploadSettings( args.outbucket, args.region, args.partsize, args.uploadjobs, args.endpointurl )
+	runLanguages( args.outlang, args.jobs, transcript, args.region, args.infile, args.outfilename, args.outfiletype, backend=args.backend, \
+		profile=args.profile, createAudio=( args.subtitles == 'burn' or args.softaudio ), renderVideo=( args.subtitles == 'burn' ), \
+		dubbing=args.dubbing, upload=upload )
+
+	# With soft subtitles, the languages all go into one copy of the video as tracks
+	if args.subtitles == 'soft':
+		muxLanguages( args.outlang, args.infile, args.outfilename + "." + args.outfiletype, includeAudio=args.softaudio )
+		uploadOutput( "upload", args.outfilename + "." + args.outfiletype, upload )
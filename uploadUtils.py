@@ -0,0 +1,199 @@
+# ==================================================================================
+# Copyright 2018 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+# ==================================================================================
+#
+# uploadUtils.py
+#
+# Purpose: The program uploads the finished videos to the output bucket.  Large files are sent as S3 multipart uploads
+#          with several parts in flight at the same time.  Every part carries its MD5 and SHA256 so S3 rejects a part
+#          that was damaged on the way, and the SHA256 checksums S3 returns are checked against the ones computed here
+#
+# Change Log:
+#          10/17/2026: Initial version
+#          10/17/2026: verify with SHA256 checksums instead of ETags, cancel the pending parts of a failed upload
+#
+# ==================================================================================
+
+import os
+import time
+import base64
+import random
+import hashlib
+import concurrent.futures
+from awsUtils import *
+
+# The size of each part of a multipart upload, and the number of parts sent at the same time.  The parts in flight are
+# held in memory, so this uses up to UPLOAD_PART_SIZE * UPLOAD_JOBS bytes
+UPLOAD_PART_SIZE = 64 * 1024 * 1024
+UPLOAD_JOBS = 8
+
+# S3's limits: every part but the last must be at least 5 MB, and an upload has at most 10000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+
+# ==================================================================================
+# Function: parseBucket
+# Purpose: Split an output bucket as given on the command line (e.g. "mybucket/", "mybucket/translated/" or
+#          "s3://mybucket/translated/") into the bucket name and the prefix of the keys
+# Parameters:
+#                 outbucket - the S3 bucket for the output files, optionally followed by a prefix
+# ==================================================================================
+def parseBucket( outbucket ):
+	if outbucket.startswith( "s3://" ):
+		outbucket = outbucket[5:]
+	bucket, _, prefix = outbucket.partition( "/" )
+	if len(prefix) > 0 and not prefix.endswith( "/" ):
+		prefix += "/"
+	return bucket, prefix
+
+
+# ==================================================================================
+# Function: getUploadSettings
+# Purpose: Return the upload settings that processLanguage and runBatch pass along to uploadFile, as one dictionary
+#          so they can be handed to the worker processes
+# Parameters:
+#                 outbucket - the S3 bucket for the output files, optionally followed by a prefix
+#                 region - the AWS region of the bucket (e.g. "us-east-1")
+#                 partSizeMB - the size of each part in megabytes
+#                 uploadJobs - the number of parts sent at the same time
+#                 endpointUrl - the URL of an S3 compatible service to use instead of S3, or None
+# ==================================================================================
+def getUploadSettings( outbucket, region, partSizeMB=UPLOAD_PART_SIZE // 1048576, uploadJobs=UPLOAD_JOBS, endpointUrl=None ):
+	return { "outbucket": outbucket, "region": region, "partSize": int( partSizeMB * 1048576 ), "uploadJobs": uploadJobs, \
+		"endpointUrl": endpointUrl }
+
+
+# ==================================================================================
+# Function: uploadFile
+# Purpose: Upload a file to S3 and check that what arrived is what was sent.  A file no bigger than one part goes up
+#          in a single request; a bigger one is sent as a multipart upload, uploadJobs parts at a time, and completed
+#          with the parts in order whatever order they finished in.  If a part fails, the parts not yet started are
+#          cancelled and the upload is aborted so no parts are left behind.  Returns the bytes, parts and seconds taken
+# Parameters:
+#                 fileName - the file to upload (e.g. "outputFileName-es.mp4")
+#                 bucket - the S3 bucket to upload to
+#                 key - the key of the object (e.g. "translated/outputFileName-es.mp4")
+#                 region - the AWS region of the bucket (e.g. "us-east-1")
+#                 partSize - the size of each part in bytes
+#                 uploadJobs - the number of parts sent at the same time
+#                 endpointUrl - the URL of an S3 compatible service to use instead of S3, or None
+# ==================================================================================
+def uploadFile( fileName, bucket, key, region=None, partSize=UPLOAD_PART_SIZE, uploadJobs=UPLOAD_JOBS, endpointUrl=None ):
+	s3 = getClient( "s3", region, endpointUrl )
+	size = os.path.getsize( fileName )
+	started = time.time()
+
+	# a very large file would need more than MAX_PARTS parts, so its parts are made bigger
+	partSize = max( partSize, MIN_PART_SIZE, -( -size // MAX_PARTS ) )
+
+	print( "\n==> Uploading " + fileName + " (" + "%.1f" % ( size / 1048576.0 ) + " MB) to s3://" + bucket + "/" + key )
+	if size <= partSize:
+		parts = [ uploadPart( s3, bucket, key, None, fileName, 1, 0, size ) ]
+	else:
+		upload = s3.create_multipart_upload( Bucket=bucket, Key=key, ChecksumAlgorithm="SHA256" )
+		uploadId = upload["UploadId"]
+		pool = concurrent.futures.ThreadPoolExecutor( max_workers=uploadJobs )
+		try:
+			futures = [ pool.submit( uploadPart, s3, bucket, key, uploadId, fileName, i + 1, offset, min( partSize, size - offset ) ) \
+				for i, offset in enumerate( range( 0, size, partSize ) ) ]
+			parts = [ future.result() for future in concurrent.futures.as_completed( futures ) ]
+			parts.sort( key=lambda part: part["PartNumber"] )
+
+			response = s3.complete_multipart_upload( Bucket=bucket, Key=key, UploadId=uploadId, \
+				MultipartUpload={ "Parts": [ { "PartNumber": part["PartNumber"], "ETag": part["ETag"], "ChecksumSHA256": part["ChecksumSHA256"] } \
+				for part in parts ] } )
+		except Exception:
+			# don't wait for the parts that haven't started, only for the ones already on their way
+			print( "\t==> Upload of " + fileName + " failed, aborting it" )
+			pool.shutdown( wait=True, cancel_futures=True )
+			s3.abort_multipart_upload( Bucket=bucket, Key=key, UploadId=uploadId )
+			raise
+		pool.shutdown()
+
+		# the checksum of a multipart object is the SHA256 of the SHA256s of its parts, followed by the number of parts
+		expected = base64.b64encode( hashlib.sha256( b"".join( base64.b64decode( part["ChecksumSHA256"] ) for part in parts ) ).digest() ).decode( "ascii" ) + \
+			"-" + str(len(parts))
+		checkChecksum( fileName, response.get( "ChecksumSHA256" ), expected )
+
+	# and the object must be the size of the file
+	head = s3.head_object( Bucket=bucket, Key=key )
+	if head["ContentLength"] != size:
+		raise RuntimeError( "Uploaded " + str(head["ContentLength"]) + " bytes of " + fileName + ", expected " + str(size) )
+
+	seconds = time.time() - started
+	print( "\t==> Uploaded " + fileName + " in " + str(len(parts)) + " parts, " + "%.1f" % seconds + " seconds (" + \
+		"%.1f" % ( size / 1048576.0 / max( seconds, 0.001 ) ) + " MB/s), checksums verified" )
+	return { "bytes": size, "parts": len(parts), "seconds": seconds }
+
+
+# ==================================================================================
+# Function: uploadPart
+# Purpose: Read one part of a file and upload it with its MD5 and SHA256, retrying with backoff if it fails.  S3 rejects
+#          a part whose data doesn't match them, and the SHA256 it returns is checked as well.  With no uploadId the
+#          whole object is sent with a single put_object.  Returns the part number, ETag and SHA256 of the part
+# Parameters:
+#                 s3 - the Amazon S3 client
+#                 bucket - the S3 bucket to upload to
+#                 key - the key of the object
+#                 uploadId - the id of the multipart upload, or None for a single request upload
+#                 fileName - the file to upload
+#                 partNumber - the number of the part, from 1
+#                 offset - where the part starts in the file
+#                 length - the number of bytes in the part
+#                 maxAttempts - the number of times the part is sent before giving up on it
+# ==================================================================================
+def uploadPart( s3, bucket, key, uploadId, fileName, partNumber, offset, length, maxAttempts=4 ):
+	# each part is read on its own file handle, so the threads don't share a file position
+	with open( fileName, "rb" ) as f:
+		f.seek( offset )
+		data = f.read( length )
+	contentMD5 = base64.b64encode( hashlib.md5( data ).digest() ).decode( "ascii" )
+	checksum = base64.b64encode( hashlib.sha256( data ).digest() ).decode( "ascii" )
+
+	attempt = 1
+	while True:
+		try:
+			if uploadId == None:
+				response = s3.put_object( Bucket=bucket, Key=key, Body=data, ContentMD5=contentMD5, ChecksumSHA256=checksum )
+			else:
+				response = s3.upload_part( Bucket=bucket, Key=key, UploadId=uploadId, PartNumber=partNumber, Body=data, \
+					ContentMD5=contentMD5, ChecksumSHA256=checksum )
+			checkChecksum( fileName + " part " + str(partNumber), response.get( "ChecksumSHA256" ), checksum )
+			return { "PartNumber": partNumber, "ETag": response["ETag"], "ChecksumSHA256": checksum }
+		except Exception as error:
+			if attempt >= maxAttempts:
+				print( "\t==> Error uploading part " + str(partNumber) + " of " + fileName )
+				raise
+			delay = ( 2 ** attempt ) * 0.25 + random.uniform( 0, 0.5 )
+			print( "\t==> Upload of part " + str(partNumber) + " failed (" + str(error) + "), retrying in " + "%.1f" % delay + " seconds" )
+			time.sleep( delay )
+			attempt += 1
+
+
+# ==================================================================================
+# Function: checkChecksum
+# Purpose: Raise an error if the SHA256 returned by S3 isn't the one computed here.  A store that doesn't return
+#          checksums is trusted on the Content-MD5 it checked instead.  The ETag isn't used, since it is only the MD5 of
+#          the data on unencrypted S3 buckets
+# Parameters:
+#                 what - the file or part, for the message
+#                 returned - the checksum returned by S3, or None
+#                 expected - the checksum computed from the data
+# ==================================================================================
+def checkChecksum( what, returned, expected ):
+	if returned != None and returned != expected:
+		raise RuntimeError( "Upload of " + what + " has checksum " + returned + ", expected " + expected )
@@ -23,6 +23,7 @@
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: clipPrefix so that several languages can render at the same time
 #
 # ==================================================================================
 
@@ -63,9 +64,10 @@ def annotate(clip, txt, txt_color='white', fontsize=22, font='Arial-Bold'):
 #                 outputFileName - the filename of the output video file (e.g. "outputFileName.mp4")
 #                 alternateAudioFileName - the filename of an MP3 file that should be used to replace the audio track
 #                 useOriginalAudio - boolean value as to whether or not we should leave the orignal audio in place or overlay it
+#                 clipPrefix - the prefix of the intermediate clip files so that languages rendered side by side don't collide
 #
 # ==================================================================================
-def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName, useOriginalAudio=True ):
+def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName, useOriginalAudio=True, clipPrefix='clip_' ):
 	# This function is used to put all of the pieces together.   
 	# Note that if we need to use an alternate audio track, the last parm should = False
 	
@@ -122,7 +124,7 @@ def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateA
 		test = test + 1
 		if test > 10:
 			break
-		fileName = 'clip_' + str(math.floor(subset[0][0][0])) + '.mp4'
+		fileName = clipPrefix + str(math.floor(subset[0][0][0])) + '.mp4'
 		annotated_clips = [annotate(clip.subclip(from_t, to_t), txt) for (from_t, to_t), txt in subset]
 		clipFile = concatenate_videoclips(annotated_clips)
 		clipFile.write_videofile(fileName)
@@ -162,6 +164,16 @@ def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateA
 #
 # Change Log:
 #          6/29/2018: Initial version
+#          10/17/2026: clipPrefix so that several languages can render at the same time
+#          10/17/2026: getMediaDuration
+#          10/17/2026: checkpoint each segment so a rerun resumes a partly rendered video
+#          10/17/2026: render the segments in a pool of worker processes
+#          10/17/2026: backend option to burn the subtitles in with a single ffmpeg pass
+#          10/17/2026: take the caption images in annotate from a cache
+#          10/17/2026: join the segments with a stream copy instead of encoding them again
+#          10/17/2026: encode with a named encoding profile
+#          10/17/2026: prune the caption cache once the segments are rendered
+#          10/17/2026: hash the source files once in createVideo instead of in every segment worker
 #
 # ==================================================================================
 
@@ -170,14 +182,23 @@ from moviepy import editor
 from moviepy.video.tools.subtitles import SubtitlesClip
 from time import gmtime, strftime
 from audioUtils import *
+from checkpointUtils import *
+from ffmpegUtils import *
+from captionUtils import *
+from encodingUtils import *
+import os
 import math
+import time
 import gc
+import collections
+import concurrent.futures
 
 
 # ==================================================================================
 # Function: annotate
 # Purpose: This function creates a TextClip based on the provided text and composites the subtitle onto the provided clip.
-#          Defaults are used for txt_color, fontsize, and font.   You can override them as desired
+#          Defaults are used for txt_color, fontsize, and font.   You can override them as desired.  The caption image
+#          comes from the caption cache (see captionUtils) when the same caption has been drawn before
 # Parameters: 
 #                 clip - the clip to composite the text on 
 #                 txt - the block of text to composite on the clip
@@ -188,7 +209,7 @@ import gc
 # ==================================================================================
 def annotate(clip, txt, txt_color='white', fontsize=22, font='Arial-Bold'):
     # Writes a text at the bottom of the clip  'Xolonium-Bold'
-		txtclip = editor.TextClip(txt, fontsize=fontsize, font=font, color=txt_color, method="caption", size=(700, 50)).on_color(color=[0,0,0])
+		txtclip = getCaptionClip(txt, txt_color=txt_color, fontsize=fontsize, font=font, size=(700, 50), boxColor=[0,0,0])
 		cvc = editor.CompositeVideoClip([clip, txtclip.set_pos(('center', 20))])
 		clip = cvc.set_duration(clip.duration)
 		return clip
@@ -202,28 +223,38 @@ def annotate(clip, txt, txt_color='white', fontsize=22, font='Arial-Bold'):
 #                 outputFileName - the filename of the output video file (e.g. "outputFileName.mp4")
 #                 alternateAudioFileName - the filename of an MP3 file that should be used to replace the audio track
 #                 useOriginalAudio - boolean value as to whether or not we should leave the orignal audio in place or overlay it
+#                 clipPrefix - the prefix of the intermediate clip files so that languages rendered side by side don't collide
+#                 segmentJobs - the number of worker processes rendering segments at the same time, or None for one per core
+#                 backend - 'moviepy' to composite the subtitles segment by segment, 'ffmpeg' to burn them in with one ffmpeg pass
+#                 subtitlesEncoding - the code page the SRT file was written in, for the ffmpeg backend (None for UTF-8)
+#                 profile - the name of the encoding profile (see encodingUtils), or None for the default profile
 #
 # ==================================================================================
-def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName, useOriginalAudio=True ):
+def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName, useOriginalAudio=True, clipPrefix='clip_', \
+	segmentJobs=None, backend='moviepy', subtitlesEncoding=None, profile=None ):
 	# This function is used to put all of the pieces together.   
 	# Note that if we need to use an alternate audio track, the last parm should = False
 	
 	print( "\n==> createVideo " )
 
-	# Load the original clip
+	# Load the original clip.  Only its duration is needed here, each worker process opens the clip for itself
 	print("\t" + strftime("%H:%M:%S", gmtime()), "Reading video clip: " + originalClipName) 
-	clip = VideoFileClip(originalClipName)
+	clip = VideoFileClip(originalClipName, audio=False)
 	print("\t\t==> Original clip duration: " + str(clip.duration))
 
 	if useOriginalAudio == False:
-		print(strftime( "\t" + "%H:%M:%S", gmtime()), "Reading alternate audio track: " + alternateAudioFileName)
-		audio = AudioFileClip(alternateAudioFileName)
-		audio = audio.subclip( 0, clip.duration )
-		audio.set_duration(clip.duration)
-		print("\t\t==> Audio duration: " + str(audio.duration))
-		clip = clip.set_audio( audio )
+		print(strftime( "\t" + "%H:%M:%S", gmtime()), "Using alternate audio track: " + alternateAudioFileName)
 	else:
 		print(strftime( "\t" + "%H:%M:%S", gmtime()), "Using original audio track...")
+
+	# The ffmpeg backend draws the whole SRT in one pass, styled like annotate's captions
+	if backend == 'ffmpeg':
+		width, height = clip.size
+		duration = clip.duration
+		clip.close()
+		burnSubtitles( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName, useOriginalAudio, \
+			getSubtitleStyle( width, height ), subtitlesEncoding, duration, getFFmpegParams( profile ) )
+		return
 		
 	# Create a lambda function that will be used to generate the subtitles for each sequence in the SRT
 	generator = lambda txt: TextClip(txt, font='Arial-Bold', fontsize=24, color='white')
@@ -255,7 +286,7 @@ def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateA
 			subsetTxts.append(txts[:])
 			txts = []
 	if len(txts) > 0:
-		subsetTxts.append([txts[:]])
+		subsetTxts.append(txts[:])
 
 	#subtract .001 from last time
 #	subsetTxts[-1][0][1] -= 0.001
@@ -263,24 +294,107 @@ def createVideo( originalClipName, subtitlesFileName, outputFileName, alternateA
 	for t in subsetTxts:
 		print(t[0])
 
-	#test = 0
-	clipFileNames = []
-	for subset in subsetTxts:
-	#	test = test + 1
-	#	if test > 3:
-	#		break
-		fileName = 'clip_' + str(math.floor(subset[0][0][0])) + '.mp4'
-		annotated_clips = [annotate(clip.subclip(from_t, to_t), txt) for (from_t, to_t), txt in subset]
-		clipFile = concatenate_videoclips(annotated_clips)
-		clipFile.write_videofile(fileName)
-		clipFileNames.append(fileName)
-		gc.collect()
+	clip.close()
+
+	# The segment checkpoints are keyed on the contents of the source files.  They are hashed once here, since the
+	# worker processes would each read the whole video again to hash it for themselves
+	segmentInputs = [ originalClipName ] if useOriginalAudio else [ originalClipName, alternateAudioFileName ]
+	segmentHashes = [ hashFile( fileName ) for fileName in segmentInputs ]
+	clipFileNames = [ clipPrefix + str(math.floor(subset[0][0][0])) + '.mp4' for subset in subsetTxts ]
+
+	# Render the segments side by side, one worker process per core.  The clip files are joined in the order of the
+	# subtitles, whatever order the workers finish them in
+	workers = max( 1, min( segmentJobs or os.cpu_count(), len(subsetTxts) ) )
+	print("\t" + strftime("%H:%M:%S", gmtime()), "Rendering " + str(len(subsetTxts)) + " segments with " + str(workers) + " worker processes")
+	with concurrent.futures.ProcessPoolExecutor( max_workers=workers ) as pool:
+		futures = [ pool.submit( renderSegment, originalClipName, alternateAudioFileName, useOriginalAudio, subset, fileName, segmentHashes, profile ) \
+			for subset, fileName in zip( subsetTxts, clipFileNames ) ]
+		captionStats = collections.Counter()
+		for future in futures:
+			captionStats.update( future.result() )
+	printCaptionCacheStats( captionStats )
+
+	# the workers each prune the cache as they store captions, but a short video may not store enough to trigger it
+	pruneCaptionCache()
+
+	# The segments were all encoded the same way, so they can be joined without encoding every frame again.  If one
+	# of them doesn't match, fall back to joining them with MoviePy
+	try:
+		concatenateClips( clipFileNames, outputFileName )
+	except ValueError as error:
+		print( "\t==> " + str(error) + ", re-encoding instead" )
+		finalClips = []
+		for c in clipFileNames:
+			finalClips.append(VideoFileClip(c))
+		finalFile = concatenate_videoclips(finalClips)
+		finalFile.write_videofile(outputFileName, **getMoviePyParams( profile ))
 
-	finalClips = []
-	for c in clipFileNames:
-		finalClips.append(VideoFileClip(c))
-	finalFile = concatenate_videoclips(finalClips)
-	finalFile.write_videofile(outputFileName)
+# ==================================================================================
+# Function: openClip
+# Purpose: Open the original clip and, if asked to, replace its audio track with the alternate one
+# Parameters: 
+#                 originalClipName - the filename of the orignal content (e.g. "originalVideo.mp4")
+#                 alternateAudioFileName - the filename of an MP3 file that should be used to replace the audio track
+#                 useOriginalAudio - boolean value as to whether or not we should leave the orignal audio in place or overlay it
+#
+# ==================================================================================
+def openClip( originalClipName, alternateAudioFileName, useOriginalAudio ):
+	clip = VideoFileClip(originalClipName)
+	if useOriginalAudio == False:
+		audio = AudioFileClip(alternateAudioFileName)
+		audio = audio.subclip( 0, clip.duration )
+		clip = clip.set_audio( audio )
+	return clip
+
+# ==================================================================================
+# Function: renderSegment
+# Purpose: Render one segment in a worker process.  The worker opens its own copy of the clip since readers can't be
+#          shared between processes.  A segment that fails is tried again on its own, up to maxAttempts times, without
+#          holding up the other segments.  Returns the caption cache counters of the segment
+# Parameters: 
+#                 originalClipName - the filename of the orignal content (e.g. "originalVideo.mp4")
+#                 alternateAudioFileName - the filename of an MP3 file that should be used to replace the audio track
+#                 useOriginalAudio - boolean value as to whether or not we should leave the orignal audio in place or overlay it
+#                 subset - the list of subtitles in the segment, as ((from_t, to_t), txt)
+#                 fileName - the filename of the clip file to write
+#                 segmentHashes - the hashes of the files the segment is rendered from (see hashFile), for its checkpoint
+#                 profile - the name of the encoding profile (see encodingUtils), or None for the default profile
+#                 maxAttempts - the number of times to try the segment before giving up
+#
+# ==================================================================================
+def renderSegment( originalClipName, alternateAudioFileName, useOriginalAudio, subset, fileName, segmentHashes, profile=None, maxAttempts=3 ):
+	# clear the counters left over from the last segment this worker rendered
+	getCaptionCacheStats()
+	for attempt in range( 1, maxAttempts + 1 ):
+		try:
+			clip = openClip( originalClipName, alternateAudioFileName, useOriginalAudio )
+			try:
+				# a segment already rendered from the same sources and subtitles is kept, so a rerun picks up where the last one stopped
+				runStage( fileName[:-len('.mp4')], [ subset, useOriginalAudio, getEncodingProfile( profile ), segmentHashes ], [], [ fileName ], \
+					writeSegment, clip, subset, fileName, profile )
+			finally:
+				clip.close()
+			return getCaptionCacheStats()
+		except Exception as error:
+			if attempt == maxAttempts:
+				raise
+			print( "\t==> Segment " + fileName + " failed (" + repr(error) + "), trying again" )
+			time.sleep( attempt )
+
+# ==================================================================================
+# Function: writeSegment
+# Purpose: Render one segment of the subtitled video to its own clip file
+# Parameters: 
+#                 clip - the original clip (with the alternate audio track already set, if any)
+#                 subset - the list of subtitles in the segment, as ((from_t, to_t), txt)
+#                 fileName - the filename of the clip file to write
+#                 profile - the name of the encoding profile (see encodingUtils), or None for the default profile
+#
+# ==================================================================================
+def writeSegment( clip, subset, fileName, profile=None ):
+	annotated_clips = [annotate(clip.subclip(from_t, to_t), txt) for (from_t, to_t), txt in subset]
+	clipFile = concatenate_videoclips(annotated_clips)
+	clipFile.write_videofile(fileName, **getMoviePyParams( profile ))
 
 def createVideoVoiceOverOnly( originalClipName, subtitlesFileName, outputFileName, alternateAudioFileName, useOriginalAudio=True ):
 	# This function is used to put all of the pieces together.   
@@ -304,4 +418,21 @@ def createVideoVoiceOverOnly( originalClipName, subtitlesFileName, outputFileNam
 		print(strftime( "\t" + "%H:%M:%S", gmtime()), "Using original audio track...")
 
 	gc.collect()
-	clip.write_videofile(outputFileName)
\ No newline at end of file
+	clip.write_videofile(outputFileName)
+
+
+# ==================================================================================
+# Function: getMediaDuration
+# Purpose: Return the duration in seconds of a local media file, or None if it can't be read
+# Parameters: 
+#                 fileName - the filename of the media (e.g. "originalVideo.mp4")
+#
+# ==================================================================================
+def getMediaDuration( fileName ):
+	try:
+		clip = VideoFileClip( fileName, audio=False )
+		duration = clip.duration
+		clip.close()
+		return duration
+	except Exception:
+		return None